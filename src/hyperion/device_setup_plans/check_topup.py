@@ -0,0 +1,123 @@
+"""
+Top-up gating which overlaps with the rest of the setup for a collection. Rather than
+sleeping through the top-up right before collection, as in
+dodal.plans.check_topup.check_topup_and_wait_if_necessary, the wait is predicted early
+in the plan and started in the background, so that any setup which doesn't need beam
+can be done while waiting.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass, field
+from time import time
+
+import bluesky.plan_stubs as bps
+from blueapi.core import MsgGenerator
+from dodal.devices.synchrotron import Synchrotron
+from dodal.plans.check_topup import (
+    ALLOWED_MODES,
+    COUNTDOWN_DURING_TOPUP,
+    DECAY_MODE_COUNTDOWN,
+    check_topup_and_wait_if_necessary,
+    wait_for_topup_complete,
+)
+from ophyd_async.core import AsyncStatus
+
+from hyperion.log import LOGGER
+
+TOPUP_WAIT_GROUP = "topup_wait"
+
+
+class _TopupTimer:
+    """Movable which finishes moving after the number of seconds it is set to, so that
+    a wait for a top-up can be put in a group and waited on later"""
+
+    def __init__(self, name: str = "topup_timer"):
+        self.name = name
+        self.parent = None
+
+    @AsyncStatus.wrap
+    async def set(self, value: float):
+        await asyncio.sleep(value)
+
+
+def topup_gating_permitted(machine_mode, time_to_topup: float) -> bool:
+    return time_to_topup != DECAY_MODE_COUNTDOWN and machine_mode in ALLOWED_MODES
+
+
+@dataclass
+class TopupWait:
+    total_exposure_time: float
+    ops_time: float
+    gating: bool = True
+    wait_s: float = 0.0
+    started_at: float = field(default_factory=time)
+
+
+def start_topup_wait(
+    synchrotron: Synchrotron,
+    total_exposure_time: float,
+    ops_time: float,
+    group: str = TOPUP_WAIT_GROUP,
+) -> MsgGenerator:
+    """Predicts whether the collection would run into the next top-up and, if it
+    would, starts waiting for the top-up to finish in the given group. Should be
+    called before the setup that doesn't need beam, with finish_topup_wait called
+    right before collection.
+
+    Args:
+        synchrotron (Synchrotron): Synchrotron device.
+        total_exposure_time (float): Expected total exposure time for the
+            collection, in seconds.
+        ops_time (float): Additional time to account for setup and motion, in
+            seconds.
+        group (str): The group to start the wait in.
+
+    Returns:
+        A TopupWait to pass to finish_topup_wait
+    """
+    topup_wait = TopupWait(total_exposure_time, ops_time)
+    machine_mode = yield from bps.rd(synchrotron.synchrotron_mode)
+    time_to_topup = yield from bps.rd(synchrotron.top_up_start_countdown)
+    if not topup_gating_permitted(machine_mode, time_to_topup):
+        LOGGER.info(f"Top-up gating disabled, {machine_mode=}, {time_to_topup=}")
+        topup_wait.gating = False
+        return topup_wait
+    if total_exposure_time + ops_time > time_to_topup:
+        topup_wait.wait_s = yield from bps.rd(synchrotron.top_up_end_countdown)
+        LOGGER.info(
+            f"Collection would overlap top-up in {time_to_topup}s, starting "
+            f"{topup_wait.wait_s}s wait for it to finish"
+        )
+        yield from bps.abs_set(_TopupTimer(), topup_wait.wait_s, group=group)
+    return topup_wait
+
+
+def finish_topup_wait(
+    synchrotron: Synchrotron,
+    topup_wait: TopupWait,
+    group: str = TOPUP_WAIT_GROUP,
+) -> MsgGenerator:
+    """Waits for any remaining time before a top-up started by start_topup_wait is
+    over, logging how much of the wait was spent on other setup. If no wait was
+    needed then the gate is checked again in case the setup has taken us into the
+    next top-up."""
+    if not topup_wait.gating:
+        return
+    if not topup_wait.wait_s:
+        yield from check_topup_and_wait_if_necessary(
+            synchrotron, topup_wait.total_exposure_time, topup_wait.ops_time
+        )
+        return
+
+    overlapped_s = min(time() - topup_wait.started_at, topup_wait.wait_s)
+    yield from bps.wait(group)
+    if (
+        yield from bps.rd(synchrotron.top_up_start_countdown)
+    ) == COUNTDOWN_DURING_TOPUP:
+        yield from wait_for_topup_complete(synchrotron)
+    LOGGER.info(
+        f"Top-up wait of {topup_wait.wait_s}s overlapped {overlapped_s:.2f}s of "
+        f"setup, waited a further {time() - topup_wait.started_at - overlapped_s:.2f}s"
+    )
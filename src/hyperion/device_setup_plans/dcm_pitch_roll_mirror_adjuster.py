@@ -1,16 +1,21 @@
 import json
+import os
+from dataclasses import dataclass, field
+from functools import lru_cache
+from time import time
+from typing import Any, Callable
 
 import bluesky.plan_stubs as bps
+import numpy as np
 from dodal.devices.focusing_mirror import (
     FocusingMirrorWithStripes,
     MirrorStripe,
     VFMMirrorVoltages,
 )
 from dodal.devices.undulator_dcm import UndulatorDCM
-from dodal.devices.util.adjuster_plans import lookup_table_adjuster
-from dodal.devices.util.lookup_tables import (
-    linear_interpolation_lut,
-)
+from dodal.devices.util.lookup_tables import linear_interpolation_lut
+from ophyd.status import StatusBase
+from ophyd_async.core import AsyncStatus
 
 from hyperion.log import LOGGER
 
@@ -18,13 +23,73 @@ MIRROR_VOLTAGE_GROUP = "MIRROR_VOLTAGE_GROUP"
 DCM_GROUP = "DCM_GROUP"
 
 
+@dataclass
+class EnergyChangeTimeline:
+    """When each axis moved during an energy change, in seconds since it started"""
+
+    start: float = field(default_factory=time)
+    axes: dict[str, tuple[float, float | None]] = field(default_factory=dict)
+
+    def track(self, axis: str, status: StatusBase | AsyncStatus):
+        self.axes[axis] = (time() - self.start, None)
+        status.add_callback(lambda _: self._finished(axis))
+
+    def _finished(self, axis: str):
+        self.axes[axis] = (self.axes[axis][0], time() - self.start)
+
+    def __str__(self) -> str:
+        return ", ".join(
+            f"{axis} {started:.2f}-{'?' if finished is None else f'{finished:.2f}'}s"
+            for axis, (started, finished) in self.axes.items()
+        )
+
+
+def timed_set(device, value, group: str, timeline: EnergyChangeTimeline | None = None):
+    """abs_set that records in the timeline when the device starts and finishes"""
+    status = yield from bps.abs_set(device, value, group=group)
+    if timeline is not None and status is not None:
+        timeline.track(device.name, status)
+
+
+@lru_cache(maxsize=32)
+def _linear_interpolation_lut(path: str, mtime_ns: int) -> Callable[[float], float]:
+    return linear_interpolation_lut(path)
+
+
+@lru_cache(maxsize=8)
+def _voltage_lookup_table(path: str, mtime_ns: int) -> dict[str, Any]:
+    with open(path) as lut_file:
+        return json.load(lut_file)
+
+
+def cached_linear_interpolation_lut(path: str) -> Callable[[float], float]:
+    """As linear_interpolation_lut but only re-reads the file when it has been
+    modified since it was last parsed"""
+    return _linear_interpolation_lut(path, os.stat(path).st_mtime_ns)
+
+
+@lru_cache(maxsize=8)
+def _energy_distance_table(path: str, mtime_ns: int) -> np.ndarray:
+    return np.loadtxt(path, comments=["#", "Units"])
+
+
+def undulator_gap_for_energy_mm(undulator_dcm: UndulatorDCM, energy_kev) -> float:
+    """The gap the undulator is moved to when undulator_dcm is set to energy_kev"""
+    path = undulator_dcm.id_gap_lookup_table_path
+    energies_ev, gaps_mm = _energy_distance_table(
+        path, os.stat(path).st_mtime_ns
+    ).transpose()
+    return float(gaps_mm[np.argmin(np.abs(energies_ev - energy_kev * 1000))])
+
+
 def _apply_and_wait_for_voltages_to_settle(
     stripe: MirrorStripe,
     mirror: FocusingMirrorWithStripes,
     mirror_voltages: VFMMirrorVoltages,
+    timeline: EnergyChangeTimeline | None = None,
 ):
-    with open(mirror_voltages.voltage_lookup_table_path) as lut_file:
-        json_obj = json.load(lut_file)
+    lut_path = mirror_voltages.voltage_lookup_table_path
+    json_obj = _voltage_lookup_table(lut_path, os.stat(lut_path).st_mtime_ns)
 
     # sample mode is the only mode supported
     sample_data = json_obj["sample"]
@@ -45,15 +110,18 @@ def _apply_and_wait_for_voltages_to_settle(
         LOGGER.debug(
             f"Applying and waiting for voltage {voltage_channel.name} = {required_voltage}"
         )
-        yield from bps.abs_set(
-            voltage_channel, required_voltage, group=MIRROR_VOLTAGE_GROUP
+        yield from timed_set(
+            voltage_channel, required_voltage, MIRROR_VOLTAGE_GROUP, timeline
         )
 
     yield from bps.wait(group=MIRROR_VOLTAGE_GROUP)
 
 
 def adjust_mirror_stripe(
-    energy_kev, mirror: FocusingMirrorWithStripes, mirror_voltages: VFMMirrorVoltages
+    energy_kev,
+    mirror: FocusingMirrorWithStripes,
+    mirror_voltages: VFMMirrorVoltages,
+    timeline: EnergyChangeTimeline | None = None,
 ):
     """Feedback should be OFF prior to entry, in order to prevent
     feedback from making unnecessary corrections while beam is being adjusted."""
@@ -62,11 +130,14 @@ def adjust_mirror_stripe(
     LOGGER.info(
         f"Adjusting mirror stripe for {energy_kev}keV selecting {stripe} stripe"
     )
-    yield from bps.abs_set(mirror.stripe, stripe, wait=True)
+    yield from timed_set(mirror.stripe, stripe, mirror.stripe.name, timeline)
+    yield from bps.wait(mirror.stripe.name)
     yield from bps.trigger(mirror.apply_stripe)
 
     LOGGER.info("Adjusting mirror voltages...")
-    yield from _apply_and_wait_for_voltages_to_settle(stripe, mirror, mirror_voltages)
+    yield from _apply_and_wait_for_voltages_to_settle(
+        stripe, mirror, mirror_voltages, timeline
+    )
 
 
 def adjust_dcm_pitch_roll_vfm_from_lut(
@@ -74,40 +145,39 @@ def adjust_dcm_pitch_roll_vfm_from_lut(
     vfm: FocusingMirrorWithStripes,
     vfm_mirror_voltages: VFMMirrorVoltages,
     energy_kev,
+    timeline: EnergyChangeTimeline | None = None,
 ):
     """Beamline energy-change post-adjustments : Adjust DCM and VFM directly from lookup tables.
     Lookups are performed against the Bragg angle which will have been automatically set by EPICS as a side-effect of the
     energy change prior to calling this function.
+    The DCM moves are independent of the VFM stripe and voltages so they are started
+    first and only waited for once the stripe has been changed.
     Feedback should be OFF prior to entry, in order to prevent
     feedback from making unnecessary corrections while beam is being adjusted."""
 
-    # DCM Pitch
     dcm = undulator_dcm.dcm
     LOGGER.info(f"Adjusting DCM and VFM for {energy_kev} keV")
     bragg_deg = yield from bps.rd(dcm.bragg_in_degrees.user_readback)
     LOGGER.info(f"Read Bragg angle = {bragg_deg} degrees")
-    dcm_pitch_adjuster = lookup_table_adjuster(
-        linear_interpolation_lut(undulator_dcm.dcm_pitch_converter_lookup_table_path),
-        dcm.pitch_in_mrad,
-        bragg_deg,
-    )
-    yield from dcm_pitch_adjuster(DCM_GROUP)
-    # It's possible we can remove these waits but we need to check
-    LOGGER.info("Waiting for DCM pitch adjust to complete...")
+
+    # DCM Pitch
+    pitch_mrad = cached_linear_interpolation_lut(
+        undulator_dcm.dcm_pitch_converter_lookup_table_path
+    )(bragg_deg)
+    LOGGER.info(f"Adjusting DCM pitch to {pitch_mrad} mrad")
+    yield from timed_set(dcm.pitch_in_mrad, pitch_mrad, DCM_GROUP, timeline)
 
     # DCM Roll
-    dcm_roll_adjuster = lookup_table_adjuster(
-        linear_interpolation_lut(undulator_dcm.dcm_roll_converter_lookup_table_path),
-        dcm.roll_in_mrad,
-        bragg_deg,
-    )
-    yield from dcm_roll_adjuster(DCM_GROUP)
-    LOGGER.info("Waiting for DCM roll adjust to complete...")
+    roll_mrad = cached_linear_interpolation_lut(
+        undulator_dcm.dcm_roll_converter_lookup_table_path
+    )(bragg_deg)
+    LOGGER.info(f"Adjusting DCM roll to {roll_mrad} mrad")
+    yield from timed_set(dcm.roll_in_mrad, roll_mrad, DCM_GROUP, timeline)
 
     # DCM Perp pitch
     offset_mm = undulator_dcm.dcm_fixed_offset_mm
     LOGGER.info(f"Adjusting DCM offset to {offset_mm} mm")
-    yield from bps.abs_set(dcm.offset_in_mm, offset_mm, group=DCM_GROUP)
+    yield from timed_set(dcm.offset_in_mm, offset_mm, DCM_GROUP, timeline)
 
     #
     # Adjust mirrors
@@ -119,16 +189,15 @@ def adjust_dcm_pitch_roll_vfm_from_lut(
     # not sure how we check this
 
     # VFM Stripe selection
-    yield from adjust_mirror_stripe(energy_kev, vfm, vfm_mirror_voltages)
+    yield from adjust_mirror_stripe(energy_kev, vfm, vfm_mirror_voltages, timeline)
+    LOGGER.info("Waiting for DCM adjust to complete...")
     yield from bps.wait(DCM_GROUP)
 
     # VFM Adjust - for I03 this table always returns the same value
     vfm_lut = vfm.bragg_to_lat_lookup_table_path
     assert vfm_lut is not None
-    vfm_x_adjuster = lookup_table_adjuster(
-        linear_interpolation_lut(vfm_lut),
-        vfm.x_mm,
-        bragg_deg,
-    )
+    vfm_x_mm = cached_linear_interpolation_lut(vfm_lut)(bragg_deg)
+    LOGGER.info(f"Adjusting VFM Lat (Horizontal Translation) to {vfm_x_mm} mm")
+    yield from timed_set(vfm.x_mm, vfm_x_mm, vfm.x_mm.name, timeline)
     LOGGER.info("Waiting for VFM Lat (Horizontal Translation) to complete...")
-    yield from vfm_x_adjuster()
+    yield from bps.wait(vfm.x_mm.name)
@@ -1,6 +1,13 @@
 from __future__ import annotations
 
+import asyncio
+import inspect
+from dataclasses import dataclass
+from typing import Any, Callable, Sequence
+
 import bluesky.plan_stubs as bps
+from bluesky.protocols import Configurable, Readable
+from bluesky.utils import maybe_await
 from dodal.devices.aperturescatterguard import ApertureScatterguard
 from dodal.devices.attenuator import Attenuator
 from dodal.devices.dcm import DCM
@@ -16,25 +23,84 @@ from hyperion.log import LOGGER
 from hyperion.parameters.constants import CONST
 
 
+@dataclass(frozen=True)
+class ConcurrentReadable:
+    """Reads a number of devices and signals at the same time, so that they can go
+    into one event without waiting for each read in turn. The readings keep the names
+    of the objects read, so the event has the same data keys as if each had been read
+    separately.
+
+    Synchronous reads, as of ophyd devices, are made in threads so that they overlap
+    as well. Two of these with the same name and objects are equal, as the RunEngine
+    needs the objects read for a descriptor to be the same each time it is used."""
+
+    name: str
+    readables: tuple[Readable, ...]
+    parent: None = None
+
+    async def _merged(self, method: str, readables: Sequence[Any]) -> dict:
+        results = await asyncio.gather(
+            *(_call(getattr(readable, method)) for readable in readables)
+        )
+        return {key: value for result in results for key, value in result.items()}
+
+    async def read(self):
+        return await self._merged("read", self.readables)
+
+    async def describe(self):
+        return await self._merged("describe", self.readables)
+
+    def _configurables(self):
+        return [r for r in self.readables if isinstance(r, Configurable)]
+
+    async def read_configuration(self):
+        return await self._merged("read_configuration", self._configurables())
+
+    async def describe_configuration(self):
+        return await self._merged("describe_configuration", self._configurables())
+
+
+async def _call(method: Callable[[], Any]) -> Any:
+    if inspect.iscoroutinefunction(method):
+        return await method()
+    return await maybe_await(await asyncio.to_thread(method))
+
+
+def read_concurrently(name: str, readables: Sequence[Readable]):
+    """Creates an event with the given descriptor name containing readings of all
+    the given objects, which are read concurrently."""
+    yield from bps.create(name=name)  # gives name to event *descriptor* document
+    yield from bps.read(ConcurrentReadable(name, tuple(readables)))
+    yield from bps.save()
+
+
 def read_hardware_pre_collection(
     undulator: Undulator,
     synchrotron: Synchrotron,
     s4_slit_gaps: S4SlitGaps,
     robot: BartRobot,
     smargon: Smargon,
+    dcm: DCM | None = None,
+    detector: EigerDetector | None = None,
 ):
+    """The DCM and detector are optional, and are only read where a callback needs
+    the energy and bit depth before the collection starts (e.g. to write a nexus file
+    early)."""
     LOGGER.info("Reading status of beamline for callbacks, pre collection.")
-    yield from bps.create(
-        name=CONST.DESCRIPTORS.HARDWARE_READ_PRE
-    )  # gives name to event *descriptor* document
-    yield from bps.read(undulator.current_gap)
-    yield from bps.read(synchrotron.synchrotron_mode)
-    yield from bps.read(s4_slit_gaps.xgap)
-    yield from bps.read(s4_slit_gaps.ygap)
-    yield from bps.read(smargon.x)
-    yield from bps.read(smargon.y)
-    yield from bps.read(smargon.z)
-    yield from bps.save()
+    readables = [
+        undulator.current_gap,
+        synchrotron.synchrotron_mode,
+        s4_slit_gaps.xgap,
+        s4_slit_gaps.ygap,
+        smargon.x,
+        smargon.y,
+        smargon.z,
+    ]
+    if dcm:
+        readables.append(dcm.energy_in_kev)
+    if detector:
+        readables.append(detector.bit_depth)
+    yield from read_concurrently(CONST.DESCRIPTORS.HARDWARE_READ_PRE, readables)
 
 
 def read_hardware_during_collection(
@@ -45,13 +111,16 @@ def read_hardware_during_collection(
     detector: EigerDetector,
 ):
     LOGGER.info("Reading status of beamline for callbacks, during collection.")
-    yield from bps.create(name=CONST.DESCRIPTORS.HARDWARE_READ_DURING)
-    yield from bps.read(aperture_scatterguard)
-    yield from bps.read(attenuator.actual_transmission)
-    yield from bps.read(flux.flux_reading)
-    yield from bps.read(dcm.energy_in_kev)
-    yield from bps.read(detector.bit_depth)
-    yield from bps.save()
+    yield from read_concurrently(
+        CONST.DESCRIPTORS.HARDWARE_READ_DURING,
+        [
+            aperture_scatterguard,
+            attenuator.actual_transmission,
+            flux.flux_reading,
+            dcm.energy_in_kev,
+            detector.bit_depth,
+        ],
+    )
 
 
 def read_hardware_for_zocalo(detector: EigerDetector):
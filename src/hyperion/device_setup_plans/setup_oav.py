@@ -1,5 +1,3 @@
-from functools import partial
-
 import bluesky.plan_stubs as bps
 from dodal.devices.oav.oav_detector import OAV
 from dodal.devices.oav.oav_errors import OAVError_ZoomLevelNotFound
@@ -7,58 +5,53 @@ from dodal.devices.oav.oav_parameters import OAVParameters
 from dodal.devices.oav.pin_image_recognition import PinTipDetection
 from dodal.devices.oav.utils import ColorMode
 
+from hyperion.device_setup_plans.utils import set_if_changed, wait_for_signal
+from hyperion.log import LOGGER
+from hyperion.parameters.constants import CONST
+
 oav_group = "oav_setup"
-# Helper function to make sure we set the waiting groups correctly
-set_using_group = partial(bps.abs_set, group=oav_group)
 
 
 def setup_pin_tip_detection_params(
     pin_tip_detect_device: PinTipDetection, parameters: OAVParameters
 ):
-    # select which blur to apply to image
-    yield from set_using_group(
-        pin_tip_detect_device.preprocess_operation, parameters.preprocess
-    )
-
-    # sets length scale for blurring
-    yield from set_using_group(
-        pin_tip_detect_device.preprocess_ksize, parameters.preprocess_K_size
-    )
-
-    # Canny edge detect - lower
-    yield from set_using_group(
-        pin_tip_detect_device.canny_lower_threshold,
-        parameters.canny_edge_lower_threshold,
-    )
-
-    # Canny edge detect - upper
-    yield from set_using_group(
-        pin_tip_detect_device.canny_upper_threshold,
-        parameters.canny_edge_upper_threshold,
-    )
-
-    # "Close" morphological operation
-    yield from set_using_group(
-        pin_tip_detect_device.close_ksize, parameters.close_ksize
-    )
-
-    # Sample detection direction
-    yield from set_using_group(
-        pin_tip_detect_device.scan_direction, parameters.direction
-    )
-
-    # Minimum height
-    yield from set_using_group(
-        pin_tip_detect_device.min_tip_height,
-        parameters.minimum_height,
+    yield from set_if_changed(
+        [
+            # select which blur to apply to image
+            (pin_tip_detect_device.preprocess_operation, parameters.preprocess),
+            # sets length scale for blurring
+            (pin_tip_detect_device.preprocess_ksize, parameters.preprocess_K_size),
+            # Canny edge detect - lower
+            (
+                pin_tip_detect_device.canny_lower_threshold,
+                parameters.canny_edge_lower_threshold,
+            ),
+            # Canny edge detect - upper
+            (
+                pin_tip_detect_device.canny_upper_threshold,
+                parameters.canny_edge_upper_threshold,
+            ),
+            # "Close" morphological operation
+            (pin_tip_detect_device.close_ksize, parameters.close_ksize),
+            # Sample detection direction
+            (pin_tip_detect_device.scan_direction, parameters.direction),
+            # Minimum height
+            (pin_tip_detect_device.min_tip_height, parameters.minimum_height),
+        ],
+        oav_group,
     )
 
 
 def setup_general_oav_params(oav: OAV, parameters: OAVParameters):
-    yield from set_using_group(oav.cam.color_mode, ColorMode.RGB1)
-    yield from set_using_group(oav.cam.acquire_period, parameters.acquire_period)
-    yield from set_using_group(oav.cam.acquire_time, parameters.exposure)
-    yield from set_using_group(oav.cam.gain, parameters.gain)
+    yield from set_if_changed(
+        [
+            (oav.cam.color_mode, ColorMode.RGB1),
+            (oav.cam.acquire_period, parameters.acquire_period),
+            (oav.cam.acquire_time, parameters.exposure),
+            (oav.cam.gain, parameters.gain),
+        ],
+        oav_group,
+    )
 
     zoom_level_str = f"{float(parameters.zoom)}x"
     if zoom_level_str not in oav.zoom_controller.allowed_zoom_levels:
@@ -66,11 +59,23 @@ def setup_general_oav_params(oav: OAV, parameters: OAVParameters):
             f"Found {zoom_level_str} as a zoom level but expected one of {oav.zoom_controller.allowed_zoom_levels}"
         )
 
-    yield from bps.abs_set(
-        oav.zoom_controller,
-        zoom_level_str,
-        wait=True,
-    )
+    current_zoom = yield from bps.rd(oav.zoom_controller.level, default_value=None)
+    if current_zoom == zoom_level_str:
+        # Changing zoom is slow even to the same level, but it also sets the flat
+        # field so make sure that is still right
+        LOGGER.info(f"OAV already at zoom {zoom_level_str}")
+        flat_field_port = yield from bps.rd(
+            oav.proc.port_name if zoom_level_str == "1.0x" else oav.cam.port_name
+        )
+        yield from set_if_changed(
+            [(oav.grid_snapshot.input_plugin, flat_field_port)], oav_group
+        )
+    else:
+        yield from bps.abs_set(
+            oav.zoom_controller,
+            zoom_level_str,
+            wait=True,
+        )
 
 
 def pre_centring_setup_oav(
@@ -88,3 +93,21 @@ def pre_centring_setup_oav(
     """
     TODO: We require setting the backlight brightness to that in the json, we can't do this currently without a PV.
     """
+
+
+def wait_for_oav_frame_after_move(
+    oav: OAV, timeout: float = CONST.HARDWARE.OAV_NEW_FRAME_TIMEOUT
+):
+    """Waits until the OAV has captured a frame which was started after any motion
+    that has already completed, so that the image shows the new position. The frame
+    in progress when this is called may have been partly exposed during the motion,
+    so the one after it is waited for. If the camera doesn't update within the timeout
+    a warning is logged and the plan continues with the latest image.
+    """
+    frame_count = yield from bps.rd(oav.cam.array_counter)
+    try:
+        yield from wait_for_signal(
+            oav.cam.array_counter, lambda count: count >= frame_count + 2, timeout
+        )
+    except TimeoutError:
+        LOGGER.warning(f"No new OAV frame in {timeout}s, using the latest image")
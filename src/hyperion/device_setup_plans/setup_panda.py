@@ -1,3 +1,4 @@
+import weakref
 from datetime import datetime
 from enum import Enum
 from importlib import resources
@@ -7,7 +8,12 @@ import bluesky.plan_stubs as bps
 from blueapi.core import MsgGenerator
 from dodal.common.beamlines.beamline_utils import get_directory_provider
 from dodal.devices.fast_grid_scan import PandAGridScanParams
-from ophyd_async.core import load_device
+from ophyd_async.core import (
+    get_signal_values,
+    load_device,
+    load_from_yaml,
+    walk_rw_signals,
+)
 from ophyd_async.panda import (
     HDFPanda,
     SeqTable,
@@ -17,6 +23,7 @@ from ophyd_async.panda import (
 )
 
 import hyperion.resources.panda
+from hyperion.device_setup_plans.utils import values_match
 from hyperion.log import LOGGER
 
 MM_TO_ENCODER_COUNTS = 200000
@@ -24,6 +31,15 @@ GENERAL_TIMEOUT = 60
 TICKS_PER_MS = 1000  # Panda sequencer prescaler will be set to us
 
 
+# Signals which setup_panda_for_flyscan writes itself after loading the config
+_SET_DURING_SETUP = ["inenc.1.setp", "pulse.1.width", "seq.1.table", "pcap.enable"]
+
+# PandAs which have had the full gridscan config loaded since startup. After this only
+# the PVs whose readbacks differ from the config are written, so anything changed by a
+# reboot or by hand is still restored
+_PANDAS_WITH_CONFIG_LOADED: weakref.WeakSet[HDFPanda] = weakref.WeakSet()
+
+
 class Enabled(Enum):
     ENABLED = "ONE"
     DISABLED = "ZERO"
@@ -119,6 +135,62 @@ def _get_seq_table(
     return table
 
 
+def _seq_tables_match(current: SeqTable | None, wanted: SeqTable) -> bool:
+    return isinstance(current, dict) and all(
+        key in current and values_match(current[key], value)  # type: ignore
+        for key, value in wanted.items()
+    )
+
+
+def load_panda_config_changes(panda: HDFPanda, config_yaml_path: str) -> MsgGenerator:
+    """Loads the saved config into the PandA. The first time for each PandA this is a
+    full load of every PV, after which the PVs are read back in one go and only those
+    which differ from the config are written, phase by phase."""
+    if panda not in _PANDAS_WITH_CONFIG_LOADED:
+        LOGGER.info(f"Loading full PandA config from {config_yaml_path}")
+        yield from load_device(panda, config_yaml_path)
+        _PANDAS_WITH_CONFIG_LOADED.add(panda)
+        return
+
+    signals = walk_rw_signals(panda)
+    phases = [
+        {
+            key: value
+            for key, value in phase.items()
+            if value is not None and key in signals and key not in _SET_DURING_SETUP
+        }
+        for phase in load_from_yaml(config_yaml_path)
+    ]
+    if not any(phases):
+        return
+    current = yield from get_signal_values(
+        {key: signals[key] for phase in phases for key in phase}
+    )
+    changed = [
+        {
+            key: value
+            for key, value in phase.items()
+            if not values_match(current[key], value)
+        }
+        for phase in phases
+    ]
+    LOGGER.info(
+        f"Writing {sum(map(len, changed))} PandA PVs which differ from the saved config: "
+        f"{[key for phase in changed for key in phase]}"
+    )
+    for phase_number, phase in enumerate(changed):
+        if phase:
+            group = f"panda-config-phase{phase_number}"
+            for key, value in phase.items():
+                yield from bps.abs_set(signals[key], value, group=group)
+            yield from bps.wait(group=group, timeout=GENERAL_TIMEOUT)
+
+
+def invalidate_panda_config(panda: HDFPanda):
+    """Makes the next setup of this PandA load its full config."""
+    _PANDAS_WITH_CONFIG_LOADED.discard(panda)
+
+
 def setup_panda_for_flyscan(
     panda: HDFPanda,
     parameters: PandAGridScanParams,
@@ -130,7 +202,9 @@ def setup_panda_for_flyscan(
     """Configures the PandA device for a flyscan.
     Sets PVs from a yaml file, calibrates the encoder, and
     adjusts the sequencer table based off the grid parameters. Yaml file can be
-    created using ophyd_async.core.save_device()
+    created using ophyd_async.core.save_device(). Only the PVs and table which differ
+    from their readbacks are written after the first setup, unless a setup fails in
+    which case the next one reloads everything, see load_panda_config_changes.
 
     Args:
         panda (HDFPanda): The PandA Ophyd device
@@ -150,12 +224,35 @@ def setup_panda_for_flyscan(
     assert time_between_x_steps_ms * 1000 >= exposure_time_s
     assert sample_velocity_mm_per_s * exposure_time_s < parameters.x_step_size
 
+    try:
+        yield from _configure_panda(
+            panda,
+            parameters,
+            initial_x,
+            exposure_time_s,
+            time_between_x_steps_ms,
+            sample_velocity_mm_per_s,
+        )
+        yield from arm_panda_for_gridscan(panda)
+    except Exception:
+        invalidate_panda_config(panda)
+        raise
+
+
+def _configure_panda(
+    panda: HDFPanda,
+    parameters: PandAGridScanParams,
+    initial_x: float,
+    exposure_time_s: float,
+    time_between_x_steps_ms: float,
+    sample_velocity_mm_per_s: float,
+) -> MsgGenerator:
     yield from bps.stage(panda, group="panda-config")
 
     with resources.as_file(
         resources.files(hyperion.resources.panda) / "panda-gridscan.yaml"
     ) as config_yaml_path:
-        yield from load_device(panda, str(config_yaml_path))
+        yield from load_panda_config_changes(panda, str(config_yaml_path))
 
     # Home the PandA X encoder using current motor position
     yield from bps.abs_set(
@@ -170,7 +267,11 @@ def setup_panda_for_flyscan(
 
     table = _get_seq_table(parameters, exposure_distance_mm, time_between_x_steps_ms)
 
-    yield from bps.abs_set(panda.seq[1].table, table, group="panda-config")
+    current_table = yield from bps.rd(panda.seq[1].table)
+    if _seq_tables_match(current_table, table):
+        LOGGER.info("PandA sequencer table is unchanged")
+    else:
+        yield from bps.abs_set(panda.seq[1].table, table, group="panda-config")
 
     yield from bps.abs_set(
         panda.pcap.enable,  # type: ignore
@@ -182,10 +283,6 @@ def setup_panda_for_flyscan(
     yield from bps.wait(group="panda-config", timeout=GENERAL_TIMEOUT)
 
     LOGGER.info(f"PandA sequencer table has been set to: {str(table)}")
-    table_readback = yield from bps.rd(panda.seq[1].table)
-    LOGGER.debug(f"PandA sequencer table readback is: {str(table_readback)}")
-
-    yield from arm_panda_for_gridscan(panda)
 
 
 def arm_panda_for_gridscan(panda: HDFPanda, group="arm_panda_gridscan"):
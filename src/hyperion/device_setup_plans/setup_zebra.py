@@ -23,6 +23,7 @@ from dodal.devices.zebra import (
     Zebra,
 )
 
+from hyperion.device_setup_plans.utils import set_if_changed
 from hyperion.log import LOGGER
 
 ZEBRA_STATUS_TIMEOUT = 30
@@ -98,57 +99,68 @@ def setup_zebra_for_rotation(
             "Disallowed rotation direction provided to Zebra setup plan. "
             "Use RotationDirection.POSITIVE or RotationDirection.NEGATIVE."
         )
-    yield from bps.abs_set(zebra.pc.dir, direction.value, group=group)
     LOGGER.info("ZEBRA SETUP: START")
-    # must be on for shutter trigger to be enabled
-    yield from bps.abs_set(zebra.inputs.soft_in_1, SoftInState.YES, group=group)
-    # Set gate start, adjust for shutter opening time if necessary
     LOGGER.info(f"ZEBRA SETUP: degrees to adjust for shutter = {shutter_opening_deg}")
     LOGGER.info(f"ZEBRA SETUP: start angle start: {start_angle}")
     LOGGER.info(f"ZEBRA SETUP: start angle adjusted, gate start set to: {start_angle}")
-    yield from bps.abs_set(zebra.pc.gate_start, start_angle, group=group)
-    # set gate width to total width
-    yield from bps.abs_set(
-        zebra.pc.gate_width, scan_width + shutter_opening_deg, group=group
-    )
     LOGGER.info(
         f"Pulse start set to shutter open time, set to: {abs(shutter_opening_s)}"
     )
-    yield from bps.abs_set(zebra.pc.pulse_start, abs(shutter_opening_s), group=group)
-    # Set gate position to be angle of interest
-    yield from bps.abs_set(zebra.pc.gate_trigger, axis.value, group=group)
-    # Trigger the shutter with the gate (from PC_GATE & SOFTIN1 -> OR1)
-    yield from bps.abs_set(zebra.output.out_pvs[TTL_SHUTTER], OR1, group=group)
-    # Trigger the detector with a pulse
-    yield from bps.abs_set(zebra.output.out_pvs[TTL_DETECTOR], PC_PULSE, group=group)
-    # Don't use the fluorescence detector
-    yield from bps.abs_set(zebra.output.out_pvs[TTL_XSPRESS3], DISCONNECT, group=group)
-    yield from bps.abs_set(zebra.output.pulse_1.input, DISCONNECT, group=group)
-    LOGGER.info(f"ZEBRA SETUP: END - {'' if wait else 'not'} waiting for completion")
-    if wait:
-        yield from bps.wait(group, timeout=ZEBRA_STATUS_TIMEOUT)
+    yield from set_if_changed(
+        [
+            (zebra.pc.dir, direction.value),
+            # must be on for shutter trigger to be enabled
+            (zebra.inputs.soft_in_1, SoftInState.YES),
+            # Set gate start, adjust for shutter opening time if necessary
+            (zebra.pc.gate_start, start_angle),
+            # set gate width to total width
+            (zebra.pc.gate_width, scan_width + shutter_opening_deg),
+            (zebra.pc.pulse_start, abs(shutter_opening_s)),
+            # Set gate position to be angle of interest
+            (zebra.pc.gate_trigger, axis.value),
+            # Trigger the shutter with the gate (from PC_GATE & SOFTIN1 -> OR1)
+            (zebra.output.out_pvs[TTL_SHUTTER], OR1),
+            # Trigger the detector with a pulse
+            (zebra.output.out_pvs[TTL_DETECTOR], PC_PULSE),
+            # Don't use the fluorescence detector
+            (zebra.output.out_pvs[TTL_XSPRESS3], DISCONNECT),
+            (zebra.output.pulse_1.input, DISCONNECT),
+        ],
+        group,
+        wait,
+        ZEBRA_STATUS_TIMEOUT,
+    )
+    LOGGER.info(f"ZEBRA SETUP: END - {'' if wait else 'not'} waited for completion")
 
 
 @bluesky_retry
 def setup_zebra_for_gridscan(zebra: Zebra, group="setup_zebra_for_gridscan", wait=True):
-    yield from bps.abs_set(zebra.output.out_pvs[TTL_DETECTOR], IN3_TTL, group=group)
-    yield from bps.abs_set(zebra.output.out_pvs[TTL_SHUTTER], IN4_TTL, group=group)
-    yield from bps.abs_set(zebra.output.out_pvs[TTL_XSPRESS3], DISCONNECT, group=group)
-    yield from bps.abs_set(zebra.output.pulse_1.input, DISCONNECT, group=group)
-
-    if wait:
-        yield from bps.wait(group, timeout=ZEBRA_STATUS_TIMEOUT)
+    yield from set_if_changed(
+        [
+            (zebra.output.out_pvs[TTL_DETECTOR], IN3_TTL),
+            (zebra.output.out_pvs[TTL_SHUTTER], IN4_TTL),
+            (zebra.output.out_pvs[TTL_XSPRESS3], DISCONNECT),
+            (zebra.output.pulse_1.input, DISCONNECT),
+        ],
+        group,
+        wait,
+        ZEBRA_STATUS_TIMEOUT,
+    )
 
 
 @bluesky_retry
 def set_zebra_shutter_to_manual(
     zebra: Zebra, group="set_zebra_shutter_to_manual", wait=True
 ) -> MsgGenerator:
-    yield from bps.abs_set(zebra.output.out_pvs[TTL_DETECTOR], PC_PULSE, group=group)
-    yield from bps.abs_set(zebra.output.out_pvs[TTL_SHUTTER], OR1, group=group)
-
-    if wait:
-        yield from bps.wait(group, timeout=ZEBRA_STATUS_TIMEOUT)
+    yield from set_if_changed(
+        [
+            (zebra.output.out_pvs[TTL_DETECTOR], PC_PULSE),
+            (zebra.output.out_pvs[TTL_SHUTTER], OR1),
+        ],
+        group,
+        wait,
+        ZEBRA_STATUS_TIMEOUT,
+    )
 
 
 @bluesky_retry
@@ -162,17 +174,17 @@ def make_trigger_safe(zebra: Zebra, group="make_zebra_safe", wait=True):
 def setup_zebra_for_panda_flyscan(
     zebra: Zebra, group="setup_zebra_for_panda_flyscan", wait=True
 ):
-    # Forwards eiger trigger signal from panda
-    yield from bps.abs_set(zebra.output.out_pvs[TTL_DETECTOR], IN1_TTL, group=group)
-
-    # Forwards signal from PPMAC to fast shutter. High while panda PLC is running
-    yield from bps.abs_set(zebra.output.out_pvs[TTL_SHUTTER], IN4_TTL, group=group)
-
-    yield from bps.abs_set(zebra.output.out_pvs[3], DISCONNECT, group=group)
-
-    yield from bps.abs_set(
-        zebra.output.out_pvs[TTL_PANDA], IN3_TTL, group=group
-    )  # Tells panda that motion is beginning/changing direction
-
-    if wait:
-        yield from bps.wait(group, timeout=ZEBRA_STATUS_TIMEOUT)
+    yield from set_if_changed(
+        [
+            # Forwards eiger trigger signal from panda
+            (zebra.output.out_pvs[TTL_DETECTOR], IN1_TTL),
+            # Forwards signal from PPMAC to fast shutter. High while panda PLC is running
+            (zebra.output.out_pvs[TTL_SHUTTER], IN4_TTL),
+            (zebra.output.out_pvs[3], DISCONNECT),
+            # Tells panda that motion is beginning/changing direction
+            (zebra.output.out_pvs[TTL_PANDA], IN3_TTL),
+        ],
+        group,
+        wait,
+        ZEBRA_STATUS_TIMEOUT,
+    )
@@ -1,15 +1,28 @@
-from typing import Generator
+import asyncio
+from dataclasses import dataclass, field
+from enum import Enum
+from functools import partial
+from time import time
+from typing import Any, Callable, Generator, TypeVar
 
+import numpy as np
 from bluesky import plan_stubs as bps
 from bluesky import preprocessors as bpp
+from bluesky.protocols import Movable
 from bluesky.utils import Msg
 from dodal.devices.detector.detector_motion import DetectorMotion, ShutterState
 from dodal.devices.eiger import EigerDetector
+from ophyd import Signal
+from ophyd_async.core import SignalR, wait_for_value
 
 from hyperion.device_setup_plans.position_detector import (
     set_detector_z_position,
     set_shutter,
 )
+from hyperion.log import LOGGER
+from hyperion.tracing import TRACER
+
+T = TypeVar("T")
 
 
 def start_preparing_data_collection_then_do_plan(
@@ -42,3 +55,217 @@ def start_preparing_data_collection_then_do_plan(
         wrapped_plan(),
         except_plan=lambda e: (yield from bps.stop(eiger)),
     )
+
+
+def _normalise(value: Any) -> Any:
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, dict):
+        return {key: _normalise(item) for key, item in value.items()}
+    if isinstance(value, (np.ndarray, list, tuple)):
+        return [_normalise(item) for item in value]
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+def values_match(current: Any, wanted: Any) -> bool:
+    """Compares a readback with a demand value, allowing for enums being read back as
+    their values, arrays as lists and floats losing precision in EPICS."""
+    current, wanted = _normalise(current), _normalise(wanted)
+    if isinstance(current, float | int) and isinstance(wanted, float | int):
+        return bool(np.isclose(current, wanted))
+    return current == wanted
+
+
+def set_if_changed(
+    settings: list[tuple[Movable, Any]],
+    group: str,
+    wait: bool = False,
+    timeout: float | None = None,
+) -> Generator[Msg, Any, int]:
+    """Sets each signal to its value unless its readback already matches, so that
+    setup which is repeated for every sample only writes what has changed. The sets
+    which are needed all go in the given group.
+
+    Returns the number of sets which were skipped.
+    """
+    skipped = []
+    for signal, value in settings:
+        current = yield from bps.rd(signal, default_value=None)
+        if current is not None and values_match(current, value):
+            skipped.append(signal.name)
+        else:
+            yield from bps.abs_set(signal, value, group=group)
+    if skipped:
+        LOGGER.info(
+            f"Skipped {len(skipped)} of {len(settings)} sets in {group} which were "
+            f"already at their values: {skipped}"
+        )
+    if wait:
+        yield from bps.wait(group, timeout=timeout)
+    return len(skipped)
+
+
+def _matches(value, match) -> bool:
+    return match(value) if callable(match) else value == match
+
+
+async def _wait_for_ophyd_value(signal: Signal, match, timeout: float):
+    """The equivalent of ophyd-async's wait_for_value for an ophyd signal, whose
+    subscription callbacks may be run on another thread."""
+    loop = asyncio.get_running_loop()
+    matched = loop.create_future()
+
+    def set_matched():
+        if not matched.done():
+            matched.set_result(None)
+
+    def check_value(value, **_):
+        if _matches(value, match):
+            loop.call_soon_threadsafe(set_matched)
+
+    subscription = signal.subscribe(check_value)
+    try:
+        await asyncio.wait_for(matched, timeout)
+    except asyncio.TimeoutError as e:
+        raise TimeoutError(
+            f"{signal.name} didn't match in {timeout}s, last value {signal.get()!r}"
+        ) from e
+    finally:
+        signal.unsubscribe(subscription)
+
+
+def _wait_for_value(signal: SignalR | Signal, match, timeout: float):
+    if isinstance(signal, Signal):
+        return _wait_for_ophyd_value(signal, match, timeout)
+    return wait_for_value(signal, match, timeout)
+
+
+def wait_for_signals(
+    conditions: list[tuple[SignalR[T] | Signal, T | Callable[[T], bool]]],
+    timeout: float,
+) -> Generator[Msg, Any, float]:
+    """Waits until every signal matches its condition, either a value or a predicate
+    on the value. Both ophyd and ophyd-async signals are supported. The signals are
+    read first so that no subscription is made if they already match, otherwise the
+    plan resumes as soon as a monitored update matches rather than polling.
+
+    Raises a TimeoutError if the signals don't all match within timeout seconds.
+    Returns the time spent waiting, in seconds, which is also recorded on the span.
+    """
+
+    values = []
+    for signal, _ in conditions:
+        values.append((yield from bps.rd(signal)))
+    unmatched = [
+        (signal, match)
+        for (signal, match), value in zip(conditions, values)
+        if not _matches(value, match)
+    ]
+    if not unmatched:
+        return 0.0
+
+    names = ", ".join(signal.name for signal, _ in unmatched)
+    LOGGER.info(f"Waiting up to {timeout}s for {names}")
+    with TRACER.start_span("wait_for_signals") as span:
+        span.set_attribute("signals", names)
+        start = time()
+        tasks = yield from bps.wait_for(
+            [
+                partial(_wait_for_value, signal, match, timeout)
+                for signal, match in unmatched
+            ]
+        )
+        # The RunEngine doesn't raise on failed awaitables, so surface any timeout
+        for task in tasks or []:
+            task.result()
+        elapsed = time() - start
+        span.set_attribute("elapsed_s", elapsed)
+    LOGGER.info(f"Waited {elapsed:.3f}s for {names}")
+    return elapsed
+
+
+def wait_for_signal(
+    signal: SignalR[T] | Signal, match: T | Callable[[T], bool], timeout: float
+) -> Generator[Msg, Any, float]:
+    """Waits until the signal matches, see wait_for_signals."""
+    return (yield from wait_for_signals([(signal, match)], timeout))
+
+
+@dataclass
+class SetupStep:
+    """A step of preparing for a collection. The plan is given a group to start its
+    hardware operations in and shouldn't wait on that group itself, so that steps which
+    don't depend on it can run at the same time."""
+
+    name: str
+    plan: Callable[[str], Generator[Msg, Any, Any]]
+    depends_on: list[str] = field(default_factory=list)
+
+
+def _critical_path(steps: list[SetupStep], finished_at: dict[str, float]) -> list[str]:
+    # Walk back from the last step to finish through whichever prerequisite finished
+    # last, as that is the chain of steps which set the overall setup time
+    depends_on = {step.name: step.depends_on for step in steps}
+    path = [max(finished_at, key=lambda name: finished_at[name])]
+    while depends_on[path[-1]]:
+        path.append(max(depends_on[path[-1]], key=lambda name: finished_at[name]))
+    return path[::-1]
+
+
+def run_setup_steps(
+    steps: list[SetupStep], group_prefix: str, wait_for: list[str] | None = None
+) -> Generator[Msg, Any, dict[str, Any]]:
+    """Runs the steps in the order given, each one only after every step it depends on
+    has finished, so that independent steps run concurrently. Steps must be listed
+    after their prerequisites, and steps which block should be listed after those
+    which don't so that they don't hold them up.
+
+    Each step's hardware operations go in the group f"{group_prefix}_{step.name}". The
+    steps in wait_for (all of them by default) are waited on at the end, the groups of
+    any others are left for the caller to wait on. The critical path through the
+    steps that were waited on is logged and recorded on the span.
+
+    Returns the value returned by each step's plan, by step name.
+    """
+
+    names = [step.name for step in steps]
+    if len(set(names)) != len(names):
+        raise ValueError(f"Setup step names must be unique, got {names}")
+    for i, step in enumerate(steps):
+        if unknown := set(step.depends_on) - set(names[:i]):
+            raise ValueError(
+                f"Setup step {step.name} depends on {unknown}, which aren't earlier steps"
+            )
+    wait_for = names if wait_for is None else wait_for
+
+    results: dict[str, Any] = {}
+    started_at: dict[str, float] = {}
+    finished_at: dict[str, float] = {}
+
+    def wait_for_step(name: str):
+        if name not in finished_at:
+            yield from bps.wait(f"{group_prefix}_{name}")
+            finished_at[name] = time()
+
+    with TRACER.start_span(f"{group_prefix}_setup") as span:
+        for step in steps:
+            for prerequisite in step.depends_on:
+                yield from wait_for_step(prerequisite)
+            started_at[step.name] = time()
+            results[step.name] = yield from step.plan(f"{group_prefix}_{step.name}")
+        for name in wait_for:
+            yield from wait_for_step(name)
+        if not finished_at:
+            return results
+
+        path = _critical_path(steps, finished_at)
+        durations = ", ".join(
+            f"{name} {finished_at[name] - started_at[name]:.3f}s" for name in path
+        )
+        total = finished_at[path[-1]] - min(started_at.values())
+        span.set_attribute("critical_path", " -> ".join(path))
+        span.set_attribute("elapsed_s", total)
+    LOGGER.info(f"{group_prefix} setup took {total:.3f}s, critical path: {durations}")
+    return results
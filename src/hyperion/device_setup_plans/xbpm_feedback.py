@@ -1,16 +1,78 @@
+import math
+from dataclasses import dataclass
+from time import time
+
 from bluesky import plan_stubs as bps
 from bluesky.preprocessors import finalize_wrapper
 from bluesky.utils import make_decorator
 from dodal.devices.attenuator import Attenuator
+from dodal.devices.dcm import DCM
 from dodal.devices.xbpm_feedback import Pause, XBPMFeedback
 
 from hyperion.log import LOGGER
 
+# Energies closer than this are taken to be the same for the feedback, in keV
+ENERGY_TOLERANCE_KEV = 0.001
+# How long the feedback must have run uninterrupted at full transmission since it was
+# last unpaused before the beam is taken to have settled again, in s
+FEEDBACK_SETTLE_S = 5.0
+
+
+@dataclass
+class XBPMFeedbackState:
+    """What is known about the beam held by an XBPM feedback, remembered between
+    collections so that waiting for the feedback can be skipped if the beam was
+    confirmed stable recently and nothing has changed since."""
+
+    confirmed_stable_at: float | None = None
+    energy_kev: float | None = None
+    unpaused_at: float | None = None
+    last_settle_s: float = 0.0
+    time_saved_s: float = 0.0
+
+    def is_stable(self, energy_kev: float, pause: Pause, window_s: float) -> bool:
+        """Whether the beam can be taken to still be stable, which is only if it was
+        confirmed stable at the same energy within the last window_s seconds and the
+        feedback has since run uninterrupted at full transmission for at least
+        FEEDBACK_SETTLE_S"""
+        now = time()
+        return (
+            pause == Pause.RUN
+            and self.unpaused_at is not None
+            and now - self.unpaused_at >= FEEDBACK_SETTLE_S
+            and self.confirmed_stable_at is not None
+            and now - self.confirmed_stable_at <= window_s
+            and self.energy_kev is not None
+            and math.isclose(energy_kev, self.energy_kev, abs_tol=ENERGY_TOLERANCE_KEV)
+        )
+
+
+def xbpm_feedback_state(xbpm_feedback: XBPMFeedback) -> XBPMFeedbackState:
+    """The state of the given feedback, which is kept on the device so that it lasts
+    between collections for as long as the device does"""
+    state = getattr(xbpm_feedback, "_hyperion_feedback_state", None)
+    if state is None:
+        state = XBPMFeedbackState()
+        xbpm_feedback._hyperion_feedback_state = state  # type: ignore
+    return state
+
+
+def _pause_feedback_and_set_transmission(
+    xbpm_feedback: XBPMFeedback,
+    attenuator: Attenuator,
+    desired_transmission_fraction: float,
+):
+    xbpm_feedback_state(xbpm_feedback).unpaused_at = None
+    yield from bps.mv(xbpm_feedback.pause_feedback, Pause.PAUSE)
+    yield from bps.mv(attenuator, desired_transmission_fraction)
+
 
 def _check_and_pause_feedback(
     xbpm_feedback: XBPMFeedback,
     attenuator: Attenuator,
     desired_transmission_fraction: float,
+    dcm: DCM | None = None,
+    stable_window_s: float = 0,
 ):
     """Checks that the xbpm is in position before collection then turns it off.
 
@@ -19,16 +81,41 @@ def _check_and_pause_feedback(
                                       the beam in position
         attenuator (Attenuator): The attenuator used to set transmission
         desired_transmission_fraction (float): The desired transmission for the collection
+        dcm (DCM): If given, the energy is read so that the check can be skipped if
+                   the beam was confirmed stable at that energy within stable_window_s
+        stable_window_s (float): How long the beam is taken to stay stable for, in s
 
     """
+    state = xbpm_feedback_state(xbpm_feedback)
+    energy_kev = None
+    if dcm and stable_window_s:
+        energy_kev = yield from bps.rd(dcm.energy_in_kev)
+        pause = yield from bps.rd(xbpm_feedback.pause_feedback)
+        if state.is_stable(energy_kev, pause, stable_window_s):
+            state.time_saved_s += state.last_settle_s
+            LOGGER.info(
+                f"XBPM feedback confirmed stable at {energy_kev} keV in the last "
+                f"{stable_window_s}s, skipping waiting for it to save "
+                f"{state.last_settle_s:.2f}s, {state.time_saved_s:.2f}s saved in total"
+            )
+            yield from _pause_feedback_and_set_transmission(
+                xbpm_feedback, attenuator, desired_transmission_fraction
+            )
+            return
+
+    start = time()
     yield from bps.mv(attenuator, 1.0)
     LOGGER.info("Waiting for XBPM feedback before collection")
     yield from bps.trigger(xbpm_feedback, wait=True)
+    state.confirmed_stable_at = time()
+    state.last_settle_s = state.confirmed_stable_at - start
+    state.energy_kev = energy_kev
     LOGGER.info(
         "XPBM feedback in position, pausing and setting transmission for collection"
     )
-    yield from bps.mv(xbpm_feedback.pause_feedback, Pause.PAUSE)
-    yield from bps.mv(attenuator, desired_transmission_fraction)
+    yield from _pause_feedback_and_set_transmission(
+        xbpm_feedback, attenuator, desired_transmission_fraction
+    )
 
 
 def _unpause_xbpm_feedback_and_set_transmission_to_1(
@@ -43,6 +130,7 @@ def _unpause_xbpm_feedback_and_set_transmission_to_1(
         attenuator (Attenuator): The attenuator used to set transmission
     """
     yield from bps.mv(xbpm_feedback.pause_feedback, Pause.RUN, attenuator, 1.0)
+    xbpm_feedback_state(xbpm_feedback).unpaused_at = time()
 
 
 def transmission_and_xbpm_feedback_for_collection_wrapper(
@@ -50,6 +138,8 @@ def transmission_and_xbpm_feedback_for_collection_wrapper(
     xbpm_feedback: XBPMFeedback,
     attenuator: Attenuator,
     desired_transmission_fraction: float,
+    dcm: DCM | None = None,
+    stable_window_s: float = 0,
 ):
     """Sets the transmission for the data collection, ensuring the xbpm feedback is valid
     this wrapper should be run around every data collection.
@@ -63,17 +153,28 @@ def transmission_and_xbpm_feedback_for_collection_wrapper(
     mostly accounts for slow thermal drift so it is safe to assume that the beam is
     stable during a collection.
 
+    For the same reason, if a dcm is given then waiting for the feedback is skipped
+    when the beam was confirmed stable at the same energy in the last stable_window_s
+    and the feedback has run at full transmission for FEEDBACK_SETTLE_S since this
+    wrapper last unpaused it.
+
     Args:
         plan: The plan performing the data collection
         xbpm_feedback (XBPMFeedback): The XBPM device that is responsible for keeping
                                       the beam in position
         attenuator (Attenuator): The attenuator used to set transmission
         desired_transmission_fraction (float): The desired transmission for the collection
+        dcm (DCM): The DCM to read the energy from, if waiting can be skipped
+        stable_window_s (float): How long the beam is taken to stay stable for, in s
     """
 
     def _inner_plan():
         yield from _check_and_pause_feedback(
-            xbpm_feedback, attenuator, desired_transmission_fraction
+            xbpm_feedback,
+            attenuator,
+            desired_transmission_fraction,
+            dcm,
+            stable_window_s,
         )
         return (yield from plan)
 
@@ -7,6 +7,12 @@ from hyperion.experiment_plans.flyscan_xray_centre_plan import flyscan_xray_cent
 from hyperion.experiment_plans.grid_detect_then_xray_centre_plan import (
     grid_detect_then_xray_centre,
 )
+from hyperion.experiment_plans.load_centre_collect_full_plan import (
+    load_centre_collect_full,
+)
+from hyperion.experiment_plans.multi_crystal_rotation_plan import (
+    multi_crystal_rotation,
+)
 from hyperion.experiment_plans.pin_centre_then_xray_centre_plan import (
     pin_tip_centre_then_xray_centre,
 )
@@ -25,4 +31,6 @@ __all__ = [
     "pin_tip_centre_then_xray_centre",
     "multi_rotation_scan",
     "robot_load_then_centre",
+    "multi_crystal_rotation",
+    "load_centre_collect_full",
 ]
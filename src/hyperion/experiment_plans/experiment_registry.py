@@ -6,12 +6,16 @@ import hyperion.experiment_plans.flyscan_xray_centre_plan as flyscan_xray_centre
 import hyperion.experiment_plans.rotation_scan_plan as rotation_scan_plan
 from hyperion.experiment_plans import (
     grid_detect_then_xray_centre_plan,
+    load_centre_collect_full_plan,
+    multi_crystal_rotation_plan,
     pin_centre_then_xray_centre_plan,
     robot_load_then_centre_plan,
 )
 from hyperion.external_interaction.callbacks.common.callback_util import (
     CallbacksFactory,
     create_gridscan_callbacks,
+    create_load_centre_collect_callbacks,
+    create_multi_crystal_rotation_callbacks,
     create_robot_load_and_centre_callbacks,
     create_rotation_callbacks,
 )
@@ -21,7 +25,12 @@ from hyperion.parameters.gridscan import (
     RobotLoadThenCentre,
     ThreeDGridScan,
 )
-from hyperion.parameters.rotation import MultiRotationScan, RotationScan
+from hyperion.parameters.rotation import (
+    LoadCentreCollect,
+    MultiCrystalRotation,
+    MultiRotationScan,
+    RotationScan,
+)
 
 
 def not_implemented():
@@ -41,6 +50,8 @@ class ExperimentRegistryEntry(TypedDict):
         | MultiRotationScan
         | PinTipCentreThenXrayCentre
         | RobotLoadThenCentre
+        | MultiCrystalRotation
+        | LoadCentreCollect
     ]
     callbacks_factory: CallbacksFactory
 
@@ -76,6 +87,16 @@ PLAN_REGISTRY: dict[str, ExperimentRegistryEntry] = {
         "param_type": MultiRotationScan,
         "callbacks_factory": create_rotation_callbacks,
     },
+    "multi_crystal_rotation": {
+        "setup": multi_crystal_rotation_plan.create_devices,
+        "param_type": MultiCrystalRotation,
+        "callbacks_factory": create_multi_crystal_rotation_callbacks,
+    },
+    "load_centre_collect_full": {
+        "setup": load_centre_collect_full_plan.create_devices,
+        "param_type": LoadCentreCollect,
+        "callbacks_factory": create_load_centre_collect_callbacks,
+    },
 }
 
 
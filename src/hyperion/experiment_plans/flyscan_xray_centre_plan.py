@@ -21,12 +21,10 @@ from dodal.devices.dcm import DCM
 from dodal.devices.eiger import EigerDetector
 from dodal.devices.fast_grid_scan import (
     FastGridScanCommon,
+    GridScanParamsCommon,
     PandAFastGridScan,
     ZebraFastGridScan,
 )
-from dodal.devices.fast_grid_scan import (
-    set_fast_grid_scan_params as set_flyscan_params,
-)
 from dodal.devices.flux import Flux
 from dodal.devices.robot import BartRobot
 from dodal.devices.s4_slit_gaps import S4SlitGaps
@@ -44,10 +42,14 @@ from dodal.devices.zocalo.zocalo_results import (
     ZocaloResults,
     get_processing_result,
 )
-from dodal.plans.check_topup import check_topup_and_wait_if_necessary
 from ophyd_async.panda import HDFPanda
 from scanspec.core import AxesPoints, Axis
 
+from hyperion.device_setup_plans.check_topup import (
+    TopupWait,
+    finish_topup_wait,
+    start_topup_wait,
+)
 from hyperion.device_setup_plans.manipulate_sample import move_x_y_z
 from hyperion.device_setup_plans.read_hardware_for_setup import (
     read_hardware_during_collection,
@@ -64,6 +66,11 @@ from hyperion.device_setup_plans.setup_zebra import (
     setup_zebra_for_gridscan,
     setup_zebra_for_panda_flyscan,
 )
+from hyperion.device_setup_plans.utils import (
+    SetupStep,
+    run_setup_steps,
+    wait_for_signals,
+)
 from hyperion.device_setup_plans.xbpm_feedback import (
     transmission_and_xbpm_feedback_for_collection_decorator,
 )
@@ -74,6 +81,9 @@ from hyperion.parameters.gridscan import ThreeDGridScan
 from hyperion.tracing import TRACER
 from hyperion.utils.context import device_composite_from_context
 
+# Additional time to account for xray centring when gating on top-up, in s
+GRIDSCAN_TOPUP_OPS_TIME_S = 30.0
+
 
 class SmargonSpeedException(Exception):
     pass
@@ -150,6 +160,8 @@ def flyscan_xray_centre(
         composite.xbpm_feedback,
         composite.attenuator,
         parameters.transmission_frac,
+        composite.dcm,
+        parameters.xbpm_stable_window_s,
     )
     def run_gridscan_and_move_and_tidy(
         fgs_composite: FlyScanXRayCentreComposite,
@@ -171,22 +183,19 @@ def run_gridscan_and_move(
     """A multi-run plan which runs a gridscan, gets the results from zocalo
     and moves to the centre of mass determined by zocalo"""
 
-    # We get the initial motor positions so we can return to them on zocalo failure
-    initial_xyz = np.array(
-        [
-            (yield from bps.rd(fgs_composite.sample_motors.x)),
-            (yield from bps.rd(fgs_composite.sample_motors.y)),
-            (yield from bps.rd(fgs_composite.sample_motors.z)),
-        ]
+    # Any wait for a top-up is started before the rest of the setup so that it
+    # overlaps with it, it is waited on just before kickoff
+    topup_wait = yield from start_topup_wait(
+        fgs_composite.synchrotron,
+        parameters.num_images * parameters.exposure_time_s,
+        GRIDSCAN_TOPUP_OPS_TIME_S,
     )
 
-    yield from feature_controlled.setup_trigger(fgs_composite, parameters, initial_xyz)
-
     LOGGER.info("Starting grid scan")
-    yield from bps.stage(
-        fgs_composite.zocalo, group=ZOCALO_STAGE_GROUP
-    )  # connect to zocalo and make sure the queue is clear
-    yield from run_gridscan(fgs_composite, parameters, feature_controlled)
+    # We get the initial motor positions so we can return to them on zocalo failure
+    initial_xyz = yield from run_gridscan(
+        fgs_composite, parameters, feature_controlled, topup_wait=topup_wait
+    )
 
     LOGGER.info("Grid scan finished, getting results.")
 
@@ -232,26 +241,39 @@ def run_gridscan_and_move(
     yield from bps.wait()
 
 
-@bpp.set_run_key_decorator(CONST.PLAN.GRIDSCAN_MAIN)
-@bpp.run_decorator(md={"subplan_name": CONST.PLAN.GRIDSCAN_MAIN})
 def run_gridscan(
     fgs_composite: FlyScanXRayCentreComposite,
     parameters: ThreeDGridScan,
     feature_controlled: _FeatureControlled,
-    md={
-        "plan_name": CONST.PLAN.GRIDSCAN_MAIN,
-    },
-):
+    topup_wait: TopupWait | None = None,
+) -> MsgGenerator:
+    """Sets up and collects the gridscan in its own run. Returns the x, y and z of the
+    sample from before the gridscan, which are read as part of the setup."""
     sample_motors = fgs_composite.sample_motors
+    initial_xyz = np.zeros(3)
+
+    def move_omega_to_0(group: str):
+        # Currently gridscan only works for omega 0, see #
+        yield from bps.abs_set(sample_motors.omega, 0, group=group)
 
-    # Currently gridscan only works for omega 0, see #
-    with TRACER.start_span("moving_omega_to_0"):
-        yield from bps.abs_set(sample_motors.omega, 0)
+    def stage_zocalo(_: str):
+        # Connects to zocalo and makes sure the queue is clear, this is waited on just
+        # after kickoff
+        yield from bps.stage(fgs_composite.zocalo, group=ZOCALO_STAGE_GROUP)
+
+    def read_initial_xyz(_: str):
+        for i, axis in enumerate([sample_motors.x, sample_motors.y, sample_motors.z]):
+            initial_xyz[i] = yield from bps.rd(axis)
+
+    def setup_trigger(group: str):
+        yield from feature_controlled.setup_trigger(
+            fgs_composite, parameters, initial_xyz, group
+        )
 
-    # We only subscribe to the communicator callback for run_gridscan, so this is where
-    # we should generate an event reading the values which need to be included in the
-    # ispyb deposition
-    with TRACER.start_span("ispyb_hardware_readings"):
+    def read_pre_collection(_: str):
+        # We only subscribe to the communicator callback for run_gridscan, so this is
+        # where we should generate an event reading the values which need to be
+        # included in the ispyb deposition
         yield from read_hardware_pre_collection(
             fgs_composite.undulator,
             fgs_composite.synchrotron,
@@ -260,6 +282,52 @@ def run_gridscan(
             fgs_composite.smargon,
         )
 
+    def wait_for_valid(_: str):
+        LOGGER.info("Waiting for gridscan validity check")
+        yield from wait_for_gridscan_valid(feature_controlled.fgs_motors)
+
+    def stage_eiger(_: str):
+        LOGGER.info("Waiting for arming to finish")
+        yield from bps.wait(CONST.WAIT.GRID_READY_FOR_DC)
+        yield from bps.stage(fgs_composite.eiger)
+
+    @bpp.set_run_key_decorator(CONST.PLAN.GRIDSCAN_MAIN)
+    @bpp.run_decorator(md={"subplan_name": CONST.PLAN.GRIDSCAN_MAIN})
+    def setup_and_collect():
+        # Steps which only start moves go first so that they run behind those which
+        # block. The fgs params are only written in their group so are waited on before
+        # the validity check reads them
+        steps = [
+            SetupStep("moving_omega_to_0", move_omega_to_0),
+            SetupStep("set_flyscan_params", feature_controlled.set_flyscan_params),
+            SetupStep("stage_zocalo", stage_zocalo),
+            SetupStep("read_initial_xyz", read_initial_xyz),
+            SetupStep("ispyb_hardware_readings", read_pre_collection),
+            SetupStep("setup_trigger", setup_trigger, depends_on=["read_initial_xyz"]),
+            SetupStep(
+                "gridscan_valid", wait_for_valid, depends_on=["set_flyscan_params"]
+            ),
+            SetupStep("stage_eiger", stage_eiger),
+        ]
+        yield from run_setup_steps(
+            steps,
+            group_prefix=CONST.PLAN.GRIDSCAN_MAIN,
+            wait_for=[step.name for step in steps if step.name != "stage_zocalo"],
+        )
+        yield from _collect_gridscan(
+            fgs_composite, parameters, feature_controlled, topup_wait
+        )
+
+    yield from setup_and_collect()
+    return initial_xyz
+
+
+def _collect_gridscan(
+    fgs_composite: FlyScanXRayCentreComposite,
+    parameters: ThreeDGridScan,
+    feature_controlled: _FeatureControlled,
+    topup_wait: TopupWait | None,
+) -> MsgGenerator:
     read_during_collection = partial(
         read_hardware_during_collection,
         fgs_composite.aperture_scatterguard,
@@ -269,16 +337,6 @@ def run_gridscan(
         fgs_composite.eiger,
     )
 
-    LOGGER.info("Setting fgs params")
-    yield from feature_controlled.set_flyscan_params()
-
-    LOGGER.info("Waiting for gridscan validity check")
-    yield from wait_for_gridscan_valid(feature_controlled.fgs_motors)
-
-    LOGGER.info("Waiting for arming to finish")
-    yield from bps.wait(CONST.WAIT.GRID_READY_FOR_DC)
-    yield from bps.stage(fgs_composite.eiger)
-
     yield from kickoff_and_complete_gridscan(
         feature_controlled.fgs_motors,
         fgs_composite.eiger,
@@ -286,6 +344,7 @@ def run_gridscan(
         [parameters.scan_points_first_grid, parameters.scan_points_second_grid],
         parameters.scan_indices,
         do_during_run=read_during_collection,
+        topup_wait=topup_wait,
     )
     yield from bps.abs_set(feature_controlled.fgs_motors.z_steps, 0, wait=False)
 
@@ -297,7 +356,9 @@ def kickoff_and_complete_gridscan(
     scan_points: list[AxesPoints[Axis]],
     scan_start_indices: list[int],
     do_during_run: Callable[[], MsgGenerator] | None = None,
+    topup_wait: TopupWait | None = None,
 ):
+
     @TRACER.start_as_current_span(CONST.PLAN.DO_FGS)
     @bpp.set_run_key_decorator(CONST.PLAN.DO_FGS)
     @bpp.run_decorator(
@@ -312,18 +373,27 @@ def kickoff_and_complete_gridscan(
         else_plan=lambda: (yield from bps.unstage(eiger)),
     )
     def do_fgs():
-        # Check topup gate
-        expected_images = yield from bps.rd(gridscan.expected_images)
-        exposure_sec_per_image = yield from bps.rd(eiger.cam.acquire_time)
+        # Check topup gate, if no wait has been started already
+        nonlocal topup_wait
+        if topup_wait is None:
+            expected_images = yield from bps.rd(gridscan.expected_images)
+            exposure_sec_per_image = yield from bps.rd(eiger.cam.acquire_time)
+            topup_wait = yield from start_topup_wait(
+                synchrotron,
+                expected_images * exposure_sec_per_image,
+                GRIDSCAN_TOPUP_OPS_TIME_S,
+            )
         LOGGER.info("waiting for topup if necessary...")
-        yield from check_topup_and_wait_if_necessary(
-            synchrotron,
-            expected_images * exposure_sec_per_image,
-            30.0,
-        )
+        yield from finish_topup_wait(synchrotron, topup_wait)
         yield from read_hardware_for_zocalo(eiger)
         LOGGER.info("Wait for all moves with no assigned group")
         yield from bps.wait()
+        # Emits the number of frames written as the scan runs, so that the zocalo
+        # processing for each grid can be ended as soon as its frames are complete
+        yield from bps.monitor(
+            eiger.odin.file_writer.num_captured,
+            name=CONST.DESCRIPTORS.GRIDSCAN_FRAMES_WRITTEN,
+        )
         LOGGER.info("kicking off FGS")
         yield from bps.kickoff(gridscan, wait=True)
         gridscan_start_time = time()
@@ -336,6 +406,7 @@ def kickoff_and_complete_gridscan(
             yield from do_during_run()
         LOGGER.info("completing FGS")
         yield from bps.complete(gridscan, wait=True)
+        yield from bps.unmonitor(eiger.odin.file_writer.num_captured)
 
         # Remove this logging statement once metrics have been added
         LOGGER.info(
@@ -347,19 +418,21 @@ def kickoff_and_complete_gridscan(
 
 def wait_for_gridscan_valid(fgs_motors: FastGridScanCommon, timeout=0.5):
     LOGGER.info("Waiting for valid fgs_params")
-    SLEEP_PER_CHECK = 0.1
-    times_to_check = int(timeout / SLEEP_PER_CHECK)
-    for _ in range(times_to_check):
-        scan_invalid = yield from bps.rd(fgs_motors.scan_invalid)
-        pos_counter = yield from bps.rd(fgs_motors.position_counter)
-        LOGGER.debug(
-            f"Scan invalid: {scan_invalid} and position counter: {pos_counter}"
+    try:
+        yield from wait_for_signals(
+            [(fgs_motors.scan_invalid, _scan_valid), (fgs_motors.position_counter, 0)],
+            timeout,
         )
-        if not scan_invalid and pos_counter == 0:
-            LOGGER.info("Gridscan scan valid and position counter reset")
-            return
-        yield from bps.sleep(SLEEP_PER_CHECK)
-    raise WarningException("Scan invalid - pin too long/short/bent and out of range")
+    except TimeoutError as e:
+        LOGGER.info(f"Gridscan not valid: {e}")
+        raise WarningException(
+            "Scan invalid - pin too long/short/bent and out of range"
+        ) from e
+    LOGGER.info("Gridscan scan valid and position counter reset")
+
+
+def _scan_valid(scan_invalid: float) -> bool:
+    return not scan_invalid
 
 
 def set_aperture_for_bbox_size(
@@ -401,11 +474,12 @@ class _FeatureControlled:
             fgs_composite: FlyScanXRayCentreComposite,
             parameters: ThreeDGridScan,
             initial_xyz: np.ndarray,
+            group: str,
         ) -> MsgGenerator: ...
 
     setup_trigger: _ExtraSetup
     tidy_plan: Callable[[FlyScanXRayCentreComposite], MsgGenerator]
-    set_flyscan_params: Callable[[], MsgGenerator]
+    set_flyscan_params: Callable[[str], MsgGenerator]
     fgs_motors: FastGridScanCommon
 
 
@@ -418,7 +492,7 @@ def _get_feature_controlled(
             setup_trigger=_panda_triggering_setup,
             tidy_plan=_panda_tidy,
             set_flyscan_params=partial(
-                set_flyscan_params,
+                _set_flyscan_params,
                 fgs_composite.panda_fast_grid_scan,
                 parameters.panda_FGS_params,
             ),
@@ -429,7 +503,7 @@ def _get_feature_controlled(
             setup_trigger=_zebra_triggering_setup,
             tidy_plan=partial(_generic_tidy, group="flyscan_zebra_tidy", wait=True),
             set_flyscan_params=partial(
-                set_flyscan_params,
+                _set_flyscan_params,
                 fgs_composite.zebra_fast_grid_scan,
                 parameters.FGS_params,
             ),
@@ -437,6 +511,19 @@ def _get_feature_controlled(
         )
 
 
+def _set_flyscan_params(
+    scan: FastGridScanCommon, params: GridScanParamsCommon, group: str
+) -> MsgGenerator:
+    """As dodal's set_fast_grid_scan_params but without waiting, so that other setup
+    can continue while the parameters are written. The caller must wait on the group
+    before the parameters are checked by wait_for_gridscan_valid."""
+    LOGGER.info("Setting fgs params")
+    for key, signal in scan.movable_params.items():
+        yield from bps.abs_set(signal, params.__dict__[key], group=group)
+    # Counter should always start at 0
+    yield from bps.abs_set(scan.position_counter, 0, group=group)
+
+
 def _generic_tidy(
     fgs_composite: FlyScanXRayCentreComposite, group, wait=True
 ) -> MsgGenerator:
@@ -460,14 +547,16 @@ def _zebra_triggering_setup(
     fgs_composite: FlyScanXRayCentreComposite,
     parameters: ThreeDGridScan,
     initial_xyz: np.ndarray,
+    group: str,
 ):
-    yield from setup_zebra_for_gridscan(fgs_composite.zebra, wait=True)
+    yield from setup_zebra_for_gridscan(fgs_composite.zebra, group=group, wait=True)
 
 
 def _panda_triggering_setup(
     fgs_composite: FlyScanXRayCentreComposite,
     parameters: ThreeDGridScan,
     initial_xyz: np.ndarray,
+    group: str,
 ):
     LOGGER.info("Setting up Panda for flyscan")
 
@@ -519,4 +608,6 @@ def _panda_triggering_setup(
     )
 
     LOGGER.info("Setting up Zebra for panda flyscan")
-    yield from setup_zebra_for_panda_flyscan(fgs_composite.zebra, wait=True)
+    yield from setup_zebra_for_panda_flyscan(
+        fgs_composite.zebra, group=group, wait=True
+    )
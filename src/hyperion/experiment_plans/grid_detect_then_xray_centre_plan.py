@@ -123,6 +123,7 @@ def detect_grid_and_do_gridscan(
             snapshot_template,
             str(snapshot_dir),
             grid_width_microns=parameters.grid_width_um,
+            continuous_sweep=parameters.continuous_grid_detection,
         )
 
     yield from run_grid_detection_plan(
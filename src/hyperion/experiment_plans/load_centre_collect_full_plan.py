@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+import dataclasses
+
+import bluesky.plan_stubs as bps
+from blueapi.core import BlueskyContext, MsgGenerator
+from dodal.devices.oav.oav_parameters import OAVParameters
+
+from hyperion.device_setup_plans.utils import (
+    start_preparing_data_collection_then_do_plan,
+)
+from hyperion.device_setup_plans.xbpm_feedback import (
+    transmission_and_xbpm_feedback_for_collection_wrapper,
+)
+from hyperion.exceptions import WarningException
+from hyperion.experiment_plans.robot_load_then_centre_plan import (
+    RobotLoadThenCentreComposite,
+    robot_load_then_centre,
+)
+from hyperion.experiment_plans.rotation_scan_plan import (
+    RotationScanComposite,
+    rotation_scan,
+)
+from hyperion.log import LOGGER
+from hyperion.parameters.constants import CONST
+from hyperion.parameters.rotation import LoadCentreCollect
+from hyperion.utils.context import device_composite_from_context
+
+
+@dataclasses.dataclass
+class LoadCentreCollectComposite(RobotLoadThenCentreComposite, RotationScanComposite):
+    """All devices which are directly or indirectly required by this plan"""
+
+
+def create_devices(context: BlueskyContext) -> LoadCentreCollectComposite:
+    return device_composite_from_context(context, LoadCentreCollectComposite)
+
+
+def load_centre_collect_full(
+    composite: LoadCentreCollectComposite,
+    parameters: LoadCentreCollect,
+    oav_params: OAVParameters | None = None,
+) -> MsgGenerator:
+    """Robot loads a sample, centres it and then collects a rotation at the centre found,
+    without returning to GDA in between. No rotation is collected if the gridscan found
+    no crystals.
+
+    The Eiger starts arming for the rotation as soon as the gridscan has finished with
+    it. The rotation is collected under the same XBPM feedback check as the gridscan,
+    so waiting for the feedback is skipped if the gridscan's confirmation still holds.
+    """
+    yield from robot_load_then_centre(composite, parameters.robot_load_then_centre)
+
+    rotation_params = parameters.rotation_scan
+    composite.eiger.set_detector_parameters(rotation_params.detector_params)
+    yield from start_preparing_data_collection_then_do_plan(
+        composite.eiger,
+        composite.detector_motion,
+        rotation_params.detector_distance_mm,
+        _rotation_at_centre(composite, parameters, oav_params),
+        group=CONST.WAIT.ROTATION_READY_FOR_DC,
+    )
+
+
+def _rotation_at_centre(
+    composite: LoadCentreCollectComposite,
+    parameters: LoadCentreCollect,
+    oav_params: OAVParameters | None,
+) -> MsgGenerator:
+    centres_of_mass = yield from bps.rd(composite.zocalo.centres_of_mass)
+    if centres_of_mass is None or len(centres_of_mass) == 0:  # type: ignore
+        raise WarningException("No X-ray centre was found, not collecting a rotation")
+
+    # The gridscan leaves the smargon at the centre found
+    x_mm = yield from bps.rd(composite.smargon.x)
+    y_mm = yield from bps.rd(composite.smargon.y)
+    z_mm = yield from bps.rd(composite.smargon.z)
+    LOGGER.info(f"Starting rotation at centre {(x_mm, y_mm, z_mm)}")
+    rotation_params = parameters.rotation_scan.copy(
+        update={
+            "x_start_um": x_mm * 1000,
+            "y_start_um": y_mm * 1000,
+            "z_start_um": z_mm * 1000,
+        }
+    )
+    yield from transmission_and_xbpm_feedback_for_collection_wrapper(
+        rotation_scan(composite, rotation_params, oav_params, arm_eiger=False),
+        composite.xbpm_feedback,
+        composite.attenuator,
+        rotation_params.transmission_frac,
+        composite.dcm,
+        parameters.robot_load_then_centre.xbpm_stable_window_s,
+    )
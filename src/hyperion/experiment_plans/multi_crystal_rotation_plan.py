@@ -0,0 +1,202 @@
+from __future__ import annotations
+
+import dataclasses
+from time import time
+from typing import Sequence, cast
+
+import bluesky.plan_stubs as bps
+import numpy as np
+from blueapi.core import BlueskyContext, MsgGenerator
+from dodal.devices.aperturescatterguard import ApertureScatterguard
+from dodal.devices.attenuator import Attenuator
+from dodal.devices.backlight import Backlight
+from dodal.devices.dcm import DCM
+from dodal.devices.detector.detector_motion import DetectorMotion
+from dodal.devices.eiger import EigerDetector
+from dodal.devices.fast_grid_scan import PandAFastGridScan, ZebraFastGridScan
+from dodal.devices.flux import Flux
+from dodal.devices.oav.oav_detector import OAV
+from dodal.devices.oav.oav_parameters import OAVParameters
+from dodal.devices.robot import BartRobot
+from dodal.devices.s4_slit_gaps import S4SlitGaps
+from dodal.devices.smargon import Smargon
+from dodal.devices.synchrotron import Synchrotron
+from dodal.devices.undulator import Undulator
+from dodal.devices.xbpm_feedback import XBPMFeedback
+from dodal.devices.zebra import Zebra
+from dodal.devices.zocalo import ZocaloResults
+from dodal.devices.zocalo.zocalo_results import DEFAULT_SORT_KEY, XrcResult
+from ophyd_async.panda import HDFPanda
+
+from hyperion.device_setup_plans.utils import (
+    start_preparing_data_collection_then_do_plan,
+)
+from hyperion.experiment_plans.flyscan_xray_centre_plan import (
+    FlyScanXRayCentreComposite,
+    flyscan_xray_centre,
+)
+from hyperion.experiment_plans.rotation_scan_plan import (
+    ROTATION_TOPUP_OPS_TIME_S,
+    RotationScanComposite,
+    multi_rotation_scan,
+)
+from hyperion.external_interaction.callbacks.xray_centre.ispyb_callback import (
+    ispyb_activation_wrapper,
+)
+from hyperion.external_interaction.exceptions import NoCentreFoundException
+from hyperion.log import LOGGER
+from hyperion.parameters.constants import CONST
+from hyperion.parameters.gridscan import ThreeDGridScan
+from hyperion.parameters.rotation import MultiCrystalRotation, RotationScan
+from hyperion.utils.context import device_composite_from_context
+
+
+@dataclasses.dataclass
+class MultiCrystalRotationComposite:
+    """All devices which are directly or indirectly required by this plan"""
+
+    aperture_scatterguard: ApertureScatterguard
+    attenuator: Attenuator
+    backlight: Backlight
+    dcm: DCM
+    detector_motion: DetectorMotion
+    eiger: EigerDetector
+    flux: Flux
+    oav: OAV
+    panda: HDFPanda
+    panda_fast_grid_scan: PandAFastGridScan
+    robot: BartRobot
+    s4_slit_gaps: S4SlitGaps
+    smargon: Smargon
+    synchrotron: Synchrotron
+    undulator: Undulator
+    xbpm_feedback: XBPMFeedback
+    zebra: Zebra
+    zebra_fast_grid_scan: ZebraFastGridScan
+    zocalo: ZocaloResults
+
+
+def create_devices(context: BlueskyContext) -> MultiCrystalRotationComposite:
+    return device_composite_from_context(context, MultiCrystalRotationComposite)
+
+
+def select_crystals(
+    results: Sequence[XrcResult], max_crystals: int, max_bbox_overlap: float
+) -> list[XrcResult]:
+    """Ranks the crystals found by zocalo from strongest to weakest and drops any whose
+    bounding box overlaps a stronger crystal's by more than max_bbox_overlap of the
+    smaller box, as these are most likely the same crystal.
+
+    Returns:
+        At most max_crystals of the results, strongest first
+    """
+    if not results:
+        return []
+    strengths = np.array([result[DEFAULT_SORT_KEY.value] for result in results])
+    ranked = np.argsort(-strengths, kind="stable")
+    # (crystal, lower/upper corner, axis)
+    boxes = np.array([results[i]["bounding_box"] for i in ranked], dtype=float)
+    lower = np.maximum(boxes[:, np.newaxis, 0], boxes[np.newaxis, :, 0])
+    upper = np.minimum(boxes[:, np.newaxis, 1], boxes[np.newaxis, :, 1])
+    intersections = np.prod(np.clip(upper - lower, 0, None), axis=-1)
+    volumes = np.prod(boxes[:, 1] - boxes[:, 0], axis=-1)
+    overlaps = intersections / np.minimum(volumes[:, np.newaxis], volumes)
+
+    selected: list[int] = []
+    for crystal in range(len(ranked)):
+        if len(selected) == max_crystals:
+            break
+        if not (overlaps[crystal, selected] > max_bbox_overlap).any():
+            selected.append(crystal)
+    return [results[ranked[crystal]] for crystal in selected]
+
+
+def _crystals_within_budget(
+    num_crystals: int, rotation_scan: RotationScan, time_left_s: float
+) -> int:
+    time_per_rotation_s = (
+        rotation_scan.num_images * rotation_scan.exposure_time_s
+        + ROTATION_TOPUP_OPS_TIME_S
+    )
+    return max(1, min(num_crystals, int(time_left_s // time_per_rotation_s)))
+
+
+def _crystal_position_um(
+    grid_scan: ThreeDGridScan, crystal: XrcResult
+) -> tuple[float, float, float]:
+    # As in get_processing_result, zocalo gives the centre of the first box as 0.5
+    grid_position = np.array(crystal["centre_of_mass"]) - 0.5
+    x, y, z = grid_scan.FGS_params.grid_position_to_motor_position(grid_position)
+    return x * 1000, y * 1000, z * 1000
+
+
+def multi_crystal_rotation(
+    composite: MultiCrystalRotationComposite,
+    parameters: MultiCrystalRotation,
+    oav_params: OAVParameters | None = None,
+) -> MsgGenerator:
+    """Runs a gridscan and then collects the same rotation on each of the strongest
+    crystals zocalo finds, rather than only on the best one. The rotations share one
+    detector arming and ISPyB data collection group."""
+    start_time = time()
+    grid_scan = parameters.grid_scan
+    grid_scan.features.update_self_from_server()
+    if grid_scan.features.set_stub_offsets:
+        # The smargon would be recentred on the best crystal after the gridscan, so
+        # the other crystals' positions would be in the wrong frame
+        raise ValueError("Multi crystal rotation cannot be used with stub offsets set")
+    composite.eiger.set_detector_parameters(grid_scan.detector_params)
+    yield from start_preparing_data_collection_then_do_plan(
+        composite.eiger,
+        composite.detector_motion,
+        grid_scan.detector_params.detector_distance,
+        ispyb_activation_wrapper(
+            flyscan_xray_centre(
+                FlyScanXRayCentreComposite(
+                    aperture_scatterguard=composite.aperture_scatterguard,
+                    attenuator=composite.attenuator,
+                    backlight=composite.backlight,
+                    eiger=composite.eiger,
+                    panda_fast_grid_scan=composite.panda_fast_grid_scan,
+                    flux=composite.flux,
+                    s4_slit_gaps=composite.s4_slit_gaps,
+                    smargon=composite.smargon,
+                    undulator=composite.undulator,
+                    synchrotron=composite.synchrotron,
+                    xbpm_feedback=composite.xbpm_feedback,
+                    zebra=composite.zebra,
+                    zocalo=composite.zocalo,
+                    panda=composite.panda,
+                    zebra_fast_grid_scan=composite.zebra_fast_grid_scan,
+                    dcm=composite.dcm,
+                    robot=composite.robot,
+                ),
+                grid_scan,
+            ),
+            grid_scan,
+        ),
+        group=CONST.WAIT.GRID_READY_FOR_DC,
+    )
+
+    results = yield from bps.rd(composite.zocalo.results)
+    crystals = select_crystals(
+        results, parameters.max_crystals, parameters.max_bbox_overlap
+    )
+    if not crystals:
+        raise NoCentreFoundException("Gridscan found no crystals to rotate on")
+    if parameters.time_budget_s:
+        num_crystals = _crystals_within_budget(
+            len(crystals),
+            parameters.rotation_scan,
+            parameters.time_budget_s - (time() - start_time),
+        )
+        crystals = crystals[:num_crystals]
+    LOGGER.info(f"Collecting rotations on {len(crystals)} crystals: {crystals}")
+
+    yield from multi_rotation_scan(
+        cast(RotationScanComposite, composite),
+        parameters.rotation_scan.at_positions(
+            [_crystal_position_um(grid_scan, crystal) for crystal in crystals]
+        ),
+        oav_params,
+    )
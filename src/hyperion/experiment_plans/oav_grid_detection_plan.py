@@ -5,6 +5,7 @@ import math
 from typing import TYPE_CHECKING, Tuple
 
 import bluesky.plan_stubs as bps
+import bluesky.preprocessors as bpp
 import numpy as np
 from blueapi.core import BlueskyContext
 from dodal.devices.backlight import Backlight
@@ -16,6 +17,7 @@ from dodal.devices.smargon import Smargon
 
 from hyperion.device_setup_plans.setup_oav import (
     pre_centring_setup_oav,
+    wait_for_oav_frame_after_move,
 )
 from hyperion.exceptions import catch_exception_and_warn
 from hyperion.log import LOGGER
@@ -25,6 +27,11 @@ from hyperion.utils.context import device_composite_from_context
 if TYPE_CHECKING:
     from dodal.devices.oav.oav_parameters import OAVParameters
 
+CONTINUOUS_SWEEP_VELOCITY_DEG_S = 30
+# The sweep must see the pin over enough of a rotation to fit its shape
+CONTINUOUS_SWEEP_MIN_RANGE_DEG = 45
+CONTINUOUS_SWEEP_GROUP = "continuous_grid_detection_sweep"
+
 
 @dataclasses.dataclass
 class OavGridDetectionComposite:
@@ -57,6 +64,166 @@ def get_min_and_max_y_of_pin(
     return min_y, max_y
 
 
+@dataclasses.dataclass
+class EdgeProfile:
+    omega_deg: float
+    tip_x_px: int | None
+    top_edge: np.ndarray
+    bottom_edge: np.ndarray
+
+
+@dataclasses.dataclass
+class SweptPinProfile:
+    """The pin as fitted to edge profiles captured over an omega sweep. Each image
+    column of the pin is treated as a cylinder parallel to the rotation axis, so that
+    its centre appears at centre_px + cos_px * cos(omega) + sin_px * sin(omega) in
+    the image and its radius is the largest half height seen at any angle. Together
+    these give a 3D bounding envelope of the pin, from tip_x_px onwards."""
+
+    tip_x_px: int
+    centre_px: np.ndarray
+    cos_px: np.ndarray
+    sin_px: np.ndarray
+    radius_px: np.ndarray
+
+    def extent_at(self, omega_deg: float, full_image_height_px: int) -> Tuple[int, int]:
+        """Gives the minimum and maximum y of the envelope as it would appear at the
+        given omega, clipped to the image. If no edges were found this covers the full
+        image, as for get_min_and_max_y_of_pin."""
+        if np.all(np.isnan(self.radius_px)):
+            return 0, full_image_height_px
+        omega = np.radians(omega_deg)
+        centre = (
+            self.centre_px + self.cos_px * np.cos(omega) + self.sin_px * np.sin(omega)
+        )
+        min_y = np.nanmin(centre - self.radius_px)
+        max_y = np.nanmax(centre + self.radius_px)
+        return (
+            max(math.floor(min_y), 0),
+            min(math.ceil(max_y), full_image_height_px),
+        )
+
+
+def fit_swept_pin_profile(
+    profiles: list[EdgeProfile], full_image_height_px: int, grid_width_px: int
+) -> SweptPinProfile | None:
+    """Fits the pin to the edge profiles from all the images in a sweep at once.
+
+    Edges where nothing was found, or which cover the whole image, are ignored in the
+    same way as get_min_and_max_y_of_pin. The tip is taken as the furthest left it was
+    seen at any angle, as the grid extends to the right of it. Returns None if the pin
+    was not seen over enough of the sweep to fit it.
+    """
+    found = [
+        profile
+        for profile in profiles
+        if profile.tip_x_px is not None and len(profile.top_edge)
+    ]
+    omegas_deg = np.array([profile.omega_deg for profile in found])
+    if not found or np.ptp(omegas_deg) < CONTINUOUS_SWEEP_MIN_RANGE_DEG:
+        LOGGER.warning(
+            f"Pin tip found in {len(found)} images over less than "
+            f"{CONTINUOUS_SWEEP_MIN_RANGE_DEG} degrees of the grid detection sweep"
+        )
+        return None
+
+    tip_x_px = int(min(profile.tip_x_px for profile in found))  # type: ignore
+    columns = slice(tip_x_px, tip_x_px + grid_width_px)
+    top = np.array([profile.top_edge[columns] for profile in found], dtype=float)
+    bottom = np.array([profile.bottom_edge[columns] for profile in found], dtype=float)
+    valid = (
+        (top != 0)
+        & (top != NONE_VALUE)
+        & (bottom != full_image_height_px)
+        & (bottom != NONE_VALUE)
+    )
+
+    # Weighted least squares of the centre against [1, cos, sin] for every column
+    omegas = np.radians(omegas_deg)
+    design = np.stack([np.ones_like(omegas), np.cos(omegas), np.sin(omegas)], axis=1)
+    weights = valid.astype(float)
+    normal = np.einsum("ic,ij,ik->cjk", weights, design, design)
+    rhs = np.einsum(
+        "ic,ij,ic->cj", weights, design, np.where(valid, (top + bottom) / 2, 0)
+    )
+    coefficients = np.einsum("cjk,ck->cj", np.linalg.pinv(normal), rhs)
+    coefficients[~valid.any(axis=0)] = np.nan
+
+    radius_px = np.max(np.where(valid, (bottom - top) / 2, -np.inf), axis=0)
+    radius_px[~valid.any(axis=0)] = np.nan
+
+    return SweptPinProfile(
+        tip_x_px,
+        centre_px=coefficients[:, 0],
+        cos_px=coefficients[:, 1],
+        sin_px=coefficients[:, 2],
+        radius_px=radius_px,
+    )
+
+
+def capture_edge_profiles_during_sweep(
+    pin_tip_detection: PinTipDetection,
+    smargon: Smargon,
+    start_deg: float,
+    end_deg: float,
+    velocity_deg_s: float = CONTINUOUS_SWEEP_VELOCITY_DEG_S,
+):
+    """Rotates omega from start_deg to end_deg in one move at the given velocity,
+    running pin tip detection on each OAV image it can throughout. Detection may use
+    the image from before it was triggered or a later one, so each set of edges is
+    tagged with the omega midway between readbacks taken before and after it. If the
+    edges are the same as the last ones the image is assumed to have been seen already
+    and they are dropped."""
+    yield from bps.mv(smargon.omega, start_deg)
+    original_velocity = yield from bps.rd(smargon.omega.velocity)
+    profiles: list[EdgeProfile] = []
+
+    def capture_profile():
+        omega_before_deg = yield from bps.rd(smargon.omega.user_readback)
+        yield from bps.trigger(pin_tip_detection, wait=True)
+        omega_after_deg = yield from bps.rd(smargon.omega.user_readback)
+        tip_x_px, _ = yield from bps.rd(pin_tip_detection.triggered_tip)
+        top_edge = np.asarray((yield from bps.rd(pin_tip_detection.triggered_top_edge)))
+        bottom_edge = np.asarray(
+            (yield from bps.rd(pin_tip_detection.triggered_bottom_edge))
+        )
+        if (
+            profiles
+            and profiles[-1].tip_x_px == tip_x_px
+            and np.array_equal(profiles[-1].top_edge, top_edge)
+            and np.array_equal(profiles[-1].bottom_edge, bottom_edge)
+        ):
+            return
+        profiles.append(
+            EdgeProfile(
+                (omega_before_deg + omega_after_deg) / 2,
+                tip_x_px,
+                top_edge,
+                bottom_edge,
+            )
+        )
+
+    def sweep():
+        yield from bps.abs_set(smargon.omega.velocity, velocity_deg_s, wait=True)
+        status = yield from bps.abs_set(
+            smargon.omega, end_deg, group=CONTINUOUS_SWEEP_GROUP
+        )
+        yield from capture_profile()
+        while not status.done:
+            yield from capture_profile()
+        yield from bps.wait(CONTINUOUS_SWEEP_GROUP)
+        # The last image may have been taken while still moving
+        yield from capture_profile()
+
+    yield from bpp.finalize_wrapper(
+        sweep(), bps.abs_set(smargon.omega.velocity, original_velocity, wait=True)
+    )
+    LOGGER.info(
+        f"Captured {len(profiles)} pin edge profiles between {start_deg} and {end_deg}"
+    )
+    return profiles
+
+
 def grid_detection_plan(
     composite: OavGridDetectionComposite,
     parameters: OAVParameters,
@@ -64,6 +231,7 @@ def grid_detection_plan(
     snapshot_dir: str,
     grid_width_microns: float,
     box_size_um: float = 20,
+    continuous_sweep: bool = False,
 ):
     """
     Creates the parameters for two grids that are 90 degrees from each other and
@@ -76,6 +244,11 @@ def grid_detection_plan(
         snapshot_dir (str): The location to save snapshots
         grid_width_microns (int): The width of the grid to scan in microns
         box_size_um (float): The size of each box of the grid in microns
+        continuous_sweep (bool): If true, the pin edges are captured while omega
+            sweeps between the two grid angles in one move, and both grids are
+            calculated from all of them, rather than detecting the pin at each angle.
+            If the pin is not seen over enough of the sweep then it is detected at
+            each angle anyway
     """
     oav: OAV = composite.oav
     smargon: Smargon = composite.smargon
@@ -97,35 +270,51 @@ def grid_detection_plan(
 
     grid_width_pixels = int(grid_width_microns / oav.parameters.micronsPerXPixel)
 
+    swept_profile: SweptPinProfile | None = None
+    if continuous_sweep:
+        # Sweep towards 0 so that the first grid needs no further move
+        profiles = yield from capture_edge_profiles_during_sweep(
+            pin_tip_detection, smargon, -90, 0
+        )
+        full_image_height_px = yield from bps.rd(oav.cam.array_size.array_size_y)
+        swept_profile = fit_swept_pin_profile(
+            profiles, full_image_height_px, grid_width_pixels
+        )
+
     # The FGS uses -90 so we need to match it
     for angle in [0, -90]:
         yield from bps.mv(smargon.omega, angle)
-        # need to wait for the OAV image to update
-        # See #673 for improvements
-        yield from bps.sleep(CONST.HARDWARE.OAV_REFRESH_DELAY)
+        yield from wait_for_oav_frame_after_move(oav)
 
-        tip_x_px, tip_y_px = yield from catch_exception_and_warn(
-            PinNotFoundException, wait_for_tip_to_be_found, pin_tip_detection
-        )
+        full_image_height_px = yield from bps.rd(oav.cam.array_size.array_size_y)
 
-        LOGGER.info(f"Tip is at x,y: {tip_x_px},{tip_y_px}")
+        if swept_profile:
+            tip_x_px = swept_profile.tip_x_px
+            min_y, max_y = swept_profile.extent_at(angle, full_image_height_px)
+            LOGGER.info(f"Tip is at x: {tip_x_px}, pin envelope y: {min_y}-{max_y}")
+        else:
+            tip_x_px, tip_y_px = yield from catch_exception_and_warn(
+                PinNotFoundException, wait_for_tip_to_be_found, pin_tip_detection
+            )
 
-        top_edge = np.array((yield from bps.rd(pin_tip_detection.triggered_top_edge)))
-        bottom_edge = np.array(
-            (yield from bps.rd(pin_tip_detection.triggered_bottom_edge))
-        )
+            LOGGER.info(f"Tip is at x,y: {tip_x_px},{tip_y_px}")
 
-        full_image_height_px = yield from bps.rd(oav.cam.array_size.array_size_y)
+            top_edge = np.array(
+                (yield from bps.rd(pin_tip_detection.triggered_top_edge))
+            )
+            bottom_edge = np.array(
+                (yield from bps.rd(pin_tip_detection.triggered_bottom_edge))
+            )
 
-        # only use the area from the start of the pin onwards
-        top_edge = top_edge[tip_x_px : tip_x_px + grid_width_pixels]
-        bottom_edge = bottom_edge[tip_x_px : tip_x_px + grid_width_pixels]
-        LOGGER.info(f"OAV Edge detection top: {list(top_edge)}")
-        LOGGER.info(f"OAV Edge detection bottom: {list(bottom_edge)}")
+            # only use the area from the start of the pin onwards
+            top_edge = top_edge[tip_x_px : tip_x_px + grid_width_pixels]
+            bottom_edge = bottom_edge[tip_x_px : tip_x_px + grid_width_pixels]
+            LOGGER.info(f"OAV Edge detection top: {list(top_edge)}")
+            LOGGER.info(f"OAV Edge detection bottom: {list(bottom_edge)}")
 
-        min_y, max_y = get_min_and_max_y_of_pin(
-            top_edge, bottom_edge, full_image_height_px
-        )
+            min_y, max_y = get_min_and_max_y_of_pin(
+                top_edge, bottom_edge, full_image_height_px
+            )
 
         grid_height_px = max_y - min_y
 
@@ -3,19 +3,34 @@ from typing import Protocol
 
 from blueapi.core import MsgGenerator
 from bluesky import plan_stubs as bps
+from bluesky import preprocessors as bpp
 from dodal.devices.aperturescatterguard import AperturePosition, ApertureScatterguard
 from dodal.devices.backlight import Backlight, BacklightPosition
 from dodal.devices.oav.oav_detector import OAV
 from dodal.devices.oav.oav_parameters import OAVParameters
 from dodal.devices.smargon import Smargon
+from ophyd_async.core import soft_signal_r_and_setter
 
 from hyperion.device_setup_plans.setup_oav import setup_general_oav_params
+from hyperion.device_setup_plans.utils import wait_for_signal
+from hyperion.log import LOGGER
 from hyperion.parameters.components import WithSnapshot
 from hyperion.parameters.constants import DocDescriptorNames
 
 OAV_SNAPSHOT_SETUP_GROUP = "oav_snapshot_setup"
 OAV_SNAPSHOT_SETUP_SHOT = "oav_snapshot_setup_shot"
 OAV_SNAPSHOT_GROUP = "oav_snapshot_group"
+OAV_SNAPSHOT_ON_THE_FLY_GROUP = "oav_snapshot_on_the_fly"
+
+# How close omega must be to count as at a snapshot angle, in degrees
+OMEGA_TOLERANCE_DEG = 0.1
+# Roughly how long the OAV takes to capture a snapshot once triggered, in s
+OAV_SNAPSHOT_TIME_S = 0.2
+# How far omega may move while a snapshot is captured, in degrees, which sets how fast
+# omega can rotate through the snapshot angles
+OMEGA_SNAPSHOT_SPREAD_DEG = 2.0
+# Time allowed on top of the expected move time for omega to pass every angle, in s
+OMEGA_MOVE_MARGIN_S = 10.0
 
 
 class OavSnapshotComposite(Protocol):
@@ -60,6 +75,83 @@ def oav_snapshot_plan(
         yield from _take_oav_snapshot(composite, omega)
 
 
+def oav_snapshots_on_the_fly_plan(
+    composite: OavSnapshotComposite,
+    parameters: WithSnapshot,
+    oav_parameters: OAVParameters,
+    end_omega_deg: float,
+    max_omega_velocity_deg_s: float,
+) -> MsgGenerator:
+    """Takes the snapshots as omega passes each snapshot angle rather than stopping at
+    each of them. Omega sweeps through the angles in whichever direction ends closer to
+    end_omega_deg, and carries on to end_omega_deg if that is past the last angle. The
+    sweep is slowed so that omega moves no more than OMEGA_SNAPSHOT_SPREAD_DEG while a
+    snapshot is captured, and each snapshot's event records the omega midway between
+    readbacks taken before and after it was triggered."""
+    if not parameters.take_snapshots:
+        return
+    omega = composite.smargon.omega
+    yield from bps.wait(group=OAV_SNAPSHOT_SETUP_GROUP)
+    yield from _setup_oav(composite, parameters, oav_parameters)
+
+    omega_deg = yield from bps.rd(omega.user_readback)
+    angles = sorted(parameters.snapshot_omegas_deg or [])
+    if abs(omega_deg - angles[0]) + abs(end_omega_deg - angles[-1]) > abs(
+        omega_deg - angles[-1]
+    ) + abs(end_omega_deg - angles[0]):
+        angles.reverse()
+    first, last = angles[0], angles[-1]
+    direction = 1 if (last - first or first - omega_deg) >= 0 else -1
+    if (first - omega_deg) * direction < -OMEGA_TOLERANCE_DEG:
+        # Omega is past the first angle so has to go back to it
+        yield from bps.abs_set(omega, first, wait=True)
+        omega_deg = yield from bps.rd(omega.user_readback)
+    target_deg = end_omega_deg if (end_omega_deg - last) * direction >= 0 else last
+    velocity_deg_s = min(
+        max_omega_velocity_deg_s, OMEGA_SNAPSHOT_SPREAD_DEG / OAV_SNAPSHOT_TIME_S
+    )
+    snapshot_omega, set_snapshot_omega = soft_signal_r_and_setter(
+        float, name="oav_snapshot_omega"
+    )
+
+    def snapshot_at(angle: float, timeout: float):
+        yield from _set_snapshot_filename(composite, angle, wait=True)
+        yield from wait_for_signal(
+            omega.user_readback,
+            lambda value: (value - angle) * direction >= -OMEGA_TOLERANCE_DEG,
+            timeout,
+        )
+        omega_before_deg = yield from bps.rd(omega.user_readback)
+        yield from bps.trigger(composite.oav.snapshot, wait=True)
+        omega_after_deg = yield from bps.rd(omega.user_readback)
+        if abs(omega_after_deg - omega_before_deg) > OMEGA_SNAPSHOT_SPREAD_DEG:
+            LOGGER.warning(
+                f"Omega moved from {omega_before_deg} to {omega_after_deg} during the "
+                f"snapshot at {angle}"
+            )
+        set_snapshot_omega((omega_before_deg + omega_after_deg) / 2)
+        yield from bps.create(DocDescriptorNames.OAV_ROTATION_SNAPSHOT_TRIGGERED)
+        yield from bps.read(composite.oav.snapshot)
+        yield from bps.read(snapshot_omega)
+        yield from bps.save()
+
+    def sweep():
+        yield from bps.abs_set(omega.velocity, velocity_deg_s, wait=True)
+        yield from bps.abs_set(omega, target_deg, group=OAV_SNAPSHOT_ON_THE_FLY_GROUP)
+        previous_deg = omega_deg
+        for angle in angles:
+            yield from snapshot_at(
+                angle, abs(angle - previous_deg) / velocity_deg_s + OMEGA_MOVE_MARGIN_S
+            )
+            previous_deg = angle
+        yield from bps.wait(group=OAV_SNAPSHOT_ON_THE_FLY_GROUP)
+
+    yield from bpp.finalize_wrapper(
+        sweep(),
+        bps.abs_set(omega.velocity, max_omega_velocity_deg_s, wait=True),
+    )
+
+
 def _setup_oav(
     composite: OavSnapshotComposite,
     parameters: WithSnapshot,
@@ -71,15 +163,24 @@ def _setup_oav(
     )
 
 
-def _take_oav_snapshot(composite: OavSnapshotComposite, omega: float):
-    yield from bps.abs_set(
-        composite.smargon.omega, omega, group=OAV_SNAPSHOT_SETUP_SHOT
-    )
+def _set_snapshot_filename(
+    composite: OavSnapshotComposite, omega: float, wait: bool = False
+):
     time_now = datetime.now()
     filename = f"{time_now.strftime('%H%M%S')}_oav_snapshot_{omega:.0f}"
     yield from bps.abs_set(
-        composite.oav.snapshot.filename, filename, group=OAV_SNAPSHOT_SETUP_SHOT
+        composite.oav.snapshot.filename,
+        filename,
+        group=OAV_SNAPSHOT_SETUP_SHOT,
+        wait=wait,
+    )
+
+
+def _take_oav_snapshot(composite: OavSnapshotComposite, omega: float):
+    yield from bps.abs_set(
+        composite.smargon.omega, omega, group=OAV_SNAPSHOT_SETUP_SHOT
     )
+    yield from _set_snapshot_filename(composite, omega)
     yield from bps.wait(group=OAV_SNAPSHOT_SETUP_SHOT)
     yield from bps.trigger(composite.oav.snapshot, wait=True)
     yield from bps.create(DocDescriptorNames.OAV_ROTATION_SNAPSHOT_TRIGGERED)
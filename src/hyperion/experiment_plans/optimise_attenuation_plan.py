@@ -1,4 +1,5 @@
 import dataclasses
+import math
 from enum import Enum
 
 import bluesky.plan_stubs as bps
@@ -22,6 +23,10 @@ class Direction(Enum):
     NEGATIVE = "negative"
 
 
+# The last optimised transmission, keyed by optimisation type, sample id and energy
+_OPTIMISED_TRANSMISSIONS: dict[tuple[str, int, float], float] = {}
+
+
 @dataclasses.dataclass
 class OptimizeAttenuationComposite:
     """All devices which are directly or indirectly required by this plan"""
@@ -85,6 +90,51 @@ def calculate_new_direction(direction: Direction, deadtime, deadtime_threshold):
     return direction
 
 
+def model_transmission(
+    exposures: dict[float, float],
+    target: float,
+    too_low: float | None,
+    too_high: float | None,
+) -> float | None:
+    """Estimate the transmission that gives the target value from all the exposures
+    so far, assuming the value rises with transmission.
+
+    Args:
+        exposures (dict[float, float]):
+        The value measured at each transmission tried so far
+
+        target (float):
+        The value to aim for
+
+        too_low (float | None):
+        The highest transmission tried which gave too low a value, if any
+
+        too_high (float | None):
+        The lowest transmission tried which gave too high a value, if any
+
+    Returns:
+        A secant step between too_low and too_high if both are known, bisecting them
+        in log space instead if the secant falls outside. Otherwise the value is fitted
+        as proportional to transmission. None if the fit gives no estimate.
+    """
+    if too_low is not None and too_high is not None:
+        value_low, value_high = exposures[too_low], exposures[too_high]
+        if value_high != value_low:
+            transmission = too_low + (target - value_low) * (too_high - too_low) / (
+                value_high - value_low
+            )
+            if too_low < transmission < too_high:
+                return transmission
+        return math.sqrt(too_low * too_high)
+
+    transmissions = np.array(list(exposures.keys()))
+    values = np.array(list(exposures.values()))
+    gradient = np.dot(transmissions, values) / np.dot(transmissions, transmissions)
+    if gradient <= 0:
+        return None
+    return target / gradient
+
+
 def deadtime_calc_new_transmission(
     direction: Direction,
     transmission: float,
@@ -192,9 +242,10 @@ def deadtime_optimisation(
 
     Here we use the percentage deadtime - the percentage of time to which the detector is unable to process events.
 
-    This algorithm gradually increases the transmission until the percentage deadtime goes beneath the specified threshold. It then increases
-    the transmission and stops when the deadtime goes above the threshold. A smaller increment will provide a better optimised value, but take more
-    cycles to complete.
+    This algorithm increases the transmission until the percentage deadtime goes above the specified threshold. It then decreases the transmission
+    and stops when the deadtime goes back beneath the threshold, or as soon as the deadtime is beneath the threshold but within a factor of the
+    increment of it. Each step is estimated from all of the deadtimes measured so far, see model_transmission, and is only a fixed step by the
+    increment if no estimate can be made. A smaller increment will provide a better optimised value, but may take more cycles to complete.
 
     Args:
         attenuator: (Attenuator) Ophyd device
@@ -231,6 +282,7 @@ def deadtime_optimisation(
     """
 
     direction = Direction.POSITIVE
+    deadtimes: dict[float, float] = {}
     LOGGER.info(f"Target deadtime is {deadtime_threshold}")
 
     for cycle in range(0, max_cycles):
@@ -252,6 +304,7 @@ def deadtime_optimisation(
             deadtime = 1 - abs(total_time - reset_ticks) / (total_time)
 
         LOGGER.info(f"Deadtime is now at {deadtime}")
+        deadtimes[transmission] = deadtime
 
         # Check if new deadtime is OK
 
@@ -261,7 +314,7 @@ def deadtime_optimisation(
             transmission,
             upper_transmission_limit,
             direction,
-        ):
+        ) or (deadtime_threshold / increment <= deadtime <= deadtime_threshold):
             optimised_transmission = transmission
             break
 
@@ -273,13 +326,34 @@ def deadtime_optimisation(
 
         direction = calculate_new_direction(direction, deadtime, deadtime_threshold)
 
-        transmission = deadtime_calc_new_transmission(
-            direction,
-            transmission,
-            increment,
-            upper_transmission_limit,
-            lower_transmission_limit,
+        estimate = model_transmission(
+            deadtimes,
+            deadtime_threshold,
+            max(
+                (t for t, d in deadtimes.items() if d <= deadtime_threshold),
+                default=None,
+            ),
+            min(
+                (t for t, d in deadtimes.items() if d > deadtime_threshold),
+                default=None,
+            ),
         )
+        if estimate is None or (estimate > transmission) != (
+            direction == Direction.POSITIVE
+        ):
+            transmission = deadtime_calc_new_transmission(
+                direction,
+                transmission,
+                increment,
+                upper_transmission_limit,
+                lower_transmission_limit,
+            )
+        elif estimate < lower_transmission_limit:
+            raise AttenuationOptimisationFailedException(
+                "Calculated transmission is below expected limit"
+            )
+        else:
+            transmission = min(estimate, upper_transmission_limit)
 
     return optimised_transmission
 
@@ -299,7 +373,8 @@ def total_counts_optimisation(
     """Optimises the attenuation for the Xspress3Mini based on the total counts
 
     This loop adjusts the transmission of the attenuator and checks the total counts of the detector until the total counts as in the acceptable range,
-    defined by the lower and upper limit. To protect the sample, the transmission has a maximum value of 10%.
+    defined by the lower and upper limit. To protect the sample, the transmission has a maximum value of 10%. Each new transmission is estimated
+    from all of the counts measured so far, see model_transmission.
 
     Args:
         attenuator: (Attenuator) Ophyd device
@@ -341,6 +416,7 @@ def total_counts_optimisation(
     """
 
     LOGGER.info("Using total count optimisation")
+    counts: dict[float, float] = {}
 
     for cycle in range(0, max_cycles):
         LOGGER.info(
@@ -352,8 +428,9 @@ def total_counts_optimisation(
         data = np.array(
             (yield from bps.rd(composite.xspress3mini.dt_corrected_latest_mca[1]))
         )
-        total_count = sum(data[int(low_roi) : int(high_roi)])
+        total_count = float(np.sum(data[int(low_roi) : int(high_roi)]))
         LOGGER.info(f"Total count is {total_count}")
+        counts[transmission] = total_count
 
         if is_counts_within_target(total_count, lower_count_limit, upper_count_limit):
             optimised_transmission = transmission
@@ -371,7 +448,20 @@ def total_counts_optimisation(
             break
 
         else:
-            transmission = (target_count / (total_count)) * transmission
+            estimate = model_transmission(
+                counts,
+                target_count,
+                max(
+                    (t for t, c in counts.items() if c < lower_count_limit),
+                    default=None,
+                ),
+                min(
+                    (t for t, c in counts.items() if c > upper_count_limit),
+                    default=None,
+                ),
+            )
+            # No counts at all, so only more transmission can help
+            transmission = upper_transmission_limit if estimate is None else estimate
             if transmission > upper_transmission_limit:
                 transmission = upper_transmission_limit
             elif transmission < lower_transmission_limit:
@@ -404,7 +494,25 @@ def optimise_attenuation_plan(
     max_cycles=10,
     increment=2,
     deadtime_threshold=0.002,
+    sample_id: int | None = None,
+    energy_kev: float | None = None,
 ):
+    """Finds the transmission to use for the Xspress3Mini, see total_counts_optimisation
+    and deadtime_optimisation. If a sample id and energy are given then the result is
+    remembered, and used as the initial transmission when optimising for the same
+    sample at the same energy again."""
+    cache_key = None
+    if sample_id is not None and energy_kev is not None:
+        cache_key = (optimisation_type, sample_id, round(energy_kev, 3))
+        if cache_key in _OPTIMISED_TRANSMISSIONS:
+            initial_transmission = min(
+                max(_OPTIMISED_TRANSMISSIONS[cache_key], lower_transmission_limit),
+                upper_transmission_limit,
+            )
+            LOGGER.info(
+                f"Starting from previously optimised transmission {initial_transmission}"
+            )
+
     check_parameters(
         target_count,
         upper_count_limit,
@@ -445,12 +553,12 @@ def optimise_attenuation_plan(
         )
         optimised_transmission = yield from deadtime_optimisation(
             composite,
-            initial_transmission,
-            upper_transmission_limit,
-            lower_transmission_limit,
-            increment,
-            deadtime_threshold,
-            max_cycles,
+            transmission=initial_transmission,
+            increment=increment,
+            deadtime_threshold=deadtime_threshold,
+            max_cycles=max_cycles,
+            upper_transmission_limit=upper_transmission_limit,
+            lower_transmission_limit=lower_transmission_limit,
         )
 
     yield from bps.abs_set(
@@ -460,4 +568,6 @@ def optimise_attenuation_plan(
         wait=True,
     )
 
+    if cache_key is not None:
+        _OPTIMISED_TRANSMISSIONS[cache_key] = optimised_transmission
     return optimised_transmission
@@ -2,12 +2,14 @@ import dataclasses
 from typing import Generator
 
 import bluesky.plan_stubs as bps
+import numpy as np
 from blueapi.core import BlueskyContext
 from bluesky.utils import Msg
 from dodal.devices.backlight import Backlight
 from dodal.devices.oav.oav_detector import OAV
 from dodal.devices.oav.oav_parameters import OAV_CONFIG_JSON, OAVParameters
 from dodal.devices.oav.pin_image_recognition import PinTipDetection
+from dodal.devices.oav.pin_image_recognition.utils import NONE_VALUE
 from dodal.devices.oav.utils import (
     Pixel,
     get_move_required_so_that_beam_is_at_pixel,
@@ -15,15 +17,21 @@ from dodal.devices.oav.utils import (
 )
 from dodal.devices.smargon import Smargon
 
-from hyperion.device_setup_plans.setup_oav import pre_centring_setup_oav
+from hyperion.device_setup_plans.setup_oav import (
+    pre_centring_setup_oav,
+    wait_for_oav_frame_after_move,
+)
 from hyperion.device_setup_plans.smargon import move_smargon_warn_on_out_of_range
 from hyperion.exceptions import WarningException
 from hyperion.log import LOGGER
-from hyperion.parameters.constants import CONST
 from hyperion.utils.context import device_composite_from_context
 
 DEFAULT_STEP_SIZE = 0.5
 
+# How many columns from where the pin enters the image are used to fit its edges
+PIN_EDGE_FIT_COLUMNS = 100
+MIN_PIN_EDGE_FIT_COLUMNS = 10
+
 
 @dataclasses.dataclass
 class PinTipCentringComposite:
@@ -48,19 +56,70 @@ def trigger_and_return_pin_tip(
     return tip_x_y_px  # type: ignore
 
 
+def estimate_off_screen_tip_px(
+    top_edge: np.ndarray, bottom_edge: np.ndarray
+) -> float | None:
+    """Estimate how far off the left of the image the pin tip is, from the top and
+    bottom edges of the part of the pin that is in the image. The pin narrows towards
+    its tip so the width between the edges where the pin enters the image is fitted
+    with a line and extrapolated to zero.
+
+    Returns:
+        The x position of the tip in pixels, which will be negative, or None if the
+        edges do not narrow towards the edge of the image or the tip would be more
+        than an image width beyond it, as the edges are then too close to parallel for
+        the estimate to be trusted
+    """
+    top, bottom = np.asarray(top_edge), np.asarray(bottom_edge)
+    if top.ndim != 1 or top.shape != bottom.shape:
+        return None
+    columns = np.flatnonzero(top != NONE_VALUE)[:PIN_EDGE_FIT_COLUMNS]
+    if len(columns) < MIN_PIN_EDGE_FIT_COLUMNS:
+        return None
+    widths = bottom[columns].astype(float) - top[columns]
+    slope, intercept = np.polyfit(columns, widths, 1)
+    if slope <= 0 or intercept <= 0:
+        return None
+    tip_x_px = -intercept / slope
+    if tip_x_px < -len(top):
+        return None
+    return tip_x_px
+
+
+def _predicted_move_to_tip_mm(
+    pin_tip_device: PinTipDetection, oav: OAV
+) -> Generator[Msg, None, float | None]:
+    top_edge = yield from bps.rd(pin_tip_device.triggered_top_edge)
+    bottom_edge = yield from bps.rd(pin_tip_device.triggered_bottom_edge)
+    tip_x_px = estimate_off_screen_tip_px(top_edge, bottom_edge)  # type: ignore
+    if tip_x_px is None or not oav.parameters.micronsPerXPixel:
+        return None
+    LOGGER.info(f"Pin tip estimated to be off screen at x = {tip_x_px:.0f} px")
+    # +ve x in the OAV camera is -ve x on the smargon
+    return (
+        -(oav.parameters.beam_centre_i - tip_x_px)
+        * oav.parameters.micronsPerXPixel
+        / 1000
+    )
+
+
 def move_pin_into_view(
     pin_tip_device: PinTipDetection,
     smargon: Smargon,
+    oav: OAV,
     step_size_mm: float = DEFAULT_STEP_SIZE,
     max_steps: int = 2,
 ) -> Generator[Msg, None, Pixel]:
     """Attempt to move the pin into view and return the tip location in pixels if found.
-    The gonio x is moved in a number of discrete steps to find the pin. If the move
+    The gonio x is moved in a number of discrete steps to find the pin. If the pin
+    runs off the edge of the image, where its tip is is estimated from its edges and
+    the gonio moved to bring the tip to the beam in one step instead. If the move
     would take it past its limit, it moves to the limit instead.
 
     Args:
         pin_tip_device (PinTipDetection): The device being used to detect the pin
         smargon (Smargon): The gonio to move the tip
+        oav (OAV): The camera the pin is detected in
         step_size (float, optional): Distance to move the gonio (in mm) for each
                                     step of the search. Defaults to 0.5.
         max_steps (int, optional): The number of steps to search with. Defaults to 2.
@@ -75,30 +134,34 @@ def move_pin_into_view(
     def pin_tip_valid(pin_x: float):
         return pin_x != 0 and pin_x != pin_tip_device.INVALID_POSITION[0]
 
+    high_limit = yield from bps.rd(smargon.x.high_limit_travel)
+    low_limit = yield from bps.rd(smargon.x.low_limit_travel)
+
     for _ in range(max_steps):
         tip_x_px, tip_y_px = yield from trigger_and_return_pin_tip(pin_tip_device)
 
         if pin_tip_valid(tip_x_px):
             return (tip_x_px, tip_y_px)
 
+        move_mm = None
         if tip_x_px == 0:
             # Pin is off in the -ve direction
             step_size_mm = -step_size_mm
+            move_mm = yield from _predicted_move_to_tip_mm(pin_tip_device, oav)
+        if move_mm is None:
+            move_mm = step_size_mm
 
         smargon_x = yield from bps.rd(smargon.x.user_readback)
-        ideal_move_to_find_pin = float(smargon_x) + step_size_mm
-        high_limit = yield from bps.rd(smargon.x.high_limit_travel)
-        low_limit = yield from bps.rd(smargon.x.low_limit_travel)
+        ideal_move_to_find_pin = float(smargon_x) + move_mm
         move_within_limits = max(min(ideal_move_to_find_pin, high_limit), low_limit)
         if move_within_limits != ideal_move_to_find_pin:
             LOGGER.warning(
-                f"Pin tip is off screen, and moving {step_size_mm} mm would cross limits, "
+                f"Pin tip is off screen, and moving {move_mm} mm would cross limits, "
                 f"moving to {move_within_limits} instead"
             )
         yield from bps.mv(smargon.x, move_within_limits)
 
-        # Some time for the view to settle after the move
-        yield from bps.sleep(CONST.HARDWARE.OAV_REFRESH_DELAY)
+        yield from wait_for_oav_frame_after_move(oav)
 
     tip_x_px, tip_y_px = yield from trigger_and_return_pin_tip(pin_tip_device)
 
@@ -143,20 +206,16 @@ def pin_tip_centre_plan(
 
     LOGGER.info(f"Tip offset in pixels: {tip_offset_px}")
 
-    # need to wait for the OAV image to update
-    # See #673 for improvements
-    yield from bps.sleep(0.3)
+    yield from wait_for_oav_frame_after_move(oav)
 
     yield from pre_centring_setup_oav(oav, oav_params, pin_tip_setup)
 
-    tip = yield from move_pin_into_view(pin_tip_detect, smargon)
+    tip = yield from move_pin_into_view(pin_tip_detect, smargon, oav)
     yield from offset_and_move(tip)
 
     yield from bps.mvr(smargon.omega, 90)
 
-    # need to wait for the OAV image to update
-    # See #673 for improvements
-    yield from bps.sleep(0.3)
+    yield from wait_for_oav_frame_after_move(oav)
 
     tip = yield from wait_for_tip_to_be_found(pin_tip_detect)
     yield from offset_and_move(tip)
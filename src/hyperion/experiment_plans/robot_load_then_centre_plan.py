@@ -36,6 +36,7 @@ from ophyd_async.panda import HDFPanda
 
 from hyperion.device_setup_plans.utils import (
     start_preparing_data_collection_then_do_plan,
+    wait_for_signal,
 )
 from hyperion.experiment_plans.grid_detect_then_xray_centre_plan import (
     GridDetectThenXRayCentreComposite,
@@ -102,17 +103,13 @@ def wait_for_smargon_not_disabled(smargon: Smargon, timeout=60):
     connection between the robot and the smargon.
     """
     LOGGER.info("Waiting for smargon enabled")
-    SLEEP_PER_CHECK = 0.1
-    times_to_check = int(timeout / SLEEP_PER_CHECK)
-    for _ in range(times_to_check):
-        smargon_disabled = yield from bps.rd(smargon.disabled)
-        if not smargon_disabled:
-            LOGGER.info("Smargon now enabled")
-            return
-        yield from bps.sleep(SLEEP_PER_CHECK)
-    raise TimeoutError(
-        "Timed out waiting for smargon to become enabled after robot load"
-    )
+    try:
+        yield from wait_for_signal(smargon.disabled, 0, timeout)
+    except TimeoutError as e:
+        raise TimeoutError(
+            "Timed out waiting for smargon to become enabled after robot load"
+        ) from e
+    LOGGER.info("Smargon now enabled")
 
 
 def take_robot_snapshots(oav: OAV, webcam: Webcam, directory: Path):
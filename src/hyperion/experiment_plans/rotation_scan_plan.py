@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import dataclasses
+from collections.abc import Iterable
 
 import bluesky.plan_stubs as bps
 import bluesky.preprocessors as bpp
@@ -22,6 +23,11 @@ from dodal.devices.undulator import Undulator
 from dodal.devices.zebra import RotationDirection, Zebra
 from dodal.plans.check_topup import check_topup_and_wait_if_necessary
 
+from hyperion.device_setup_plans.check_topup import (
+    finish_topup_wait,
+    start_topup_wait,
+    topup_gating_permitted,
+)
 from hyperion.device_setup_plans.manipulate_sample import (
     begin_sample_environment_setup,
     cleanup_sample_environment,
@@ -43,6 +49,7 @@ from hyperion.device_setup_plans.setup_zebra import (
 from hyperion.experiment_plans.oav_snapshot_plan import (
     OavSnapshotComposite,
     oav_snapshot_plan,
+    oav_snapshots_on_the_fly_plan,
     setup_oav_snapshot_plan,
 )
 from hyperion.log import LOGGER
@@ -84,6 +91,8 @@ DEFAULT_DIRECTION = RotationDirection.NEGATIVE
 DEFAULT_MAX_VELOCITY = 120
 # Use a slightly larger time to acceleration than EPICS as it's better to be cautious
 ACCELERATION_MARGIN = 1.5
+# Additional time to account for rotation when gating on top-up, in s
+ROTATION_TOPUP_OPS_TIME_S = 10.0
 
 
 @dataclasses.dataclass
@@ -181,6 +190,114 @@ def calculate_motion_profile(
     )
 
 
+def order_sweeps_for_omega_travel(
+    parameters: MultiRotationScan,
+    start_omega_deg: float,
+    motor_time_to_speed_s: float,
+    max_velocity_deg_s: float,
+) -> tuple[MultiRotationScan, float]:
+    """Greedily reorders the sweeps of a multi rotation scan, flipping the direction of
+    any which then start closer to where omega will be, so that each sweep starts as
+    close as possible to where the one before it ended.
+
+    Returns:
+        The reordered scan and the degrees of omega travel this saves between sweeps
+    """
+    sweeps = parameters.rotation_scans
+    num_sweeps = len(sweeps)
+    # The profiles of each sweep as given followed by each sweep flipped
+    profiles = [
+        calculate_motion_profile(scan, motor_time_to_speed_s, max_velocity_deg_s)
+        for scan in parameters.with_rotation_scans(
+            [*sweeps, *(sweep.in_opposite_direction() for sweep in sweeps)]
+        ).single_rotation_scans
+    ]
+
+    def _travel_to_start_deg(position_deg: float, candidate: int) -> float:
+        return abs(profiles[candidate].start_motion_deg - position_deg)
+
+    def _end_deg(candidate: int) -> float:
+        profile = profiles[candidate]
+        return profile.start_motion_deg + profile.distance_to_move_deg
+
+    def _total_travel_deg(order: list[int]) -> float:
+        position_deg = start_omega_deg
+        travel_deg = 0.0
+        for candidate in order:
+            travel_deg += _travel_to_start_deg(position_deg, candidate)
+            position_deg = _end_deg(candidate)
+        return travel_deg
+
+    order: list[int] = []
+    remaining = set(range(num_sweeps))
+    position_deg = start_omega_deg
+    while remaining:
+        candidate = min(
+            (c for sweep in remaining for c in (sweep, sweep + num_sweeps)),
+            key=lambda c: (_travel_to_start_deg(position_deg, c), c),
+        )
+        remaining.remove(candidate % num_sweeps)
+        order.append(candidate)
+        position_deg = _end_deg(candidate)
+
+    saved_deg = _total_travel_deg(list(range(num_sweeps))) - _total_travel_deg(order)
+    if saved_deg <= 0:
+        # Being greedy doesn't always find a shorter route
+        return parameters, 0.0
+    return (
+        parameters.with_rotation_scans(
+            [
+                (
+                    sweeps[c]
+                    if c < num_sweeps
+                    else sweeps[c - num_sweeps].in_opposite_direction()
+                )
+                for c in order
+            ]
+        ),
+        saved_deg,
+    )
+
+
+def images_before_topup(
+    synchrotron: Synchrotron, num_images: int, exposure_time_s: float
+) -> MsgGenerator:
+    """Reads the live countdown to the next top-up and returns how many of the images
+    can be collected before it, which is all of them if they fit or top-up gating
+    doesn't apply"""
+    machine_mode = yield from bps.rd(synchrotron.synchrotron_mode)
+    time_to_topup = yield from bps.rd(synchrotron.top_up_start_countdown)
+    if (
+        not topup_gating_permitted(machine_mode, time_to_topup)
+        or num_images * exposure_time_s + ROTATION_TOPUP_OPS_TIME_S <= time_to_topup
+    ):
+        return num_images
+    return max(int((time_to_topup - ROTATION_TOPUP_OPS_TIME_S) / exposure_time_s), 0)
+
+
+def _next_wedge_around_topup(
+    synchrotron: Synchrotron, params: RotationScan, start_img: int
+) -> MsgGenerator:
+    """Returns the wedge of the rotation from start_img which can be collected before
+    the next top-up. If none of it can, waits for the top-up to finish and predicts
+    again from the countdown to the one after."""
+    remaining = params.num_images - start_img
+    num_images = yield from images_before_topup(
+        synchrotron, remaining, params.exposure_time_s
+    )
+    if not num_images:
+        yield from check_topup_and_wait_if_necessary(
+            synchrotron,
+            remaining * params.exposure_time_s,
+            ROTATION_TOPUP_OPS_TIME_S,
+        )
+        num_images = yield from images_before_topup(
+            synchrotron, remaining, params.exposure_time_s
+        )
+    # If there is no time between top-ups then collect the rest, behind the gate
+    return params.wedge(start_img, num_images or remaining)
+
+
 def rotation_scan_plan(
     composite: RotationScanComposite,
     params: RotationScan,
@@ -203,6 +320,13 @@ def rotation_scan_plan(
     ):
         axis = composite.smargon.omega
 
+        # Start any wait for a top-up now so that the setup below happens during it
+        topup_wait = yield from start_topup_wait(
+            composite.synchrotron,
+            motion_values.total_exposure_s,
+            ops_time=ROTATION_TOPUP_OPS_TIME_S,
+        )  # See #https://github.com/DiamondLightSource/hyperion/issues/932
+
         # can move to start as fast as possible
         yield from bps.abs_set(
             axis.velocity, motion_values.max_velocity_deg_s, wait=True
@@ -238,15 +362,16 @@ def rotation_scan_plan(
         yield from bps.wait("setup_senv")
         yield from bps.wait("move_to_rotation_start")
 
-        # get some information for the ispyb deposition and trigger the callback
-        yield from read_hardware_for_zocalo(composite.eiger)
-
         yield from read_hardware_pre_collection(
             composite.undulator,
             composite.synchrotron,
             composite.s4_slit_gaps,
             composite.robot,
             composite.smargon,
+            dcm=composite.dcm if params.create_nexus_before_collection else None,
+            detector=(
+                composite.eiger if params.create_nexus_before_collection else None
+            ),
         )
 
         # Get ready for the actual scan
@@ -255,14 +380,18 @@ def rotation_scan_plan(
         )
 
         yield from bps.wait("setup_zebra")
+        LOGGER.info("Waiting for the detector to finish arming...")
+        yield from bps.wait(CONST.WAIT.ROTATION_READY_FOR_DC)
+        # Nothing left to arm, but stage so the Eiger checks it is armed and is
+        # staged when it is unstaged. This is a no-op for later sweeps of a multi
+        # rotation scan, as the Eiger stays armed between them
+        yield from bps.stage(composite.eiger)
+        # Trigger zocalo, which needs the filename set when the detector is armed
+        yield from read_hardware_for_zocalo(composite.eiger)
         yield from arm_zebra(composite.zebra)
 
         # Check topup gate
-        yield from check_topup_and_wait_if_necessary(
-            composite.synchrotron,
-            motion_values.total_exposure_s,
-            ops_time=10.0,  # Additional time to account for rotation, is s
-        )  # See #https://github.com/DiamondLightSource/hyperion/issues/932
+        yield from finish_topup_wait(composite.synchrotron, topup_wait)
 
         LOGGER.info("Executing rotation scan")
         yield from bps.rel_set(axis, motion_values.distance_to_move_deg, wait=True)
@@ -287,6 +416,30 @@ def _cleanup_plan(composite: RotationScanComposite, **kwargs):
     yield from bpp.finalize_wrapper(disarm_zebra(composite.zebra), bps.wait("cleanup"))
 
 
+def _arm_eiger_wrapper(
+    plan: MsgGenerator, eiger: EigerDetector, arm: bool = True
+) -> MsgGenerator:
+    """Starts arming the Eiger then runs the plan, which must wait on
+    ROTATION_READY_FOR_DC and then stage the Eiger before collecting, so that arming
+    happens alongside the moves and snapshots before the rotation. If arm is False the
+    caller has already started arming in that group. The Eiger is unstaged at the end
+    whether or not the plan succeeds."""
+
+    def _arm_then_plan():
+        if arm:
+            yield from bps.abs_set(
+                eiger.do_arm, 1, group=CONST.WAIT.ROTATION_READY_FOR_DC
+            )
+        yield from plan
+
+    return (
+        yield from bpp.finalize_wrapper(_arm_then_plan(), lambda: bps.unstage(eiger))
+    )
+
+
+_arm_eiger_decorator = bpp.make_decorator(_arm_eiger_wrapper)
+
+
 def _move_and_rotation(
     composite: RotationScanComposite,
     params: RotationScan,
@@ -318,7 +471,16 @@ def _move_and_rotation(
         yield from setup_oav_snapshot_plan(
             composite, params, motion_values.max_velocity_deg_s
         )
-        yield from oav_snapshot_plan(composite, params, oav_params)
+        if params.snapshots_on_the_fly:
+            yield from oav_snapshots_on_the_fly_plan(
+                composite,
+                params,
+                oav_params,
+                motion_values.start_motion_deg,
+                motion_values.max_velocity_deg_s,
+            )
+        else:
+            yield from oav_snapshot_plan(composite, params, oav_params)
     yield from rotation_scan_plan(
         composite,
         params,
@@ -330,10 +492,31 @@ def rotation_scan(
     composite: RotationScanComposite,
     parameters: RotationScan,
     oav_params: OAVParameters | None = None,
+    arm_eiger: bool = True,
 ) -> MsgGenerator:
+    """Collects a rotation scan. If arm_eiger is False then the Eiger must already be
+    arming for it in the ROTATION_READY_FOR_DC group."""
     if not oav_params:
         oav_params = OAVParameters(context="xrayCentring")
 
+    if (
+        parameters.split_around_topup
+        and (
+            yield from images_before_topup(
+                composite.synchrotron, parameters.num_images, parameters.exposure_time_s
+            )
+        )
+        < parameters.num_images
+    ):
+        LOGGER.info("Splitting rotation into wedges around top-ups")
+        yield from _multi_rotation_run(
+            composite,
+            parameters.as_wedges([parameters.num_images]),
+            _wedges_around_topup(composite, parameters, oav_params),
+            arm_eiger,
+        )
+        return
+
     @bpp.set_run_key_decorator("rotation_scan")
     @bpp.run_decorator(  # attach experiment metadata to the start document
         md={
@@ -352,7 +535,7 @@ def rotation_scan(
         eiger: EigerDetector = composite.eiger
         eiger.set_detector_parameters(params.detector_params)
 
-        @bpp.stage_decorator([eiger])
+        @_arm_eiger_decorator(eiger, arm_eiger)
         @bpp.finalize_decorator(lambda: _cleanup_plan(composite))
         def rotation_with_cleanup_and_stage(params: RotationScan):
             LOGGER.info("setting up sample environment...")
@@ -365,7 +548,7 @@ def rotation_scan(
 
             yield from _move_and_rotation(composite, params, oav_params)
 
-        LOGGER.info("setting up and staging eiger...")
+        LOGGER.info("setting up and arming eiger...")
         yield from rotation_with_cleanup_and_stage(params)
 
     yield from rotation_scan_plan_with_stage_and_cleanup(parameters)
@@ -378,6 +561,80 @@ def multi_rotation_scan(
 ) -> MsgGenerator:
     if not oav_params:
         oav_params = OAVParameters(context="xrayCentring")
+    if parameters.minimise_omega_travel:
+        omega = composite.smargon.omega
+        motor_time_to_speed = yield from bps.rd(omega.acceleration_time)
+        max_vel = yield from bps.rd(omega.max_velocity)
+        omega_deg = yield from bps.rd(omega)
+        parameters, saved_deg = order_sweeps_for_omega_travel(
+            parameters, omega_deg, motor_time_to_speed, max_vel
+        )
+        LOGGER.info(
+            f"Reordering sweeps to save {saved_deg} degrees of omega travel: "
+            f"{[(s.omega_start_deg, s.rotation_direction) for s in parameters.rotation_scans]}"
+        )
+    yield from _multi_rotation_run(
+        composite,
+        parameters,
+        _sweeps(composite, parameters.single_rotation_scans, oav_params),
+    )
+
+
+def _rotation_sweep(
+    composite: RotationScanComposite,
+    params: RotationScan,
+    oav_params: OAVParameters,
+) -> MsgGenerator:
+    @bpp.set_run_key_decorator("rotation_scan")
+    @bpp.run_decorator(  # attach experiment metadata to the start document
+        md={
+            "subplan_name": CONST.PLAN.ROTATION_OUTER,
+            CONST.TRIGGER.ZOCALO: CONST.PLAN.ROTATION_MAIN,
+            "hyperion_parameters": params.json(),
+        }
+    )
+    def rotation_scan_core(
+        params: RotationScan,
+    ):
+        yield from _move_and_rotation(composite, params, oav_params)
+
+    yield from rotation_scan_core(params)
+
+
+def _sweeps(
+    composite: RotationScanComposite,
+    sweeps: Iterable[RotationScan],
+    oav_params: OAVParameters,
+) -> MsgGenerator:
+    for single_scan in sweeps:
+        yield from _rotation_sweep(composite, single_scan, oav_params)
+
+
+def _wedges_around_topup(
+    composite: RotationScanComposite,
+    params: RotationScan,
+    oav_params: OAVParameters,
+) -> MsgGenerator:
+    """Collects the rotation as contiguous wedges, each predicted from the live top-up
+    countdown just before it starts"""
+    start_img = 0
+    while start_img < params.num_images:
+        wedge = yield from _next_wedge_around_topup(
+            composite.synchrotron, params, start_img
+        )
+        LOGGER.info(f"Collecting wedge of {wedge.num_images} images from {start_img}")
+        yield from _rotation_sweep(composite, wedge, oav_params)
+        start_img += wedge.num_images
+
+
+def _multi_rotation_run(
+    composite: RotationScanComposite,
+    parameters: MultiRotationScan,
+    sweeps: MsgGenerator,
+    arm_eiger: bool = True,
+) -> MsgGenerator:
+    """Arms the Eiger once for all of the images in parameters then collects the
+    sweeps, each of which is a rotation scan run"""
     eiger: EigerDetector = composite.eiger
     eiger.set_detector_parameters(parameters.detector_params)
     LOGGER.info("setting up sample environment...")
@@ -394,31 +651,17 @@ def multi_rotation_scan(
             "subplan_name": CONST.PLAN.ROTATION_MULTI,
             "full_num_of_images": parameters.num_images,
             "meta_data_run_number": parameters.detector_params.run_number,
+            "write_combined_nexus": parameters.write_combined_nexus,
             "activate_callbacks": [
                 "RotationISPyBCallback",
                 "RotationNexusFileCallback",
             ],
         }
     )
-    @bpp.stage_decorator([eiger])
+    @_arm_eiger_decorator(eiger, arm_eiger)
     @bpp.finalize_decorator(lambda: _cleanup_plan(composite))
     def _multi_rotation_scan():
-        for single_scan in parameters.single_rotation_scans:
-
-            @bpp.set_run_key_decorator("rotation_scan")
-            @bpp.run_decorator(  # attach experiment metadata to the start document
-                md={
-                    "subplan_name": CONST.PLAN.ROTATION_OUTER,
-                    CONST.TRIGGER.ZOCALO: CONST.PLAN.ROTATION_MAIN,
-                    "hyperion_parameters": single_scan.json(),
-                }
-            )
-            def rotation_scan_core(
-                params: RotationScan,
-            ):
-                yield from _move_and_rotation(composite, params, oav_params)
-
-            yield from rotation_scan_core(single_scan)
+        yield from sweeps
 
-    LOGGER.info("setting up and staging eiger...")
+    LOGGER.info("setting up and arming eiger...")
     yield from _multi_rotation_scan()
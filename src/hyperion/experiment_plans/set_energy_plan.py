@@ -3,6 +3,7 @@
 * Set undulator energy to the requested amount
 * Adjust DCM and mirrors for the new energy
 * reenable feedback
+The plan does nothing if the beamline is already at the requested energy
 """
 
 import dataclasses
@@ -20,9 +21,16 @@ from hyperion.device_setup_plans import dcm_pitch_roll_mirror_adjuster
 from hyperion.device_setup_plans.xbpm_feedback import (
     transmission_and_xbpm_feedback_for_collection_wrapper,
 )
+from hyperion.log import LOGGER
 
 DESIRED_TRANSMISSION_FRACTION = 0.1
 
+# The energy is not changed if the DCM reads back within this of the demand, in keV,
+# and the undulator gap and DCM pitch and roll are already where it would move them
+ENERGY_TOLERANCE_KEV = 0.0005
+# How close the DCM pitch and roll must be to their lookup table values, in mrad
+PITCH_ROLL_TOLERANCE_MRAD = 0.001
+
 UNDULATOR_GROUP = "UNDULATOR_GROUP"
 
 
@@ -40,14 +48,19 @@ def _set_energy_plan(
     energy_kev,
     composite: SetEnergyComposite,
 ):
-    yield from bps.abs_set(composite.undulator_dcm, energy_kev, group=UNDULATOR_GROUP)
+    timeline = dcm_pitch_roll_mirror_adjuster.EnergyChangeTimeline()
+    yield from dcm_pitch_roll_mirror_adjuster.timed_set(
+        composite.undulator_dcm, energy_kev, UNDULATOR_GROUP, timeline
+    )
     yield from dcm_pitch_roll_mirror_adjuster.adjust_dcm_pitch_roll_vfm_from_lut(
         composite.undulator_dcm,
         composite.vfm,
         composite.vfm_mirror_voltages,
         energy_kev,
+        timeline,
     )
     yield from bps.wait(group=UNDULATOR_GROUP)
+    LOGGER.info(f"Energy changed to {energy_kev} keV, timeline: {timeline}")
 
 
 def read_energy(composite: SetEnergyComposite) -> Generator[Msg, Any, float]:
@@ -55,10 +68,54 @@ def read_energy(composite: SetEnergyComposite) -> Generator[Msg, Any, float]:
     return (yield from bps.rd(composite.dcm.energy_in_kev))  # type: ignore
 
 
+def _is_at_energy(
+    energy_kev, composite: SetEnergyComposite
+) -> Generator[Msg, Any, bool]:
+    """Whether the DCM energy, undulator gap and DCM pitch and roll are all already
+    where changing the energy to energy_kev would put them"""
+    current_energy_kev = yield from read_energy(composite)
+    if abs(current_energy_kev - energy_kev) > ENERGY_TOLERANCE_KEV:
+        return False
+
+    undulator = composite.undulator_dcm.undulator
+    gap_mm = yield from bps.rd(undulator.current_gap)
+    gap_tolerance_mm = yield from bps.rd(undulator.gap_discrepancy_tolerance_mm)
+    required_gap_mm = dcm_pitch_roll_mirror_adjuster.undulator_gap_for_energy_mm(
+        composite.undulator_dcm, energy_kev
+    )
+    if abs(gap_mm - required_gap_mm) > gap_tolerance_mm:  # type: ignore
+        LOGGER.info(f"Undulator gap {gap_mm} mm does not match {energy_kev} keV")
+        return False
+
+    dcm = composite.dcm
+    bragg_deg = yield from bps.rd(dcm.bragg_in_degrees.user_readback)
+    for motor, lookup_table_path in (
+        (
+            dcm.pitch_in_mrad,
+            composite.undulator_dcm.dcm_pitch_converter_lookup_table_path,
+        ),
+        (
+            dcm.roll_in_mrad,
+            composite.undulator_dcm.dcm_roll_converter_lookup_table_path,
+        ),
+    ):
+        required_mrad = dcm_pitch_roll_mirror_adjuster.cached_linear_interpolation_lut(
+            lookup_table_path
+        )(bragg_deg)
+        current_mrad = yield from bps.rd(motor.user_readback)
+        if abs(current_mrad - required_mrad) > PITCH_ROLL_TOLERANCE_MRAD:  # type: ignore
+            LOGGER.info(f"{motor.name} {current_mrad} does not match {energy_kev} keV")
+            return False
+    return True
+
+
 def set_energy_plan(
     energy_kev,
     composite: SetEnergyComposite,
 ):
+    if (yield from _is_at_energy(energy_kev, composite)):
+        LOGGER.info(f"Beamline already at {energy_kev} keV, not changing energy")
+        return
     yield from transmission_and_xbpm_feedback_for_collection_wrapper(
         _set_energy_plan(energy_kev, composite),
         composite.xbpm_feedback,
@@ -32,6 +32,16 @@ def create_robot_load_and_centre_callbacks() -> (
     )
 
 
+def create_load_centre_collect_callbacks() -> Tuple[
+    GridscanNexusFileCallback,
+    GridscanISPyBCallback,
+    RobotLoadISPyBCallback,
+    RotationNexusFileCallback,
+    RotationISPyBCallback,
+]:
+    return (*create_robot_load_and_centre_callbacks(), *create_rotation_callbacks())
+
+
 def create_gridscan_callbacks() -> (
     Tuple[GridscanNexusFileCallback, GridscanISPyBCallback]
 ):
@@ -42,3 +52,12 @@ def create_rotation_callbacks() -> (
     Tuple[RotationNexusFileCallback, RotationISPyBCallback]
 ):
     return (RotationNexusFileCallback(), RotationISPyBCallback(emit=ZocaloCallback()))
+
+
+def create_multi_crystal_rotation_callbacks() -> Tuple[
+    GridscanNexusFileCallback,
+    GridscanISPyBCallback,
+    RotationNexusFileCallback,
+    RotationISPyBCallback,
+]:
+    return (*create_gridscan_callbacks(), *create_rotation_callbacks())
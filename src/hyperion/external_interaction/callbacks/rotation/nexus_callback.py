@@ -9,7 +9,10 @@ from hyperion.external_interaction.nexus.nexus_utils import (
     create_beam_and_attenuator_parameters,
     vds_type_based_on_bit_depth,
 )
-from hyperion.external_interaction.nexus.write_nexus import NexusWriter
+from hyperion.external_interaction.nexus.write_nexus import (
+    CombinedSweepsNexusWriter,
+    NexusWriter,
+)
 from hyperion.log import NEXUS_LOGGER
 from hyperion.parameters.constants import CONST
 from hyperion.parameters.rotation import RotationScan
@@ -17,7 +20,7 @@ from hyperion.parameters.rotation import RotationScan
 from ..logging_callback import format_doc_for_log
 
 if TYPE_CHECKING:
-    from event_model.documents import Event, EventDescriptor, RunStart
+    from event_model.documents import Event, EventDescriptor, RunStart, RunStop
 
 
 class RotationNexusFileCallback(PlanReactiveCallback):
@@ -41,6 +44,11 @@ class RotationNexusFileCallback(PlanReactiveCallback):
         # used when multiple collections are made in one detector arming event:
         self.full_num_of_images: int | None = None
         self.meta_data_run_number: int | None = None
+        self.multi_run_uid: str | None = None
+        self.write_combined_nexus: bool = False
+        self.combined_writer: CombinedSweepsNexusWriter | None = None
+        self.parameters: RotationScan | None = None
+        self.nexus_file_created: bool = False
 
     def activity_gated_descriptor(self, doc: EventDescriptor):
         self.descriptors[doc["uid"]] = doc
@@ -53,29 +61,89 @@ class RotationNexusFileCallback(PlanReactiveCallback):
                 "has no corresponding descriptor record"
             )
             return doc
-        if event_descriptor.get("name") == CONST.DESCRIPTORS.HARDWARE_READ_DURING:
+        match event_descriptor.get("name"):
+            case CONST.DESCRIPTORS.HARDWARE_READ_PRE if (
+                self.parameters and self.parameters.create_nexus_before_collection
+            ):
+                NEXUS_LOGGER.info(
+                    f"Nexus handler received event from read hardware pre collection {format_doc_for_log(doc)}"
+                )
+                self._handle_pre_collection_read(doc)
+            case CONST.DESCRIPTORS.HARDWARE_READ_DURING:
+                NEXUS_LOGGER.info(
+                    f"Nexus handler received event from read hardware {format_doc_for_log(doc)}"
+                )
+                self._handle_during_collection_read(doc)
+        return doc
+
+    def _handle_pre_collection_read(self, doc: Event):
+        """Writes the nexus file before collection, using the demanded transmission as
+        a placeholder until the real one is read during the collection."""
+        data = doc["data"]
+        assert self.writer, "Nexus writer not initialised"
+        assert self.parameters, "Nexus callback did not receive parameters"
+        (
+            self.writer.beam,
+            self.writer.attenuator,
+        ) = create_beam_and_attenuator_parameters(
+            data["dcm-energy_in_kev"], None, self.parameters.transmission_frac
+        )
+        vds_data_type = vds_type_based_on_bit_depth(data["eiger_bit_depth"])
+        self.writer.create_nexus_file(vds_data_type)
+        self.nexus_file_created = True
+        NEXUS_LOGGER.info(
+            f"Nexus file created before collection at {self.writer.data_filename}"
+        )
+
+    def _handle_during_collection_read(self, doc: Event):
+        data = doc["data"]
+        assert self.writer, "Nexus writer not initialised"
+        (
+            self.writer.beam,
+            self.writer.attenuator,
+        ) = create_beam_and_attenuator_parameters(
+            data["dcm-energy_in_kev"],
+            data["flux_flux_reading"],
+            data["attenuator-actual_transmission"],
+        )
+        vds_data_type = vds_type_based_on_bit_depth(data["eiger_bit_depth"])
+        if self.nexus_file_created:
+            self.writer.update_beam_and_attenuator()
             NEXUS_LOGGER.info(
-                f"Nexus handler received event from read hardware {format_doc_for_log(doc)}"
-            )
-            data = doc["data"]
-            assert self.writer, "Nexus writer not initialised"
-            (
-                self.writer.beam,
-                self.writer.attenuator,
-            ) = create_beam_and_attenuator_parameters(
-                data["dcm-energy_in_kev"],
-                data["flux_flux_reading"],
-                data["attenuator-actual_transmission"],
+                f"Nexus file at {self.writer.data_filename} updated with beam and attenuator"
             )
-            vds_data_type = vds_type_based_on_bit_depth(doc["data"]["eiger_bit_depth"])
+        else:
             self.writer.create_nexus_file(vds_data_type)
+            self.nexus_file_created = True
             NEXUS_LOGGER.info(f"Nexus file created at {self.writer.data_filename}")
-        return doc
+        if self.write_combined_nexus:
+            self._update_combined_nexus_file(vds_data_type)
+
+    def _update_combined_nexus_file(self, vds_data_type):
+        assert self.parameters, "Nexus callback did not receive parameters"
+        assert self.writer, "Nexus writer not initialised"
+        if self.combined_writer is None:
+            assert self.full_num_of_images is not None
+            assert self.meta_data_run_number is not None
+            self.combined_writer = CombinedSweepsNexusWriter(
+                self.parameters, self.full_num_of_images, self.meta_data_run_number
+            )
+        self.combined_writer.add_sweep(self.parameters)
+        self.combined_writer.beam = self.writer.beam
+        self.combined_writer.attenuator = self.writer.attenuator
+        self.combined_writer.create_nexus_file(vds_data_type)
+        NEXUS_LOGGER.info(
+            f"Combined nexus file for {len(self.combined_writer.sweeps)} sweeps written "
+            f"at {self.combined_writer.nexus_file}"
+        )
 
     def activity_gated_start(self, doc: RunStart):
         if doc.get("subplan_name") == CONST.PLAN.ROTATION_MULTI:
             self.full_num_of_images = doc.get("full_num_of_images")
             self.meta_data_run_number = doc.get("meta_data_run_number")
+            self.multi_run_uid = doc.get("uid")
+            self.write_combined_nexus = doc.get("write_combined_nexus", False)
+            self.combined_writer = None
         if doc.get("subplan_name") == CONST.PLAN.ROTATION_OUTER:
             self.run_uid = doc.get("uid")
             json_params = doc.get("hyperion_parameters")
@@ -84,6 +152,8 @@ class RotationNexusFileCallback(PlanReactiveCallback):
             )
             parameters = RotationScan.from_json(json_params)
             NEXUS_LOGGER.info("Setting up nexus file...")
+            self.parameters = parameters
+            self.nexus_file_created = False
             det_size = (
                 parameters.detector_params.detector_size_constants.det_size_pixels
             )
@@ -100,3 +170,10 @@ class RotationNexusFileCallback(PlanReactiveCallback):
                 meta_data_run_number=self.meta_data_run_number,
                 rotation_direction=parameters.rotation_direction,
             )
+
+    def activity_gated_stop(self, doc: RunStop) -> RunStop | None:
+        if doc.get("run_start") == self.multi_run_uid:
+            self.multi_run_uid = None
+            self.write_combined_nexus = False
+            self.combined_writer = None
+        return doc
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import math
 from typing import TYPE_CHECKING, Dict, Optional
 
 from bluesky.callbacks import CallbackBase
@@ -18,6 +19,10 @@ class ZocaloCallback(CallbackBase):
     """Callback class to handle the triggering of Zocalo processing.
     Sends zocalo a run_start signal on receiving a start document for the specified
     sub-plan, and sends a run_end signal on receiving a stop document for the same plan.
+    If the plan emits events with the number of frames written during the collection
+    then the run_end signal for each grid but the last is sent as soon as all its
+    frames have been written instead, so that its processing can finish while later
+    grids collect.
 
     The metadata of the sub-plan this starts on must include a zocalo_environment.
 
@@ -30,6 +35,7 @@ class ZocaloCallback(CallbackBase):
         self.triggering_plan: Optional[str] = None
         self.zocalo_interactor: Optional[ZocaloTrigger] = None
         self.zocalo_info: list[ZocaloStartInfo] = []
+        self.runs_ended = 0
         self.descriptors: Dict[str, EventDescriptor] = {}
 
     def __init__(
@@ -44,7 +50,15 @@ class ZocaloCallback(CallbackBase):
             self.triggering_plan = triggering_plan
             assert isinstance(zocalo_environment := doc.get("zocalo_environment"), str)
             ISPYB_LOGGER.info(f"Zocalo environment set to {zocalo_environment}.")
-            self.zocalo_interactor = ZocaloTrigger(zocalo_environment)
+            if zocalo_environment.startswith(CONST.LOCAL_ZOCALO_ENV_PREFIX):
+                # Imported here to keep the stand-in, and scipy, out of production
+                from hyperion.external_interaction.local_zocalo import (
+                    LocalZocaloTrigger,
+                )
+
+                self.zocalo_interactor = LocalZocaloTrigger(zocalo_environment)
+            else:
+                self.zocalo_interactor = ZocaloTrigger(zocalo_environment)
 
         if self.triggering_plan and doc.get("subplan_name") == self.triggering_plan:
             self.run_uid = doc.get("uid")
@@ -79,14 +93,27 @@ class ZocaloCallback(CallbackBase):
                 start_info.filename = filename
                 assert self.zocalo_interactor is not None
                 self.zocalo_interactor.run_start(start_info)
+        elif event_descriptor.get("name") == CONST.DESCRIPTORS.GRIDSCAN_FRAMES_WRITTEN:
+            # The last grid is left until the stop document, once the detector has
+            # finished writing, as there is nothing left to collect after it anyway
+            (frames_written,) = doc["data"].values()
+            self._end_runs(frames_written, up_to=len(self.zocalo_info) - 1)
         return doc
 
+    def _end_runs(self, frames_written: float = math.inf, up_to: int | None = None):
+        """Sends run_end for each grid before up_to, in order, whose frames have all
+        been written and which hasn't been ended already"""
+        assert self.zocalo_interactor is not None
+        for info in self.zocalo_info[self.runs_ended : up_to]:
+            if info.start_frame_index + info.number_of_frames > frames_written:
+                break
+            self.zocalo_interactor.run_end(info.ispyb_dcid)
+            self.runs_ended += 1
+
     def stop(self, doc: RunStop):
         if doc.get("run_start") == self.run_uid:
             ISPYB_LOGGER.info(
                 f"Zocalo handler received stop document, for run {doc.get('run_start')}."
             )
-            assert self.zocalo_interactor is not None
-            for info in self.zocalo_info:
-                self.zocalo_interactor.run_end(info.ispyb_dcid)
+            self._end_runs()
             self._reset_state()
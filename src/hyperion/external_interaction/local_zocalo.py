@@ -0,0 +1,473 @@
+"""
+A local stand-in for zocalo x-ray centring, so that the full scan -> result -> move
+latency of a gridscan can be measured without a zocalo/RabbitMQ stack, e.g. on a laptop
+with synthetic data.
+
+Messages are exchanged through files in a spool directory, so the service can run in
+its own process, as the zocalo services do, with `hyperion-local-zocalo`, or in a thread
+of any other process with start_local_zocalo(). Use local_zocalo_environment() of the
+spool directory as the zocalo_environment of the gridscan parameters, with a
+LocalZocaloResults for it as the zocalo device of the composite. The zocalo callback
+will then write its run_start and run_end messages to the spool rather than send them
+to RabbitMQ. Once a grid's run has ended its frames are read through the VDS in the
+nexus master file Hyperion writes for it, spots are counted in each frame, and once
+every grid in the collection has ended results in the same shape as zocalo's are
+written back to the spool for the LocalZocaloResults to read.
+
+This module is deliberately not imported by Hyperion unless a local zocalo environment
+is used.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import dataclasses
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import h5py
+import numpy as np
+from bluesky.protocols import Descriptor, Triggerable
+from dodal.devices.zocalo import ZocaloStartInfo, ZocaloTrigger
+from dodal.devices.zocalo.zocalo_results import (
+    DEFAULT_SORT_KEY,
+    DEFAULT_TIMEOUT,
+    NoResultsFromZocalo,
+    NoZocaloSubscription,
+    SortKeys,
+    XrcResult,
+    bbox_size,
+)
+from numpy.typing import NDArray
+from ophyd_async.core import HintedSignal, StandardReadable, soft_signal_r_and_setter
+from ophyd_async.core.async_status import AsyncStatus
+from scipy import ndimage
+
+from hyperion.log import LOGGER
+from hyperion.parameters.constants import CONST
+
+DEFAULT_PIXEL_THRESHOLD = 3
+DEFAULT_MIN_SPOTS = 3
+# Voxels with less than this fraction of the highest voxel count are not counted as
+# part of a crystal
+DEFAULT_VOXEL_THRESHOLD = 0.25
+DEFAULT_FRAMES_PER_BATCH = 4
+POLL_PERIOD_S = 0.05
+
+# Spots are connected within an image but never between images
+_SPOT_STRUCTURE = np.zeros((3, 3, 3), dtype=bool)
+_SPOT_STRUCTURE[1] = ndimage.generate_binary_structure(2, 1)
+
+# The file writer id Hyperion sends to zocalo is the data filename, <prefix>_<run number>
+_DATA_FILENAME = re.compile(r"(?P<prefix>.+)_(?P<run_number>\d+)")
+
+
+def local_zocalo_environment(spool_directory: Path) -> str:
+    """The zocalo environment to use for a local zocalo service on a spool directory"""
+    return f"{CONST.LOCAL_ZOCALO_ENV_PREFIX}{Path(spool_directory).resolve()}"
+
+
+def _spool_directory(environment: str) -> Path:
+    if not environment.startswith(CONST.LOCAL_ZOCALO_ENV_PREFIX):
+        raise ValueError(f"{environment} is not a local zocalo environment")
+    return Path(environment.removeprefix(CONST.LOCAL_ZOCALO_ENV_PREFIX))
+
+
+def _requests_directory(spool_directory: Path) -> Path:
+    return spool_directory / "requests"
+
+
+def _results_directory(spool_directory: Path) -> Path:
+    return spool_directory / "results"
+
+
+def _write_message(directory: Path, message: dict):
+    directory.mkdir(parents=True, exist_ok=True)
+    # Named by time so that messages are read in the order they were written, and
+    # renamed once written so that they are never read half written
+    name = f"{time.time_ns():020d}_{os.getpid()}_{threading.get_ident()}"
+    partial_file = directory / f".{name}.partial"
+    partial_file.write_text(json.dumps(message))
+    partial_file.rename(directory / f"{name}.json")
+
+
+def _take_messages(directory: Path, limit: int | None = None) -> list[dict]:
+    """Reads and removes up to limit of the messages in a spool directory, oldest
+    first"""
+    messages = []
+    for message_file in sorted(directory.glob("*.json"))[:limit]:
+        messages.append(json.loads(message_file.read_text()))
+        message_file.unlink()
+    return messages
+
+
+def count_spots(images: np.ndarray, pixel_threshold: int) -> np.ndarray:
+    """Counts the spots in each of a stack of images, where a spot is a connected group
+    of pixels above the threshold. Pixels at the maximum value of the dtype, which the
+    Eiger uses for gaps and bad pixels, are ignored.
+
+    Args:
+        images (np.ndarray): The images, of shape (frames, height, width).
+        pixel_threshold (int): The count a pixel must be above to be part of a spot.
+
+    Returns:
+        The number of spots in each image
+    """
+    above_threshold = images > pixel_threshold
+    if np.issubdtype(images.dtype, np.integer):
+        above_threshold &= images < np.iinfo(images.dtype).max
+    labels, _ = ndimage.label(above_threshold, structure=_SPOT_STRUCTURE)
+    # Labels are numbered in the order they are found, so each image's spots are the
+    # labels between the highest of the images before it and its own highest
+    highest_label = np.maximum.accumulate(labels.reshape(len(images), -1).max(axis=1))
+    return np.diff(highest_label, prepend=0)
+
+
+def find_crystals(
+    spots_per_grid: list[np.ndarray], voxel_threshold: float
+) -> list[XrcResult]:
+    """Combines the spot counts of an xy grid and, optionally, an xz grid into a 3D map
+    and finds the crystals in it, in the shape of zocalo's x-ray centring results.
+    Positions are in grid boxes, with the centre of mass of a crystal in the first box
+    at 0.5."""
+    xy = spots_per_grid[0]
+    xz = spots_per_grid[1] if len(spots_per_grid) > 1 else np.ones((xy.shape[0], 1))
+    counts = xy[:, :, np.newaxis] * xz[:, np.newaxis, :]
+    if not counts.any():
+        return []
+    labels, num_crystals = ndimage.label(counts >= voxel_threshold * counts.max())
+    crystal_ids = range(1, num_crystals + 1)
+    centres_of_mass = ndimage.center_of_mass(counts, labels, crystal_ids)
+    max_voxels = ndimage.maximum_position(counts, labels, crystal_ids)
+    results: list[XrcResult] = []
+    for crystal_id, bbox, centre_of_mass, max_voxel in zip(
+        crystal_ids, ndimage.find_objects(labels), centres_of_mass, max_voxels
+    ):
+        crystal_counts = counts[labels == crystal_id]
+        results.append(
+            {
+                "centre_of_mass": [float(c) + 0.5 for c in centre_of_mass],
+                "max_voxel": [int(i) for i in max_voxel],
+                "max_count": int(crystal_counts.max()),
+                "n_voxels": len(crystal_counts),
+                "total_count": int(crystal_counts.sum()),
+                "bounding_box": [[s.start for s in bbox], [s.stop for s in bbox]],
+            }
+        )
+    return results
+
+
+def _grid_indices(positions: np.ndarray) -> tuple[np.ndarray, int]:
+    _, indices = np.unique(positions.round(6), return_inverse=True)
+    return indices, int(indices.max()) + 1
+
+
+@dataclass
+class _Run:
+    dcid: int
+    filename: str
+    message_index: int
+    number_of_frames: int
+    spots: Future | None = None
+
+
+@dataclass
+class LocalZocalo:
+    """The stand-in service. Runs are processed in the background, one at a time, in
+    the order they end.
+
+    Args:
+        spool_directory (Path): The directory messages are exchanged through.
+        data_directory (Path): The directory the detector and Hyperion write the data
+            and nexus files to.
+        pixel_threshold (int): The count a pixel must be above to be part of a spot.
+        min_spots (int): Frames with fewer spots than this count as having none.
+        voxel_threshold (float): The fraction of the highest count a voxel must have
+            to be part of a crystal.
+        frames_per_batch (int): How many frames to read and count spots in at once.
+    """
+
+    spool_directory: Path
+    data_directory: Path
+    pixel_threshold: int = DEFAULT_PIXEL_THRESHOLD
+    min_spots: int = DEFAULT_MIN_SPOTS
+    voxel_threshold: float = DEFAULT_VOXEL_THRESHOLD
+    frames_per_batch: int = DEFAULT_FRAMES_PER_BATCH
+    _runs: list[_Run] = field(default_factory=list, init=False)
+    _executor: ThreadPoolExecutor = field(
+        default_factory=lambda: ThreadPoolExecutor(max_workers=1), init=False
+    )
+    _stopping: threading.Event = field(default_factory=threading.Event, init=False)
+    _thread: threading.Thread | None = field(default=None, init=False)
+
+    @property
+    def environment(self) -> str:
+        return local_zocalo_environment(self.spool_directory)
+
+    def serve_forever(self):
+        """Handles the messages written to the spool until stop() is called"""
+        requests = _requests_directory(self.spool_directory)
+        while not self._stopping.wait(POLL_PERIOD_S):
+            for parameters in _take_messages(requests):
+                try:
+                    self.receive(parameters)
+                except Exception as e:
+                    LOGGER.error(f"Local zocalo failed to handle {parameters}: {e}")
+
+    def start(self):
+        """Handles the messages written to the spool in a background thread"""
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stopping.set()
+        if self._thread:
+            self._thread.join()
+        self._executor.shutdown()
+
+    def receive(self, parameters: dict):
+        """Handles a message that ZocaloTrigger would send to zocalo"""
+        if parameters["event"] == "start":
+            if parameters["message_index"] == 0:
+                self._runs = []
+            self._runs.append(
+                _Run(
+                    parameters["ispyb_dcid"],
+                    parameters["filename"],
+                    parameters["message_index"],
+                    parameters["number_of_frames"],
+                )
+            )
+        elif parameters["event"] == "end":
+            runs = self._runs
+            [run] = [run for run in runs if run.dcid == parameters["ispyb_dcid"]]
+            run.spots = self._executor.submit(self._spots_on_grid, run)
+            if all(run.spots for run in runs):
+                self._executor.submit(self._publish_results, runs)
+
+    def _master_file(self, run: _Run) -> Path:
+        if not (match := _DATA_FILENAME.fullmatch(run.filename)):
+            raise ValueError(
+                f"Can't find the run number of {run.filename}, expected a filename of "
+                "<prefix>_<run number>"
+            )
+        # Hyperion writes a master file per grid, with the run number after the
+        # detector's incremented for each grid
+        run_number = int(match["run_number"]) + run.message_index
+        return self.data_directory / f"{match['prefix']}_{run_number}_master.h5"
+
+    def _spots_on_grid(self, run: _Run) -> np.ndarray:
+        """Counts the spots in each frame of a run and returns them as a 2D array
+        indexed by the box of the grid, in x then y or z."""
+        with h5py.File(self._master_file(run), "r") as master:
+            data = master["entry/data/data"]
+            assert isinstance(data, h5py.Dataset)
+            assert len(data) == run.number_of_frames
+            spots = np.concatenate(
+                [
+                    count_spots(
+                        data[start : start + self.frames_per_batch],
+                        self.pixel_threshold,
+                    )
+                    for start in range(0, run.number_of_frames, self.frames_per_batch)
+                ]
+            )
+            transformations = master["entry/sample/transformations"]
+            assert isinstance(transformations, h5py.Group)
+            x, x_steps = _grid_indices(transformations["sam_x"][()])  # type: ignore
+            other_axis = "sam_y" if run.message_index == 0 else "sam_z"
+            other, other_steps = _grid_indices(transformations[other_axis][()])  # type: ignore
+        spots[spots < self.min_spots] = 0
+        grid = np.zeros((x_steps, other_steps), dtype=np.int64)
+        grid[x, other] = spots
+        LOGGER.info(f"Local zocalo found {spots.sum()} spots for dcid {run.dcid}")
+        return grid
+
+    def _publish_results(self, runs: list[_Run]):
+        try:
+            results = find_crystals(
+                [run.spots.result() for run in runs],  # type: ignore
+                self.voxel_threshold,
+            )
+        except Exception as e:
+            LOGGER.error(
+                f"Local zocalo failed to process dcids {[r.dcid for r in runs]}: {e}"
+            )
+            return
+        LOGGER.info(f"Local zocalo found {len(results)} crystals")
+        # The dcgid isn't sent in the start messages, so isn't known here
+        message = {"results": results, "ispyb_ids": {"dcid": runs[0].dcid, "dcgid": 0}}
+        _write_message(_results_directory(self.spool_directory), message)
+
+
+def start_local_zocalo(
+    spool_directory: Path, data_directory: Path, **kwargs
+) -> LocalZocalo:
+    """Starts a local zocalo service in a background thread of this process. Keyword
+    arguments are passed to LocalZocalo."""
+    service = LocalZocalo(Path(spool_directory), Path(data_directory), **kwargs)
+    service.start()
+    return service
+
+
+class LocalZocaloTrigger(ZocaloTrigger):
+    """A ZocaloTrigger which writes its messages to the spool of a local zocalo
+    environment rather than sending them to RabbitMQ"""
+
+    def __init__(self, environment: str):
+        super().__init__(environment)
+        self._requests = _requests_directory(_spool_directory(environment))
+
+    def run_start(self, start_data: ZocaloStartInfo):
+        LOGGER.info(f"Starting local Zocalo job {start_data}")
+        _write_message(
+            self._requests, dataclasses.asdict(start_data) | {"event": "start"}
+        )
+
+    def run_end(self, data_collection_id: int):
+        LOGGER.info(f"Ending local Zocalo job with ispyb id {data_collection_id}")
+        _write_message(
+            self._requests, {"event": "end", "ispyb_dcid": data_collection_id}
+        )
+
+
+class LocalZocaloResults(StandardReadable, Triggerable):
+    """A device with the same signals as ZocaloResults, so that it can stand in for
+    one, which reads its results from the spool of a local zocalo environment rather
+    than from RabbitMQ"""
+
+    def __init__(
+        self,
+        name: str = "zocalo",
+        zocalo_environment: str = "",
+        sort_key: str = DEFAULT_SORT_KEY.value,
+        timeout_s: float = DEFAULT_TIMEOUT,
+    ) -> None:
+        self.zocalo_environment = zocalo_environment
+        self.sort_key = SortKeys[sort_key]
+        self.timeout_s = timeout_s
+        self._results_directory = _results_directory(
+            _spool_directory(zocalo_environment)
+        )
+        self._staged = False
+
+        self.results, self._results_setter = soft_signal_r_and_setter(
+            list[XrcResult], name="results"
+        )
+        self.centres_of_mass, self._com_setter = soft_signal_r_and_setter(
+            NDArray[np.uint64], name="centres_of_mass"
+        )
+        self.bbox_sizes, self._bbox_setter = soft_signal_r_and_setter(
+            NDArray[np.uint64], name="bbox_sizes"
+        )
+        self.ispyb_dcid, self._ispyb_dcid_setter = soft_signal_r_and_setter(
+            int, name="ispyb_dcid"
+        )
+        self.ispyb_dcgid, self._ispyb_dcgid_setter = soft_signal_r_and_setter(
+            int, name="ispyb_dcgid"
+        )
+        self.add_readables(
+            [
+                self.results,
+                self.centres_of_mass,
+                self.bbox_sizes,
+                self.ispyb_dcid,
+                self.ispyb_dcgid,
+            ],
+            wrapper=HintedSignal,
+        )
+        super().__init__(name)
+
+    @AsyncStatus.wrap
+    async def stage(self):
+        """Clears any stale results from the spool"""
+        _take_messages(self._results_directory)
+        self._staged = True
+
+    @AsyncStatus.wrap
+    async def unstage(self):
+        self._staged = False
+
+    @AsyncStatus.wrap
+    async def trigger(self):
+        """Waits for the next results to be written to the spool"""
+        if not self._staged:
+            raise NoZocaloSubscription(
+                "This device must be staged before the collection to clear stale "
+                "results from the spool"
+            )
+        deadline = time.monotonic() + self.timeout_s
+        while not (messages := _take_messages(self._results_directory, limit=1)):
+            if time.monotonic() > deadline:
+                raise NoResultsFromZocalo("Timed out waiting for local Zocalo results")
+            await asyncio.sleep(POLL_PERIOD_S)
+        [message] = messages
+        results = sorted(
+            message["results"], key=lambda r: r[self.sort_key.value], reverse=True
+        )
+        LOGGER.info(f"Local Zocalo: found {len(results)} crystals.")
+        self._results_setter(results)
+        self._com_setter(np.array([r["centre_of_mass"] for r in results]))
+        self._bbox_setter(np.array([bbox_size(r) for r in results]))
+        self._ispyb_dcid_setter(message["ispyb_ids"]["dcid"])
+        self._ispyb_dcgid_setter(message["ispyb_ids"]["dcgid"])
+
+    async def describe(self) -> dict[str, Descriptor]:
+        # The soft signals can't describe a list of results themselves
+        source = f"zocalo_service:{self.zocalo_environment}"
+        array_type: Descriptor = {"source": source, "dtype": "array", "shape": [-1, 3]}
+        int_type: Descriptor = {"source": source, "dtype": "integer", "shape": [0]}
+        return OrderedDict(
+            [
+                (
+                    f"{self.name}-results",
+                    {"source": source, "dtype": "array", "shape": [-1]},
+                ),
+                (f"{self.name}-centres_of_mass", array_type),
+                (f"{self.name}-bbox_sizes", array_type),
+                (f"{self.name}-ispyb_dcid", int_type),
+                (f"{self.name}-ispyb_dcgid", int_type),
+            ]
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Run a local stand-in for zocalo x-ray centring"
+    )
+    parser.add_argument(
+        "spool_directory", help="The directory to exchange messages with Hyperion in"
+    )
+    parser.add_argument(
+        "data_directory", help="The directory the data and nexus files are written to"
+    )
+    parser.add_argument("--pixel-threshold", type=int, default=DEFAULT_PIXEL_THRESHOLD)
+    parser.add_argument("--min-spots", type=int, default=DEFAULT_MIN_SPOTS)
+    parser.add_argument(
+        "--voxel-threshold", type=float, default=DEFAULT_VOXEL_THRESHOLD
+    )
+    args = parser.parse_args()
+    service = LocalZocalo(
+        Path(args.spool_directory),
+        Path(args.data_directory),
+        pixel_threshold=args.pixel_threshold,
+        min_spots=args.min_spots,
+        voxel_threshold=args.voxel_threshold,
+    )
+    print(f"Serving local zocalo environment {service.environment}")
+    try:
+        service.serve_forever()
+    except KeyboardInterrupt:
+        service.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -135,7 +135,7 @@ def create_detector_parameters(detector_params: DetectorParams) -> Detector:
 
 
 def create_beam_and_attenuator_parameters(
-    energy_kev: float, flux: float, transmission_fraction: float
+    energy_kev: float, flux: float | None, transmission_fraction: float
 ) -> tuple[Beam, Attenuator]:
     """Create beam and attenuator objects that nexgen can understands
 
@@ -6,9 +6,13 @@ gridscan.
 from __future__ import annotations
 
 import math
+import os
+import shutil
 from pathlib import Path
 from typing import Optional
 
+import h5py
+import numpy as np
 from dodal.devices.zebra import RotationDirection
 from dodal.utils import get_beamline_name
 from nexgen.nxs_utils import Attenuator, Beam, Detector, Goniometer, Source
@@ -22,6 +26,7 @@ from hyperion.external_interaction.nexus.nexus_utils import (
     get_start_and_predicted_end_time,
 )
 from hyperion.parameters.components import DiffractionExperimentWithSample
+from hyperion.parameters.rotation import RotationScan
 
 
 class NexusWriter:
@@ -106,6 +111,35 @@ class NexusWriter:
                 vds_offset=self.start_index, vds_shape=vds_shape, vds_dtype=bit_depth
             )
 
+    def update_beam_and_attenuator(self):
+        """
+        Overwrites the beam and attenuator values in nexus files which have already
+        been written, e.g. when the files were created before the collection started
+        and these were not yet known. Each file is updated in a copy which then
+        replaces it, so that anything already reading the files keeps reading the
+        complete original.
+        """
+        assert self.beam is not None
+        assert self.attenuator is not None
+
+        for filename in [self.nexus_file, self.master_file]:
+            temporary_file = filename.with_suffix(f"{filename.suffix}.tmp")
+            shutil.copyfile(filename, temporary_file)
+            with h5py.File(temporary_file, "r+") as nxs:
+                beam = nxs.require_group("/entry/instrument/beam")
+                _overwrite_dataset(
+                    beam, "incident_wavelength", self.beam.wavelength, "angstrom"
+                )
+                if self.beam.flux:
+                    _overwrite_dataset(beam, "total_flux", self.beam.flux, "Hz")
+                if self.attenuator.transmission:
+                    _overwrite_dataset(
+                        nxs.require_group("/entry/instrument/attenuator"),
+                        "attenuator_transmission",
+                        self.attenuator.transmission,
+                    )
+            os.replace(temporary_file, filename)
+
     def get_image_datafiles(self, max_images_per_file=1000):
         return [
             self.directory / f"{self.data_filename}_{h5_num + 1:06}.h5"
@@ -113,3 +147,183 @@ class NexusWriter:
                 math.ceil(self.full_num_of_images / max_images_per_file)
             )
         ]
+
+
+class CombinedSweepsNexusWriter:
+    """Writes a single nexus file which presents every sweep of a multi-sweep rotation
+    collected in one detector arming as one VDS. The file is rewritten as each sweep
+    completes so that it always covers all of the sweeps completed so far.
+
+    Omega is written relative to the rotation direction of the first sweep, and chi
+    and phi are written per image, so the goniometer position of every frame is
+    correct even where sweeps differ in direction, chi or phi. The per-sweep
+    parameters are also written to /entry/sample/sweeps."""
+
+    def __init__(
+        self,
+        first_sweep: RotationScan,
+        full_num_of_images: int,
+        meta_data_run_number: int,
+    ) -> None:
+        self.beam: Optional[Beam] = None
+        self.attenuator: Optional[Attenuator] = None
+        self.sweeps: list[RotationScan] = []
+        self.full_num_of_images: int = full_num_of_images
+        self.rotation_direction: RotationDirection = first_sweep.rotation_direction
+        det_size = first_sweep.detector_params.detector_size_constants.det_size_pixels
+        self.image_shape: tuple[int, int] = (det_size.width, det_size.height)
+        self.exposure_time_s: float = first_sweep.exposure_time_s
+        self.detector: Detector = create_detector_parameters(
+            first_sweep.detector_params
+        )
+        self.source: Source = Source(get_beamline_name("S03"))
+        self.directory: Path = Path(first_sweep.storage_directory)
+        self.data_filename: str = f"{first_sweep.file_name}_{meta_data_run_number}"
+        self.nexus_file: Path = self.directory / f"{self.data_filename}_combined.nxs"
+
+    @property
+    def num_images(self) -> int:
+        return sum(sweep.num_images for sweep in self.sweeps)
+
+    def add_sweep(self, sweep: RotationScan):
+        self.sweeps.append(sweep)
+
+    def _scan_points(self) -> dict[str, np.ndarray]:
+        omega = []
+        chi = []
+        phi = []
+        for sweep in self.sweeps:
+            # A rotation about the reversed axis is the same as the opposite rotation
+            # about the reference axis
+            direction = (
+                sweep.rotation_direction.multiplier * self.rotation_direction.multiplier
+            )
+            omega.append(np.asarray(sweep.scan_points["omega"]) * direction)
+            chi.append(np.full(sweep.num_images, sweep.chi_start_deg or 0.0))
+            phi.append(np.full(sweep.num_images, sweep.phi_start_deg or 0.0))
+        return {
+            "omega": np.concatenate(omega),
+            "chi": np.concatenate(chi),
+            "phi": np.concatenate(phi),
+        }
+
+    def create_nexus_file(self, bit_depth: DTypeLike):
+        """
+        Writes the combined nexus file for the sweeps added so far. The file is
+        written to a temporary path and then moved into place, so that anything
+        watching for it never sees a partially written file.
+        """
+        assert self.sweeps, "No sweeps added to combined nexus writer"
+        assert self.beam is not None
+        assert self.attenuator is not None
+
+        start_time, est_end_time = get_start_and_predicted_end_time(
+            self.detector.exp_time * self.full_num_of_images
+        )
+        scan_points = self._scan_points()
+        goniometer = create_goniometer_axes(
+            scan_points["omega"][0],
+            scan_points,
+            chi=scan_points["chi"][0],
+            phi=scan_points["phi"][0],
+            rotation_direction=self.rotation_direction,
+        )
+        temporary_file = self.nexus_file.with_suffix(".nxs.tmp")
+        nxmx_writer = NXmxFileWriter(
+            temporary_file,
+            goniometer,
+            self.detector,
+            self.source,
+            self.beam,
+            self.attenuator,
+            self.full_num_of_images,
+        )
+        nxmx_writer.write(
+            image_filename=self.data_filename,
+            start_time=start_time,
+            est_end_time=est_end_time,
+            write_mode="w",
+        )
+        nxmx_writer.write_vds(
+            vds_offset=0,
+            vds_shape=(self.num_images, *self.image_shape),
+            vds_dtype=bit_depth,
+        )
+        with h5py.File(temporary_file, "r+") as nxs:
+            self._correct_scan_ends(nxs, scan_points)
+            self._write_sweeps(nxs)
+        os.replace(temporary_file, self.nexus_file)
+
+    def _correct_scan_ends(self, nxs: h5py.File, scan_points: dict[str, np.ndarray]):
+        # nexgen assumes each axis moves by a single increment per image, which isn't
+        # true across sweeps, so set the ends from each sweep's own increment
+        increments = np.concatenate(
+            [
+                np.full(
+                    sweep.num_images,
+                    sweep.rotation_increment_deg
+                    * sweep.rotation_direction.multiplier
+                    * self.rotation_direction.multiplier,
+                )
+                for sweep in self.sweeps
+            ]
+        )
+        sample = nxs["/entry/sample"]
+        assert isinstance(sample, h5py.Group)
+        _overwrite_dataset(
+            sample.require_group("sample_omega"),
+            "omega_end",
+            scan_points["omega"] + increments,
+        )
+        for axis in ["chi", "phi"]:
+            group = sample.require_group(f"sample_{axis}")
+            _overwrite_dataset(group, f"{axis}_end", scan_points[axis])
+            _overwrite_dataset(group, f"{axis}_increment_set", 0.0)
+
+    def _write_sweeps(self, nxs: h5py.File):
+        def _mm_or_nan(um: float | None):
+            return um / 1000 if um is not None else np.nan
+
+        sweeps = nxs.require_group("/entry/sample/sweeps")
+        sweeps.attrs["NX_class"] = np.bytes_("NXcollection")
+        start_indices = np.cumsum([0] + [sweep.num_images for sweep in self.sweeps])
+        columns = {
+            "start_index": start_indices[:-1],
+            "num_images": [sweep.num_images for sweep in self.sweeps],
+            "omega_start": [sweep.omega_start_deg for sweep in self.sweeps],
+            "rotation_direction": [
+                sweep.rotation_direction.multiplier for sweep in self.sweeps
+            ],
+            "omega_increment": [sweep.rotation_increment_deg for sweep in self.sweeps],
+            "chi": [sweep.chi_start_deg or 0.0 for sweep in self.sweeps],
+            "phi": [sweep.phi_start_deg or 0.0 for sweep in self.sweeps],
+            "sam_x": [_mm_or_nan(sweep.x_start_um) for sweep in self.sweeps],
+            "sam_y": [_mm_or_nan(sweep.y_start_um) for sweep in self.sweeps],
+            "sam_z": [_mm_or_nan(sweep.z_start_um) for sweep in self.sweeps],
+        }
+        units = {
+            "omega_start": "deg",
+            "omega_increment": "deg",
+            "chi": "deg",
+            "phi": "deg",
+            "sam_x": "mm",
+            "sam_y": "mm",
+            "sam_z": "mm",
+        }
+        for name, values in columns.items():
+            _overwrite_dataset(sweeps, name, np.asarray(values), units.get(name))
+
+
+def _overwrite_dataset(
+    group: h5py.Group, name: str, value: float | np.ndarray, units: str | None = None
+):
+    # Write in place where possible so that any hard links to the dataset are kept
+    dataset = group.get(name)
+    if isinstance(dataset, h5py.Dataset) and dataset.shape == np.shape(value):
+        dataset[()] = value
+    else:
+        if name in group:
+            del group[name]
+        dataset = group.create_dataset(name, data=value)
+    if units:
+        dataset.attrs["units"] = np.bytes_(units)
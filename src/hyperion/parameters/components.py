@@ -143,6 +143,9 @@ class HyperionParameters(BaseModel):
 class WithSnapshot(BaseModel):
     snapshot_directory: Path
     snapshot_omegas_deg: list[float] | None
+    # Take the snapshots as omega passes each angle on its way to the start of the
+    # collection, rather than stopping at each of them
+    snapshots_on_the_fly: bool = Field(default=False)
 
     @property
     def take_snapshots(self) -> bool:
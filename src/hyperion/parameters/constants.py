@@ -41,6 +41,8 @@ class PlanGroupCheckpointConstants:
     # Gridscan
     GRID_READY_FOR_DC = "ready_for_data_collection"
     MOVE_GONIO_TO_START = "move_gonio_to_start"
+    # Rotation
+    ROTATION_READY_FOR_DC = "rotation_ready_for_data_collection"
 
 
 @dataclass(frozen=True)
@@ -53,11 +55,12 @@ class DocDescriptorNames:
     HARDWARE_READ_PRE = "read_hardware_for_callbacks_pre_collection"
     HARDWARE_READ_DURING = "read_hardware_for_callbacks_during_collection"
     ZOCALO_HW_READ = "zocalo_read_hardware_plan"
+    GRIDSCAN_FRAMES_WRITTEN = "gridscan_frames_written"
 
 
 @dataclass(frozen=True)
 class HardwareConstants:
-    OAV_REFRESH_DELAY = 0.3
+    OAV_NEW_FRAME_TIMEOUT = 1.0
     PANDA_FGS_RUN_UP_DEFAULT = 0.17
     CRYOJET_MARGIN_MM = 0.2
 
@@ -77,6 +80,12 @@ class GridscanParamConstants:
     OMEGA_2 = 90.0
 
 
+@dataclass(frozen=True)
+class MultiCrystalParamConstants:
+    MAX_CRYSTALS = 3
+    MAX_BBOX_OVERLAP = 0.5
+
+
 @dataclass(frozen=True)
 class DetectorParamConstants:
     BEAM_XY_LUT_PATH = (
@@ -90,6 +99,7 @@ class DetectorParamConstants:
 class ExperimentParamConstants:
     DETECTOR = DetectorParamConstants()
     GRIDSCAN = GridscanParamConstants()
+    MULTI_CRYSTAL = MultiCrystalParamConstants()
 
 
 _test_oav_file = "tests/test_data/test_OAVCentring.json"
@@ -128,6 +138,8 @@ class HyperionConstants:
     GRAYLOG_PORT = 12232
     PARAMETER_SCHEMA_DIRECTORY = "src/hyperion/parameters/schemas/"
     ZOCALO_ENV = "dev_artemis" if TEST_MODE else "artemis"
+    # Followed by the spool directory of a local zocalo stand-in, see local_zocalo.py
+    LOCAL_ZOCALO_ENV_PREFIX = "local:"
 
 
 CONST = HyperionConstants()
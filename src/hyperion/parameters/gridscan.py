@@ -47,6 +47,12 @@ class GridCommon(
     selected_aperture: AperturePositionGDANames | None = Field(
         default=AperturePositionGDANames.SMALL_APERTURE
     )
+    # Detect the grid from pin edges captured during a single omega sweep
+    continuous_grid_detection: bool = Field(default=False)
+    # Don't wait for the XBPM feedback if it confirmed the beam stable at the same
+    # energy this recently, in s, and has settled since last being unpaused. 0 to
+    # always wait
+    xbpm_stable_window_s: float = Field(default=0, ge=0)
 
     @property
     def ispyb_params(self):
@@ -1,7 +1,8 @@
 from __future__ import annotations
 
+import math
 import os
-from collections.abc import Iterator
+from collections.abc import Iterator, Sequence
 from itertools import accumulate
 from typing import Annotated
 
@@ -21,6 +22,7 @@ from scanspec.specs import Line
 from hyperion.external_interaction.ispyb.ispyb_dataclass import RotationIspybParams
 from hyperion.parameters.components import (
     DiffractionExperimentWithSample,
+    HyperionParameters,
     IspybExperimentType,
     OptionalGonioAngleStarts,
     OptionalXyzStarts,
@@ -30,6 +32,13 @@ from hyperion.parameters.components import (
     WithScan,
 )
 from hyperion.parameters.constants import CONST, I03Constants
+from hyperion.parameters.gridscan import RobotLoadThenCentre, ThreeDGridScan
+
+
+def _num_images(scan_width_deg: float, rotation_increment_deg: float) -> int:
+    # Rounded first so that float error in the width doesn't lose an image, as e.g.
+    # 29 * 0.1 / 0.1 == 28.999999999999996
+    return math.floor(round(scan_width_deg / rotation_increment_deg, 6))
 
 
 class RotationScanPerSweep(OptionalGonioAngleStarts, OptionalXyzStarts):
@@ -40,6 +49,20 @@ class RotationScanPerSweep(OptionalGonioAngleStarts, OptionalXyzStarts):
     nexus_vds_start_img: int = Field(default=0, ge=0)
     ispyb_extras: TemporaryIspybExtras | None
 
+    def in_opposite_direction(self) -> RotationScanPerSweep:
+        """The same sweep over the same range of omega, rotating the other way"""
+        return self.copy(
+            update={
+                "omega_start_deg": self.omega_start_deg
+                + self.scan_width_deg * self.rotation_direction.multiplier,
+                "rotation_direction": (
+                    RotationDirection.POSITIVE
+                    if self.rotation_direction == RotationDirection.NEGATIVE
+                    else RotationDirection.NEGATIVE
+                ),
+            }
+        )
+
 
 class RotationExperiment(DiffractionExperimentWithSample):
     shutter_opening_time_s: float = Field(default=CONST.I03.SHUTTER_TIME_S)
@@ -47,6 +70,10 @@ class RotationExperiment(DiffractionExperimentWithSample):
     ispyb_experiment_type: IspybExperimentType = Field(
         default=IspybExperimentType.ROTATION
     )
+    # Write the nexus file from the pre-collection hardware read, so that downstream
+    # processing can start as soon as frames land. Beam and attenuator are updated
+    # once they have been read during the collection.
+    create_nexus_before_collection: bool = Field(default=False)
 
     def _detector_params(self, omega_start_deg: float):
         self.det_dist_to_beam_converter_path = (
@@ -79,6 +106,10 @@ class RotationExperiment(DiffractionExperimentWithSample):
 
 
 class RotationScan(WithScan, RotationScanPerSweep, RotationExperiment):
+    # If the scan would run into a top-up, collect it as contiguous wedges around the
+    # predicted top-ups rather than waiting for the top-up before starting
+    split_around_topup: bool = Field(default=False)
+
     @property
     def ispyb_params(self):  # pyright: ignore
         return RotationIspybParams(
@@ -113,16 +144,74 @@ class RotationScan(WithScan, RotationScanPerSweep, RotationExperiment):
 
     @property
     def num_images(self) -> int:
-        return int(self.scan_width_deg / self.rotation_increment_deg)
+        return _num_images(self.scan_width_deg, self.rotation_increment_deg)
+
+    def wedge(self, start_img: int, num_images: int) -> RotationScan:
+        """The contiguous part of this scan with num_images from start_img, to be
+        collected as one sweep of a multi rotation scan"""
+        return self.copy(
+            update={
+                "omega_start_deg": self.omega_start_deg
+                + start_img
+                * self.rotation_increment_deg
+                * self.rotation_direction.multiplier,
+                "scan_width_deg": num_images * self.rotation_increment_deg,
+                "nexus_vds_start_img": start_img,
+                "split_around_topup": False,
+            }
+        )
+
+    def as_wedges(self, wedge_num_images: Sequence[int]) -> MultiRotationScan:
+        """Splits this scan into contiguous sweeps with the given numbers of images,
+        which are collected as a multi rotation scan with a combined nexus file. Any
+        images left over are added to the last sweep."""
+        wedge_num_images = list(wedge_num_images)
+        wedge_num_images[-1] = self.num_images - sum(wedge_num_images[:-1])
+        sweep_fields = set(RotationScanPerSweep.__fields__)
+        sweeps = []
+        start_img = 0
+        for num_images in wedge_num_images:
+            wedge = self.wedge(start_img, num_images)
+            sweeps.append(RotationScanPerSweep(**wedge.dict(include=sweep_fields)))
+            start_img += num_images
+        return MultiRotationScan(
+            **self.dict(exclude=sweep_fields | {"split_around_topup"}),
+            rotation_scans=sweeps,
+            write_combined_nexus=True,
+        )
+
+    def at_positions(
+        self, positions_um: Sequence[tuple[float, float, float]]
+    ) -> MultiRotationScan:
+        """Repeats this scan at each of the given x, y, z positions, which are collected
+        as a multi rotation scan."""
+        sweep_fields = set(RotationScanPerSweep.__fields__)
+        sweep = self.dict(include=sweep_fields)
+        return MultiRotationScan(
+            **self.dict(exclude=sweep_fields | {"split_around_topup"}),
+            rotation_scans=[
+                RotationScanPerSweep(
+                    **sweep | {"x_start_um": x, "y_start_um": y, "z_start_um": z}
+                )
+                for x, y, z in positions_um
+            ],
+        )
 
 
 class MultiRotationScan(RotationExperiment, SplitScan):
     rotation_scans: Annotated[list[RotationScanPerSweep], Len(min_length=1)]
+    # Also write one nexus file presenting all the sweeps as a single dataset
+    write_combined_nexus: bool = Field(default=False)
+    # Reorder the sweeps and flip their directions so that each starts as close as
+    # possible to where the one before ends, rather than rewinding omega every sweep
+    minimise_omega_travel: bool = Field(default=False)
 
     def _single_rotation_scan(self, scan: RotationScanPerSweep) -> RotationScan:
         # self has everything from RotationExperiment
         params = self.dict()
         del params["rotation_scans"]
+        del params["write_combined_nexus"]
+        del params["minimise_omega_travel"]
         # provided `scan` has everything from RotationScanPerSweep
         params.update(scan.dict())
         # together they have everything for RotationScan
@@ -133,9 +222,20 @@ class MultiRotationScan(RotationExperiment, SplitScan):
         start_img = 0
         for scan in values["rotation_scans"]:
             scan.nexus_vds_start_img = start_img
-            start_img += scan.scan_width_deg / values["rotation_increment_deg"]
+            start_img += _num_images(
+                scan.scan_width_deg, values["rotation_increment_deg"]
+            )
         return values
 
+    def with_rotation_scans(
+        self, rotation_scans: Sequence[RotationScanPerSweep]
+    ) -> MultiRotationScan:
+        """The same experiment with the given sweeps instead"""
+        return MultiRotationScan(
+            **self.dict(exclude={"rotation_scans"}),
+            rotation_scans=[scan.copy() for scan in rotation_scans],
+        )
+
     @property
     def single_rotation_scans(self) -> Iterator[RotationScan]:
         for scan in self.rotation_scans:
@@ -143,7 +243,7 @@ class MultiRotationScan(RotationExperiment, SplitScan):
 
     def _num_images_per_scan(self):
         return [
-            int(scan.scan_width_deg / self.rotation_increment_deg)
+            _num_images(scan.scan_width_deg, self.rotation_increment_deg)
             for scan in self.rotation_scans
         ]
 
@@ -162,3 +262,30 @@ class MultiRotationScan(RotationExperiment, SplitScan):
     @property
     def ispyb_params(self):  # pyright: ignore
         raise ValueError("Please get ispyb params from one of the individual scans")
+
+
+class MultiCrystalRotation(HyperionParameters):
+    """A gridscan followed by the same rotation on each of the strongest crystals it
+    finds, with the rotations collected in one detector arming and ISPyB group."""
+
+    grid_scan: ThreeDGridScan
+    # The x, y and z starts of this are replaced with the position of each crystal
+    rotation_scan: RotationScan
+    max_crystals: int = Field(default=CONST.PARAM.MULTI_CRYSTAL.MAX_CRYSTALS, ge=1)
+    # A crystal whose bounding box overlaps a stronger crystal's by more than this
+    # fraction of the smaller box is taken to be the same crystal
+    max_bbox_overlap: float = Field(
+        default=CONST.PARAM.MULTI_CRYSTAL.MAX_BBOX_OVERLAP, ge=0, le=1
+    )
+    # Only collect on as many crystals as are predicted to finish within this time of
+    # the start of the plan. The strongest crystal is always collected.
+    time_budget_s: float | None = Field(default=None, gt=0)
+
+
+class LoadCentreCollect(HyperionParameters):
+    """Robot load, centre and then collect a rotation on a sample in one plan, without
+    returning to GDA in between."""
+
+    robot_load_then_centre: RobotLoadThenCentre
+    # The x, y and z starts of this are replaced with the centre found
+    rotation_scan: RotationScan
@@ -0,0 +1,268 @@
+"""
+Benchmarks for nexus file writing, for long rotations and dense gridscans. Uses the
+same fake parameters as the test nexus generation in hyperion.utils.validation and
+times the NexusWriter directly, so the results only include nexus writing.
+
+Run with e.g.:
+    hyperion-benchmark-nexus --output nexus_benchmark.json
+and compare the output between releases. The test parameters are found relative to
+this module, so this must be run from a source checkout of Hyperion, but can be run
+from any directory.
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from importlib.metadata import PackageNotFoundError, version
+from pathlib import Path
+from typing import Callable, Sequence
+
+from hyperion.external_interaction.nexus.nexus_utils import (
+    create_beam_and_attenuator_parameters,
+    vds_type_based_on_bit_depth,
+)
+from hyperion.external_interaction.nexus.write_nexus import NexusWriter
+from hyperion.parameters.gridscan import ThreeDGridScan
+from hyperion.utils.validation import test_params
+
+REPO_ROOT = Path(__file__).parents[3]
+GRIDSCAN_PARAMS_FILE = (
+    REPO_ROOT / "tests/test_data/parameter_json_files/good_test_parameters.json"
+)
+ROTATION_PARAMS_FILE = (
+    REPO_ROOT
+    / "tests/test_data/parameter_json_files/good_test_rotation_scan_parameters.json"
+)
+
+# nexgen scales worse than linearly with the number of rotation images, so larger
+# sizes can be passed on the command line when needed
+DEFAULT_ROTATION_IMAGE_COUNTS = (360, 3600, 7200, 14400)
+# (x_steps, y_steps, z_steps)
+DEFAULT_GRID_SIZES = ((20, 10, 10), (40, 20, 20), (80, 40, 40))
+DEFAULT_BIT_DEPTHS = (8, 16, 32)
+
+BENCHMARK_ENERGY_KEV = 12.7
+BENCHMARK_FLUX = 1e12
+BENCHMARK_TRANSMISSION = 0.1
+
+
+@dataclass
+class NexusBenchmarkResult:
+    scan_type: str
+    num_images: int
+    bit_depth: int
+    writer_setup_s: float
+    create_nexus_file_s: float
+    peak_memory_mb: float
+    file_size_bytes: int
+
+
+def _package_version(package: str) -> str | None:
+    try:
+        return version(package)
+    except PackageNotFoundError:
+        return None
+
+
+def _from_repo_root(path: str) -> str:
+    # Paths in the test parameters are relative to the root of the repository
+    return str(REPO_ROOT / path)
+
+
+def _grid_size(size: str) -> tuple[int, int, int]:
+    try:
+        x_steps, y_steps, z_steps = (int(n) for n in size.split(","))
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(
+            f"Grid size {size} should be x_steps,y_steps,z_steps"
+        ) from e
+    return x_steps, y_steps, z_steps
+
+
+def _measure(writers: Callable[[], Sequence[NexusWriter]], bit_depth: int):
+    """Times creating the writers and then writing their files, recording the peak
+    Python memory allocated by both."""
+    tracemalloc.start()
+    try:
+        start = time.perf_counter()
+        nexus_writers = writers()
+        setup_done = time.perf_counter()
+        for writer in nexus_writers:
+            writer.beam, writer.attenuator = create_beam_and_attenuator_parameters(
+                BENCHMARK_ENERGY_KEV, BENCHMARK_FLUX, BENCHMARK_TRANSMISSION
+            )
+            writer.create_nexus_file(vds_type_based_on_bit_depth(bit_depth))
+        write_done = time.perf_counter()
+        _, peak_memory = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    file_size = sum(
+        os.path.getsize(file)
+        for writer in nexus_writers
+        for file in [writer.nexus_file, writer.master_file]
+    )
+    return setup_done - start, write_done - setup_done, peak_memory, file_size
+
+
+def benchmark_rotation_nexus(
+    num_images: int, bit_depth: int, directory: Path
+) -> NexusBenchmarkResult:
+    params = test_params(
+        f"rotation_benchmark_{num_images}_{bit_depth}", directory, ROTATION_PARAMS_FILE
+    )
+    params.det_dist_to_beam_converter_path = _from_repo_root(
+        params.det_dist_to_beam_converter_path
+    )
+    params.scan_width_deg = num_images * params.rotation_increment_deg
+    det_size = params.detector_params.detector_size_constants.det_size_pixels
+
+    def writers():
+        return [
+            NexusWriter(
+                params,
+                (params.num_images, det_size.width, det_size.height),
+                params.scan_points,
+                omega_start_deg=params.omega_start_deg,
+                chi_start_deg=params.chi_start_deg or 0,
+                phi_start_deg=params.phi_start_deg or 0,
+                rotation_direction=params.rotation_direction,
+            )
+        ]
+
+    setup_s, write_s, peak_memory, file_size = _measure(writers, bit_depth)
+    return NexusBenchmarkResult(
+        scan_type="rotation",
+        num_images=params.num_images,
+        bit_depth=bit_depth,
+        writer_setup_s=setup_s,
+        create_nexus_file_s=write_s,
+        peak_memory_mb=peak_memory / 1e6,
+        file_size_bytes=file_size,
+    )
+
+
+def benchmark_gridscan_nexus(
+    grid_size: tuple[int, int, int], bit_depth: int, directory: Path
+) -> NexusBenchmarkResult:
+    with open(GRIDSCAN_PARAMS_FILE) as f:
+        raw_params = json.load(f)
+    x_steps, y_steps, z_steps = grid_size
+    raw_params |= {
+        "det_dist_to_beam_converter_path": _from_repo_root(
+            raw_params["det_dist_to_beam_converter_path"]
+        ),
+        "x_steps": x_steps,
+        "y_steps": y_steps,
+        "z_steps": z_steps,
+        "storage_directory": str(directory),
+        "file_name": f"grid_benchmark_{x_steps}_{y_steps}_{z_steps}_{bit_depth}",
+    }
+    params = ThreeDGridScan(**raw_params)
+    det_size = params.detector_params.detector_size_constants.det_size_pixels
+
+    def writers():
+        # The same two writers as the gridscan nexus callback
+        grid_n_img_1 = params.scan_indices[1]
+        return [
+            NexusWriter(
+                params,
+                (grid_n_img_1, det_size.width, det_size.height),
+                params.scan_points_first_grid,
+            ),
+            NexusWriter(
+                params,
+                (params.num_images - grid_n_img_1, det_size.width, det_size.height),
+                params.scan_points_second_grid,
+                run_number=params.detector_params.run_number + 1,
+                vds_start_index=grid_n_img_1,
+                omega_start_deg=90,
+            ),
+        ]
+
+    setup_s, write_s, peak_memory, file_size = _measure(writers, bit_depth)
+    return NexusBenchmarkResult(
+        scan_type="gridscan",
+        num_images=params.num_images,
+        bit_depth=bit_depth,
+        writer_setup_s=setup_s,
+        create_nexus_file_s=write_s,
+        peak_memory_mb=peak_memory / 1e6,
+        file_size_bytes=file_size,
+    )
+
+
+def run_nexus_benchmarks(
+    output_file: Path,
+    rotation_image_counts: Sequence[int] = DEFAULT_ROTATION_IMAGE_COUNTS,
+    grid_sizes: Sequence[tuple[int, int, int]] = DEFAULT_GRID_SIZES,
+    bit_depths: Sequence[int] = DEFAULT_BIT_DEPTHS,
+) -> list[NexusBenchmarkResult]:
+    """Runs the benchmarks for every combination of the given scan sizes and bit
+    depths, and saves the results as JSON in output_file."""
+    results: list[NexusBenchmarkResult] = []
+    with tempfile.TemporaryDirectory() as directory:
+        for bit_depth in bit_depths:
+            for num_images in rotation_image_counts:
+                results.append(
+                    benchmark_rotation_nexus(num_images, bit_depth, Path(directory))
+                )
+            for grid_size in grid_sizes:
+                results.append(
+                    benchmark_gridscan_nexus(grid_size, bit_depth, Path(directory))
+                )
+    with open(output_file, "w") as f:
+        json.dump(
+            {
+                "timestamp": datetime.now().isoformat(),
+                "hyperion_version": _package_version("hyperion"),
+                "nexgen_version": _package_version("nexgen"),
+                "results": [asdict(result) for result in results],
+            },
+            f,
+            indent=4,
+        )
+    return results
+
+
+def benchmark_nexus_writing():
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--output",
+        default="nexus_benchmark.json",
+        help="File to save the benchmark results to, as JSON",
+    )
+    parser.add_argument(
+        "--rotation-images",
+        type=int,
+        nargs="*",
+        default=DEFAULT_ROTATION_IMAGE_COUNTS,
+        help="Numbers of images in the rotation scans to benchmark",
+    )
+    parser.add_argument(
+        "--grid-sizes",
+        type=_grid_size,
+        nargs="*",
+        default=DEFAULT_GRID_SIZES,
+        help="Gridscan sizes to benchmark, each as x_steps,y_steps,z_steps",
+    )
+    parser.add_argument(
+        "--bit-depths",
+        type=int,
+        nargs="*",
+        default=DEFAULT_BIT_DEPTHS,
+        help="Detector bit depths to benchmark",
+    )
+    args = parser.parse_args()
+    for result in run_nexus_benchmarks(
+        Path(args.output), args.rotation_images, args.grid_sizes, args.bit_depths
+    ):
+        print(result)
+
+
+if __name__ == "__main__":
+    benchmark_nexus_writing()
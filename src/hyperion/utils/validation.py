@@ -29,16 +29,16 @@ FAKE_DATAFILE = "../fake_data.h5"
 FILENAME_STUB = "test_rotation_nexus"
 
 
-def test_params(filename_stub, dir):
+def test_params(
+    filename_stub,
+    dir,
+    params_file="tests/test_data/parameter_json_files/good_test_rotation_scan_parameters.json",
+):
     def get_params(filename):
         with open(filename) as f:
             return json.loads(f.read())
 
-    params = RotationScan(
-        **get_params(
-            "tests/test_data/parameter_json_files/good_test_rotation_scan_parameters.json"
-        )
-    )
+    params = RotationScan(**get_params(params_file))
     params.file_name = filename_stub
     params.scan_width_deg = 360
     params.demand_energy_ev = 12700
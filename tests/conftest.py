@@ -434,6 +434,9 @@ def undulator_dcm(RE, dcm):
     undulator_dcm.dcm_pitch_converter_lookup_table_path = (
         "tests/test_data/test_beamline_dcm_pitch_converter.txt"
     )
+    undulator_dcm.id_gap_lookup_table_path = (
+        "tests/test_data/test_beamline_undulator_to_gap.txt"
+    )
     yield undulator_dcm
     beamline_utils.clear_devices()
 
@@ -0,0 +1,69 @@
+from time import time
+from unittest.mock import MagicMock, patch
+
+import bluesky.plan_stubs as bps
+from bluesky.run_engine import RunEngine
+from dodal.devices.synchrotron import Synchrotron, SynchrotronMode
+from ophyd_async.core import set_mock_value
+
+from hyperion.device_setup_plans.check_topup import (
+    finish_topup_wait,
+    start_topup_wait,
+)
+
+
+def test_given_collection_would_overlap_topup_then_setup_done_during_wait(
+    RE: RunEngine, synchrotron: Synchrotron
+):
+    set_mock_value(synchrotron.top_up_start_countdown, 5)
+    set_mock_value(synchrotron.top_up_end_countdown, 0.5)
+
+    def plan():
+        topup_wait = yield from start_topup_wait(synchrotron, 10, 1)
+        yield from bps.sleep(0.3)
+        yield from finish_topup_wait(synchrotron, topup_wait)
+        return topup_wait
+
+    start = time()
+    topup_wait = RE(plan()).plan_result  # type: ignore
+
+    assert topup_wait.wait_s == 0.5
+    assert 0.5 <= time() - start < 0.75
+
+
+@patch("hyperion.device_setup_plans.check_topup.check_topup_and_wait_if_necessary")
+def test_given_collection_before_topup_then_no_wait_started_and_gate_checked_again(
+    check_topup_and_wait: MagicMock, RE: RunEngine, synchrotron: Synchrotron
+):
+    set_mock_value(synchrotron.top_up_end_countdown, 100)
+
+    def plan():
+        topup_wait = yield from start_topup_wait(synchrotron, 1, 1)
+        yield from finish_topup_wait(synchrotron, topup_wait)
+        return topup_wait
+
+    start = time()
+    topup_wait = RE(plan()).plan_result  # type: ignore
+
+    assert topup_wait.wait_s == 0
+    assert time() - start < 0.5
+    check_topup_and_wait.assert_called_once_with(synchrotron, 1, 1)
+
+
+@patch("hyperion.device_setup_plans.check_topup.check_topup_and_wait_if_necessary")
+def test_given_gating_not_permitted_then_no_wait_and_gate_not_checked_again(
+    check_topup_and_wait: MagicMock, RE: RunEngine, synchrotron: Synchrotron
+):
+    set_mock_value(synchrotron.synchrotron_mode, SynchrotronMode.SHUTDOWN)
+    set_mock_value(synchrotron.top_up_start_countdown, 0)
+    set_mock_value(synchrotron.top_up_end_countdown, 100)
+
+    def plan():
+        topup_wait = yield from start_topup_wait(synchrotron, 10, 1)
+        yield from finish_topup_wait(synchrotron, topup_wait)
+        return topup_wait
+
+    topup_wait = RE(plan()).plan_result  # type: ignore
+
+    assert not topup_wait.gating
+    check_topup_and_wait.assert_not_called()
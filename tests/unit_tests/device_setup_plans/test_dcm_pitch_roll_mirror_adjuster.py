@@ -1,3 +1,4 @@
+import os
 from threading import Timer
 from unittest.mock import MagicMock, PropertyMock, patch
 
@@ -15,6 +16,7 @@ from dodal.devices.undulator_dcm import UndulatorDCM
 from ophyd import EpicsSignal
 from ophyd.sim import NullStatus
 from ophyd.status import Status
+from ophyd_async.core import set_mock_value
 
 from hyperion.device_setup_plans import dcm_pitch_roll_mirror_adjuster
 from hyperion.device_setup_plans.dcm_pitch_roll_mirror_adjuster import (
@@ -52,7 +54,9 @@ def _mock_channel(magic_mock, accept_demand):
             status = Status()
             Timer(0.2, lambda: status.set_finished()).start()
         else:
-            status = Status(timeout=0.2)
+            # Long enough that every demand is sent before this fails, even with a
+            # garbage collection pause part way through
+            status = Status(timeout=1)
         return status
 
     magic_mock.set.side_effect = not_ok_then_ok
@@ -161,6 +165,54 @@ def test_adjust_mirror_stripe(
         )
 
 
+def test_adjust_mirror_stripe_applies_stripe_even_if_already_demanded(
+    RE: RunEngine,
+    vfm_mirror_voltages: VFMMirrorVoltages,
+    vfm: FocusingMirrorWithStripes,
+):
+    with patch.object(
+        vfm_mirror_voltages,
+        "voltage_channels",
+        new_callable=_all_demands_accepted(vfm_mirror_voltages),
+    ):
+        # The stripe PV is only the demand so says nothing about where the mirror is
+        set_mock_value(vfm.stripe, MirrorStripe.RHODIUM)
+        vfm.apply_stripe.trigger = MagicMock()  # type: ignore
+
+        RE(adjust_mirror_stripe(7.5, vfm, vfm_mirror_voltages))
+
+        vfm.apply_stripe.trigger.assert_called_once()  # type: ignore
+
+
+def test_cached_linear_interpolation_lut_only_rereads_modified_file(tmp_path):
+    lut_path = tmp_path / "lut.txt"
+    lut_path.write_text("Units Deg mrad\n0 0\n10 1\n")
+    with patch(
+        "hyperion.device_setup_plans.dcm_pitch_roll_mirror_adjuster.linear_interpolation_lut",
+        side_effect=dcm_pitch_roll_mirror_adjuster.linear_interpolation_lut,
+    ) as parse_lut:
+        lut = dcm_pitch_roll_mirror_adjuster.cached_linear_interpolation_lut
+        assert lut(str(lut_path))(5) == pytest.approx(0.5)
+        assert lut(str(lut_path))(5) == pytest.approx(0.5)
+        assert parse_lut.call_count == 1
+
+        lut_path.write_text("Units Deg mrad\n0 0\n10 2\n")
+        os.utime(lut_path, ns=(0, lut_path.stat().st_mtime_ns + 1))
+        assert lut(str(lut_path))(5) == pytest.approx(1)
+        assert parse_lut.call_count == 2
+
+
+@pytest.mark.parametrize(
+    "energy_kev, expected_gap_mm", [(5.7, 5.4606), (11.0, 6.891), (20, 8.4289)]
+)
+def test_undulator_gap_for_energy_mm_gives_closest_gap_in_table(
+    undulator_dcm: UndulatorDCM, energy_kev, expected_gap_mm
+):
+    assert dcm_pitch_roll_mirror_adjuster.undulator_gap_for_energy_mm(
+        undulator_dcm, energy_kev
+    ) == pytest.approx(expected_gap_mm)
+
+
 def test_adjust_dcm_pitch_roll_vfm_from_lut(
     undulator_dcm: UndulatorDCM,
     vfm: FocusingMirrorWithStripes,
@@ -240,3 +292,51 @@ def test_adjust_dcm_pitch_roll_vfm_from_lut(
         and msg.obj.name == "vfm-x_mm"
         and msg.args == (10.0,),
     )
+    messages = assert_message_and_return_remaining(
+        messages[1:],
+        lambda msg: msg.command == "wait" and msg.kwargs["group"] == "vfm-x_mm",
+    )
+
+
+def test_adjust_dcm_pitch_roll_vfm_from_lut_does_not_wait_for_dcm_before_mirror(
+    undulator_dcm: UndulatorDCM,
+    vfm: FocusingMirrorWithStripes,
+    vfm_mirror_voltages: VFMMirrorVoltages,
+    sim_run_engine: RunEngineSimulator,
+):
+    sim_run_engine.add_handler_for_callback_subscribes()
+    sim_run_engine.add_handler(
+        "read",
+        lambda msg: {"dcm-bragg_in_degrees": {"value": 5.0}},
+        "dcm-bragg_in_degrees",
+    )
+    messages = sim_run_engine.simulate_plan(
+        adjust_dcm_pitch_roll_vfm_from_lut(undulator_dcm, vfm, vfm_mirror_voltages, 7.5)
+    )
+
+    dcm_wait = next(
+        i
+        for i, msg in enumerate(messages)
+        if msg.command == "wait" and msg.kwargs["group"] == "DCM_GROUP"
+    )
+    assert [
+        msg
+        for msg in messages[:dcm_wait]
+        if msg.command == "set" and msg.obj.name.startswith("vfm_mirror_voltages")
+    ]
+
+
+@patch("hyperion.device_setup_plans.dcm_pitch_roll_mirror_adjuster.time")
+def test_energy_change_timeline_records_when_each_axis_moved(mock_time: MagicMock):
+    timeline = dcm_pitch_roll_mirror_adjuster.EnergyChangeTimeline(start=100)
+    pitch, roll = Status(), Status()
+
+    mock_time.return_value = 101
+    timeline.track("pitch", pitch)
+    timeline.track("roll", roll)
+    mock_time.return_value = 102.5
+    pitch.set_finished()
+    pitch.wait(1)
+
+    assert timeline.axes == {"pitch": (1, 2.5), "roll": (1, None)}
+    assert str(timeline) == "pitch 1.00-2.50s, roll 1.00-?s"
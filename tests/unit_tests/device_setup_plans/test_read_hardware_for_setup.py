@@ -0,0 +1,109 @@
+import asyncio
+from time import sleep, time
+
+import bluesky.preprocessors as bpp
+from bluesky.run_engine import RunEngine
+from ophyd.sim import SynAxis
+from ophyd_async.core import soft_signal_rw
+
+from hyperion.device_setup_plans.read_hardware_for_setup import read_concurrently
+
+
+class SlowReadable:
+    parent = None
+
+    def __init__(self, name: str):
+        self.name = name
+        self.signal = soft_signal_rw(float, 1.0, name=name)
+
+    async def read(self):
+        await asyncio.sleep(0.2)
+        return await self.signal.read()
+
+    async def describe(self):
+        return await self.signal.describe()
+
+
+class SlowSyncReadable:
+    parent = None
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def read(self):
+        sleep(0.2)
+        return {self.name: {"value": 2.0, "timestamp": time()}}
+
+    def describe(self):
+        return {self.name: {"source": "test", "dtype": "number", "shape": []}}
+
+
+def test_when_read_concurrently_then_synchronous_reads_also_made_in_parallel(
+    RE: RunEngine,
+):
+    docs = []
+    RE.subscribe(lambda name, doc: docs.append((name, doc)))
+
+    @bpp.run_decorator()
+    def plan():
+        yield from read_concurrently(
+            "test_read",
+            [
+                SlowSyncReadable("sync_1"),
+                SlowSyncReadable("sync_2"),
+                SlowReadable("slow"),
+            ],
+        )
+
+    start = time()
+    RE(plan())
+
+    assert time() - start < 0.4
+    [event] = [doc for name, doc in docs if name == "event"]
+    assert event["data"] == {"sync_1": 2.0, "sync_2": 2.0, "slow": 1.0}
+
+
+def test_when_read_concurrently_then_one_event_with_every_reading_made_in_parallel(
+    RE: RunEngine,
+):
+    docs = []
+    RE.subscribe(lambda name, doc: docs.append((name, doc)))
+    ophyd_axis = SynAxis(name="axis")
+
+    @bpp.run_decorator()
+    def plan():
+        yield from read_concurrently(
+            "test_read", [SlowReadable("slow_1"), SlowReadable("slow_2"), ophyd_axis]
+        )
+
+    start = time()
+    RE(plan())
+
+    assert time() - start < 0.4
+    [descriptor] = [doc for name, doc in docs if name == "descriptor"]
+    [event] = [doc for name, doc in docs if name == "event"]
+    assert descriptor["name"] == "test_read"
+    assert event["data"] == {
+        "slow_1": 1.0,
+        "slow_2": 1.0,
+        "axis": 0,
+        "axis_setpoint": 0,
+    }
+
+
+def test_when_read_concurrently_twice_in_one_run_then_descriptor_reused(
+    RE: RunEngine,
+):
+    docs = []
+    RE.subscribe(lambda name, doc: docs.append((name, doc)))
+    readables = [SlowReadable("slow_1"), SlowReadable("slow_2")]
+
+    @bpp.run_decorator()
+    def plan():
+        yield from read_concurrently("test_read", readables)
+        yield from read_concurrently("test_read", readables)
+
+    RE(plan())
+
+    assert len([doc for name, doc in docs if name == "descriptor"]) == 1
+    assert len([doc for name, doc in docs if name == "event"]) == 2
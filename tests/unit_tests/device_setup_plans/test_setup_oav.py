@@ -1,3 +1,4 @@
+from time import time
 from unittest.mock import MagicMock
 
 import pytest
@@ -12,6 +13,7 @@ from ophyd.status import Status
 
 from hyperion.device_setup_plans.setup_oav import (
     pre_centring_setup_oav,
+    wait_for_oav_frame_after_move,
 )
 
 ZOOM_LEVELS_XML = "tests/test_data/test_jCameraManZoomLevels.xml"
@@ -62,6 +64,20 @@ def test_when_set_up_oav_with_different_zoom_levels_then_flat_field_applied_corr
     assert oav.grid_snapshot.input_plugin.get() == expected_plugin
 
 
+def test_given_oav_already_at_zoom_when_set_up_then_zoom_not_changed(
+    mock_parameters: OAVParameters, oav: OAV, ophyd_pin_tip_detection: PinTipDetection
+):
+    mock_parameters.zoom = "1.0"
+    oav.zoom_controller.level.sim_put("1.0x")  # type: ignore
+    oav.grid_snapshot.input_plugin.sim_put("CAM")  # type: ignore
+    oav.zoom_controller.set = MagicMock()
+
+    RunEngine()(pre_centring_setup_oav(oav, mock_parameters, ophyd_pin_tip_detection))
+
+    oav.zoom_controller.set.assert_not_called()
+    assert oav.grid_snapshot.input_plugin.get() == "proc"
+
+
 def test_when_set_up_oav_then_only_waits_on_oav_to_finish(
     mock_parameters: OAVParameters, oav: OAV, ophyd_pin_tip_detection: PinTipDetection
 ):
@@ -76,3 +92,27 @@ def test_when_set_up_oav_then_only_waits_on_oav_to_finish(
 
     RE = RunEngine()
     RE(my_plan())
+
+
+def test_when_waiting_for_oav_frame_then_returns_once_the_second_new_frame_arrives(
+    oav: OAV, RE: RunEngine
+):
+    oav.cam.array_counter.sim_put(10)  # type: ignore
+
+    def capture_frame(frame: int):
+        oav.cam.array_counter.sim_put(frame)  # type: ignore
+
+    RE.loop.call_soon_threadsafe(RE.loop.call_later, 0.1, capture_frame, 11)
+    RE.loop.call_soon_threadsafe(RE.loop.call_later, 0.3, capture_frame, 12)
+    start = time()
+    RE(wait_for_oav_frame_after_move(oav, timeout=5))
+
+    assert 0.3 <= time() - start < 5
+
+
+def test_given_oav_not_updating_when_waiting_for_frame_then_continues_after_timeout(
+    oav: OAV, RE: RunEngine
+):
+    oav.cam.array_counter.sim_put(10)  # type: ignore
+
+    RE(wait_for_oav_frame_after_move(oav, timeout=0.1))
@@ -9,11 +9,13 @@ from bluesky.run_engine import RunEngine
 from bluesky.simulators import RunEngineSimulator, assert_message_and_return_remaining
 from dodal.common.types import UpdatingDirectoryProvider
 from dodal.devices.fast_grid_scan import PandAGridScanParams
+from ophyd_async.core import get_mock_put, save_to_yaml, set_mock_value
 from ophyd_async.panda import SeqTrigger
 
 from hyperion.device_setup_plans.setup_panda import (
     MM_TO_ENCODER_COUNTS,
     disarm_panda_for_gridscan,
+    load_panda_config_changes,
     set_panda_directory,
     setup_panda_for_flyscan,
 )
@@ -218,6 +220,79 @@ def test_wait_between_setting_table_and_arming_panda(RE: RunEngine):
         )
 
 
+def test_given_config_already_loaded_when_loaded_again_then_only_changes_written(
+    panda, RE: RunEngine, tmp_path
+):
+    config_path = str(tmp_path / "config.yaml")
+    save_to_yaml(
+        [{"pulse.1.delay": 0.5, "clock.1.period": 2.0}, {"pulse.2.delay": 1.5}],
+        config_path,
+    )
+    RE(load_panda_config_changes(panda, config_path))
+    get_mock_put(panda.pulse[1].delay).assert_called_once()
+
+    set_mock_value(panda.pulse[2].delay, 3.0)
+    for signal in [panda.pulse[1].delay, panda.clock[1].period, panda.pulse[2].delay]:
+        get_mock_put(signal).reset_mock()
+    RE(load_panda_config_changes(panda, config_path))
+
+    get_mock_put(panda.pulse[1].delay).assert_not_called()
+    get_mock_put(panda.clock[1].period).assert_not_called()
+    get_mock_put(panda.pulse[2].delay).assert_called_once()
+    assert get_mock_put(panda.pulse[2].delay).call_args.args[0] == 1.5
+
+
+def _setup_panda(panda):
+    return setup_panda_for_flyscan(
+        panda,
+        PandAGridScanParams(transmission_fraction=0.01),
+        1,
+        0.1,
+        100.1,
+        get_smargon_speed(0.1, 1),
+    )
+
+
+@patch("hyperion.device_setup_plans.setup_panda.load_device")
+def test_given_setup_fails_then_next_setup_reloads_full_config(
+    mock_load_device: MagicMock,
+):
+    mock_panda = MagicMock()
+    sim = RunEngineSimulator()
+    sim.simulate_plan(_setup_panda(mock_panda))
+    sim.simulate_plan(_setup_panda(mock_panda))
+    assert mock_load_device.call_count == 1
+
+    with patch(
+        "hyperion.device_setup_plans.setup_panda.arm_panda_for_gridscan",
+        MagicMock(side_effect=RuntimeError("Arming failed")),
+    ), pytest.raises(RuntimeError):
+        sim.simulate_plan(_setup_panda(mock_panda))
+    sim.simulate_plan(_setup_panda(mock_panda))
+    assert mock_load_device.call_count == 2
+
+
+@patch("hyperion.device_setup_plans.setup_panda.load_panda_config_changes")
+def test_given_table_unchanged_when_panda_setup_then_table_not_rewritten(
+    mock_load_config: MagicMock, panda, sim_run_engine: RunEngineSimulator
+):
+    def table_set(msgs):
+        return [
+            msg
+            for msg in msgs
+            if msg.command == "set" and msg.obj.name == "panda-seq-1-table"
+        ]
+
+    [set_table] = table_set(sim_run_engine.simulate_plan(_setup_panda(panda)))
+    sim_run_engine.add_handler(
+        "locate",
+        lambda _: {"setpoint": set_table.args[0], "readback": set_table.args[0]},
+        "panda-seq-1-table",
+    )
+
+    assert not table_set(sim_run_engine.simulate_plan(_setup_panda(panda)))
+
+
 # It also would be useful to have some system tests which check that (at least)
 # all the blocks which were enabled on setup are also disabled on tidyup
 def test_disarm_panda_disables_correct_blocks(sim_run_engine):
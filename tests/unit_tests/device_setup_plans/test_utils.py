@@ -1,13 +1,19 @@
-from unittest.mock import MagicMock
+from unittest.mock import MagicMock, patch
 
 import pytest
 from bluesky import plan_stubs as bps
 from bluesky.utils import FailedStatus
 from dodal.beamlines import i03
 from ophyd.status import Status
+from ophyd_async.core import soft_signal_r_and_setter, soft_signal_rw
 
 from hyperion.device_setup_plans.utils import (
+    SetupStep,
+    run_setup_steps,
+    set_if_changed,
     start_preparing_data_collection_then_do_plan,
+    wait_for_signal,
+    wait_for_signals,
 )
 
 
@@ -90,3 +96,125 @@ def test_given_detector_move_fails_then_eiger_disarmed_and_correct_exception_ret
     mock_eiger.async_stage.assert_called_once()
     detector_motion.z.set.assert_called_once()
     mock_eiger.disarm_detector.assert_called_once()
+
+
+def test_given_signal_already_matches_when_wait_for_signal_then_no_wait(
+    sim_run_engine,
+):
+    signal, _ = soft_signal_r_and_setter(int, 0, name="signal")
+    sim_run_engine.add_handler("read", lambda msg: {"signal": {"value": 0}}, "signal")
+
+    messages = sim_run_engine.simulate_plan(wait_for_signal(signal, 0, 1))
+
+    assert [msg.command for msg in messages] == ["read"]
+    assert sim_run_engine.return_value == 0
+
+
+def test_when_signal_updates_to_match_then_wait_for_signal_returns_elapsed_time(RE):
+    signal, set_signal = soft_signal_r_and_setter(int, 5, name="signal")
+    RE.loop.call_soon_threadsafe(RE.loop.call_later, 0.2, set_signal, 1)
+
+    elapsed = RE(wait_for_signal(signal, lambda value: value < 2, 5)).plan_result  # type: ignore
+
+    assert 0.1 < elapsed < 5
+
+
+def test_given_only_one_signal_matches_when_wait_for_signals_then_times_out(RE):
+    matching, _ = soft_signal_r_and_setter(int, 0, name="matching")
+    not_matching, _ = soft_signal_r_and_setter(int, 1, name="not_matching")
+
+    with pytest.raises(TimeoutError, match="not_matching"):
+        RE(wait_for_signals([(matching, 0), (not_matching, 0)], 0.1))
+
+
+def _set_step(signal, value):
+    def plan(group: str):
+        yield from bps.abs_set(signal, value, group=group)
+        return value
+
+    return plan
+
+
+def test_when_run_setup_steps_then_each_step_waits_only_on_its_prerequisites(
+    sim_run_engine,
+):
+    a, b, c = (MagicMock(name=name) for name in "abc")
+    steps = [
+        SetupStep("a", _set_step(a, 1)),
+        SetupStep("b", _set_step(b, 2)),
+        SetupStep("c", _set_step(c, 3), depends_on=["a"]),
+    ]
+
+    messages = sim_run_engine.simulate_plan(run_setup_steps(steps, "test"))
+
+    assert [(msg.command, msg.obj or msg.kwargs["group"]) for msg in messages] == [
+        ("set", a),
+        ("set", b),
+        ("wait", "test_a"),
+        ("set", c),
+        ("wait", "test_b"),
+        ("wait", "test_c"),
+    ]
+    assert sim_run_engine.return_value == {"a": 1, "b": 2, "c": 3}
+
+
+def test_given_wait_for_when_run_setup_steps_then_other_groups_left_to_caller(
+    sim_run_engine,
+):
+    a, b = MagicMock(name="a"), MagicMock(name="b")
+    steps = [SetupStep("a", _set_step(a, 1)), SetupStep("b", _set_step(b, 2))]
+
+    messages = sim_run_engine.simulate_plan(
+        run_setup_steps(steps, "test", wait_for=["b"])
+    )
+
+    assert [msg.kwargs["group"] for msg in messages if msg.command == "wait"] == [
+        "test_b"
+    ]
+
+
+@pytest.mark.parametrize(
+    "steps",
+    [
+        [SetupStep("a", bps.null), SetupStep("a", bps.null)],
+        [SetupStep("a", bps.null, depends_on=["b"]), SetupStep("b", bps.null)],
+        [SetupStep("a", bps.null, depends_on=["a"])],
+    ],
+)
+def test_given_invalid_dependencies_when_run_setup_steps_then_raises(steps, RE):
+    with pytest.raises(ValueError):
+        RE(run_setup_steps(steps, "test"))
+
+
+def test_when_run_setup_steps_then_critical_path_logged(RE):
+    def slow_step(group: str):
+        yield from bps.sleep(0.2)
+
+    steps = [
+        SetupStep("fast", lambda group: bps.null()),
+        SetupStep("slow", slow_step),
+        SetupStep("after_fast", lambda group: bps.null(), depends_on=["fast"]),
+        SetupStep("after_slow", lambda group: bps.null(), depends_on=["slow"]),
+    ]
+
+    with patch("hyperion.device_setup_plans.utils.LOGGER") as mock_logger:
+        RE(run_setup_steps(steps, "test"))
+
+    assert "critical path: slow" in mock_logger.info.call_args.args[0]
+    assert "after_slow" in mock_logger.info.call_args.args[0]
+
+
+async def test_when_set_if_changed_then_only_signals_not_at_value_are_set(RE):
+    unchanged = soft_signal_rw(float, 1.0, name="unchanged")
+    changed = soft_signal_rw(float, 1.0, name="changed")
+    unchanged.set = MagicMock(wraps=unchanged.set)  # type: ignore
+    changed.set = MagicMock(wraps=changed.set)  # type: ignore
+
+    skipped = RE(
+        set_if_changed([(unchanged, 1.0), (changed, 2.0)], "group", wait=True)
+    ).plan_result  # type: ignore
+
+    assert skipped == 1
+    unchanged.set.assert_not_called()
+    changed.set.assert_called_once()
+    assert await changed.get_value() == 2.0
@@ -1,15 +1,18 @@
-from unittest.mock import MagicMock
+from unittest.mock import MagicMock, patch
 
 import pytest
 from bluesky import plan_stubs as bps
 from bluesky.run_engine import RunEngine
+from bluesky.simulators import RunEngineSimulator
 from bluesky.utils import FailedStatus
 from dodal.devices.xbpm_feedback import Pause
 from ophyd.status import Status
 from ophyd_async.core import set_mock_value
 
 from hyperion.device_setup_plans.xbpm_feedback import (
+    FEEDBACK_SETTLE_S,
     transmission_and_xbpm_feedback_for_collection_decorator,
+    xbpm_feedback_state,
 )
 
 
@@ -88,3 +91,126 @@ async def test_given_xpbm_checks_pass_and_plan_fails_when_plan_run_with_decorato
 
     assert await attenuator.actual_transmission.get_value() == 1.0
     assert await xbpm_feedback.pause_feedback.get_value() == Pause.RUN
+
+
+class _Clock:
+    def __init__(self, now: float):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _simulate_collection(
+    sim_run_engine: RunEngineSimulator,
+    clock: _Clock,
+    xbpm_feedback,
+    attenuator,
+    dcm,
+    energy_kev: float = 12.7,
+    pause: Pause = Pause.RUN,
+):
+    """Simulates a collection in which the feedback takes 2s to settle, if waited on,
+    and returns the triggers of the feedback"""
+    sim_run_engine.add_handler(
+        "read",
+        lambda msg: {msg.obj.name: {"value": energy_kev}},
+        dcm.energy_in_kev.name,
+    )
+    sim_run_engine.add_handler(
+        "locate",
+        lambda msg: {"readback": pause, "setpoint": pause},
+        xbpm_feedback.pause_feedback.name,
+    )
+
+    def settle(_):
+        clock.now += 2
+
+    sim_run_engine.add_handler("trigger", settle, xbpm_feedback.name)
+
+    @transmission_and_xbpm_feedback_for_collection_decorator(
+        xbpm_feedback, attenuator, 0.1, dcm, stable_window_s=60
+    )
+    def my_collection_plan():
+        yield from bps.null()
+
+    msgs = sim_run_engine.simulate_plan(my_collection_plan())
+    return [msg for msg in msgs if msg.command == "trigger"]
+
+
+def test_given_beam_confirmed_stable_recently_at_same_energy_and_feedback_since_settled_then_feedback_not_waited_on(
+    RE, sim_run_engine, xbpm_feedback, attenuator, dcm
+):
+    clock = _Clock(100)
+    with patch("hyperion.device_setup_plans.xbpm_feedback.time", clock):
+        assert _simulate_collection(
+            sim_run_engine, clock, xbpm_feedback, attenuator, dcm
+        )
+        clock.now += FEEDBACK_SETTLE_S
+        assert not _simulate_collection(
+            sim_run_engine, clock, xbpm_feedback, attenuator, dcm
+        )
+    assert xbpm_feedback_state(xbpm_feedback).time_saved_s == 2
+
+
+@pytest.mark.parametrize(
+    "time_after_s, energy_kev, pause",
+    [
+        (100, 12.7, Pause.RUN),
+        (FEEDBACK_SETTLE_S, 13.0, Pause.RUN),
+        (FEEDBACK_SETTLE_S, 12.7, Pause.PAUSE),
+        (FEEDBACK_SETTLE_S - 1, 12.7, Pause.RUN),
+    ],
+)
+def test_given_window_passed_or_energy_or_feedback_changed_or_not_settled_then_feedback_waited_on(
+    time_after_s: float,
+    energy_kev: float,
+    pause: Pause,
+    RE,
+    sim_run_engine,
+    xbpm_feedback,
+    attenuator,
+    dcm,
+):
+    clock = _Clock(100)
+    with patch("hyperion.device_setup_plans.xbpm_feedback.time", clock):
+        assert _simulate_collection(
+            sim_run_engine, clock, xbpm_feedback, attenuator, dcm
+        )
+        clock.now += time_after_s
+        assert _simulate_collection(
+            sim_run_engine, clock, xbpm_feedback, attenuator, dcm, energy_kev, pause
+        )
+    assert xbpm_feedback_state(xbpm_feedback).time_saved_s == 0
+
+
+def test_given_feedback_paused_then_unpaused_when_it_has_run_for_settle_time_then_next_collection_skips_waiting(
+    RE, xbpm_feedback, attenuator, dcm
+):
+    set_mock_value(xbpm_feedback.pos_stable, True)  # type: ignore
+    xbpm_feedback.trigger = MagicMock(wraps=xbpm_feedback.trigger)
+    state = xbpm_feedback_state(xbpm_feedback)
+    clock = _Clock(100)
+    unpaused_at = []
+
+    @transmission_and_xbpm_feedback_for_collection_decorator(
+        xbpm_feedback, attenuator, 0.1, dcm, stable_window_s=60
+    )
+    def my_collection_plan():
+        pause_feedback = yield from bps.rd(xbpm_feedback.pause_feedback)
+        assert pause_feedback == Pause.PAUSE
+        unpaused_at.append(state.unpaused_at)
+        clock.now += 10
+
+    with patch("hyperion.device_setup_plans.xbpm_feedback.time", clock):
+        RE(my_collection_plan())
+        assert state.unpaused_at == 110
+        clock.now += FEEDBACK_SETTLE_S - 1
+        RE(my_collection_plan())
+        clock.now += FEEDBACK_SETTLE_S
+        RE(my_collection_plan())
+
+    # Waited on first, then too soon after being unpaused, then skipped
+    assert xbpm_feedback.trigger.call_count == 2
+    assert unpaused_at == [None, None, None]
+    assert state.unpaused_at == clock.now
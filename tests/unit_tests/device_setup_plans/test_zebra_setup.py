@@ -35,6 +35,18 @@ async def test_zebra_set_up_for_gridscan(RE, zebra: Zebra):
     assert await zebra.output.out_pvs[TTL_SHUTTER].get_value() == IN4_TTL
 
 
+async def test_given_zebra_already_set_up_for_gridscan_then_nothing_is_set_again(
+    RE, zebra: Zebra
+):
+    RE(setup_zebra_for_gridscan(zebra, wait=True))
+    detector_output = zebra.output.out_pvs[TTL_DETECTOR]
+    detector_output.set = MagicMock(wraps=detector_output.set)  # type: ignore
+
+    RE(setup_zebra_for_gridscan(zebra, wait=True))
+
+    detector_output.set.assert_not_called()
+
+
 async def test_zebra_set_up_for_rotation(RE, zebra: Zebra):
     RE(setup_zebra_for_rotation(zebra, wait=True))
     assert await zebra.pc.gate_trigger.get_value() == I03Axes.OMEGA.value
@@ -20,6 +20,7 @@ from dodal.devices.detector.det_dim_constants import (
 from dodal.devices.fast_grid_scan import ZebraFastGridScan
 from dodal.devices.synchrotron import SynchrotronMode
 from dodal.devices.zocalo import ZocaloStartInfo
+from dodal.devices.zocalo.zocalo_results import ZOCALO_STAGE_GROUP
 from ophyd.status import Status
 from ophyd_async.core import set_mock_value
 from ophyd_async.panda._table import DatasetTable
@@ -151,6 +152,11 @@ def _custom_msg(command_name: str):
     return lambda *args, **kwargs: iter([Msg(command_name)])
 
 
+def _gridscan_from_origin(*args, **kwargs):
+    yield from bps.null()
+    return np.zeros(3)
+
+
 @patch(
     "hyperion.external_interaction.callbacks.xray_centre.ispyb_callback.StoreInIspyb",
     modified_store_grid_scan_mock,
@@ -558,7 +564,7 @@ class TestFlyscanXrayCentrePlan:
         assert "Crystal 1: Strength 999999" in append_zocalo_call
 
     @patch(
-        "hyperion.experiment_plans.flyscan_xray_centre_plan.check_topup_and_wait_if_necessary",
+        "hyperion.device_setup_plans.check_topup.check_topup_and_wait_if_necessary",
     )
     def test_waits_for_motion_program(
         self,
@@ -607,7 +613,9 @@ class TestFlyscanXrayCentrePlan:
         clear_device("zebra_fast_grid_scan")
 
     @patch(
-        "hyperion.experiment_plans.flyscan_xray_centre_plan.run_gridscan", autospec=True
+        "hyperion.experiment_plans.flyscan_xray_centre_plan.run_gridscan",
+        autospec=True,
+        side_effect=_gridscan_from_origin,
     )
     @patch(
         "hyperion.experiment_plans.flyscan_xray_centre_plan.move_x_y_z", autospec=True
@@ -710,7 +718,9 @@ class TestFlyscanXrayCentrePlan:
         assert np.all(move_xyz.call_args[0][1:] == initial_x_y_z)
 
     @patch(
-        "hyperion.experiment_plans.flyscan_xray_centre_plan.run_gridscan", autospec=True
+        "hyperion.experiment_plans.flyscan_xray_centre_plan.run_gridscan",
+        autospec=True,
+        side_effect=_gridscan_from_origin,
     )
     @patch(
         "hyperion.experiment_plans.flyscan_xray_centre_plan.move_x_y_z", autospec=True
@@ -809,7 +819,7 @@ class TestFlyscanXrayCentrePlan:
     @patch(
         "hyperion.experiment_plans.flyscan_xray_centre_plan.bps.sleep", autospec=True
     )
-    def test_GIVEN_scan_not_valid_THEN_wait_for_GRIDSCAN_raises_and_sleeps_called(
+    def test_GIVEN_scan_not_valid_THEN_wait_for_GRIDSCAN_raises_without_polling(
         self, patch_sleep: MagicMock, RE: RunEngine
     ):
         test_fgs: ZebraFastGridScan = i03.zebra_fast_grid_scan(fake_with_ophyd_sim=True)
@@ -820,7 +830,22 @@ class TestFlyscanXrayCentrePlan:
         with pytest.raises(WarningException):
             RE(wait_for_gridscan_valid(test_fgs))
 
-        patch_sleep.assert_called()
+        patch_sleep.assert_not_called()
+
+    def test_GIVEN_scan_becomes_valid_THEN_wait_for_GRIDSCAN_returns_once_valid(
+        self, RE: RunEngine
+    ):
+        test_fgs: ZebraFastGridScan = i03.zebra_fast_grid_scan(fake_with_ophyd_sim=True)
+
+        set_mock_value(test_fgs.scan_invalid, True)
+        set_mock_value(test_fgs.position_counter, 5)
+
+        def become_valid():
+            set_mock_value(test_fgs.scan_invalid, False)
+            set_mock_value(test_fgs.position_counter, 0)
+
+        RE.loop.call_soon_threadsafe(RE.loop.call_later, 0.1, become_valid)
+        RE(wait_for_gridscan_valid(test_fgs, timeout=5))
 
     @patch(
         "hyperion.experiment_plans.flyscan_xray_centre_plan.bps.abs_set", autospec=True
@@ -841,7 +866,7 @@ class TestFlyscanXrayCentrePlan:
         autospec=True,
         spec_set=True,
     )
-    def test_when_grid_scan_ran_then_eiger_disarmed_before_zocalo_end(
+    def test_when_grid_scan_ran_then_eiger_disarmed_before_zocalo_end_of_last_grid(
         self,
         nexuswriter,
         wait_for_valid,
@@ -887,7 +912,8 @@ class TestFlyscanXrayCentrePlan:
                 )
             )
 
-        mock_parent.assert_has_calls([call.disarm(), call.run_end(0), call.run_end(0)])
+        # The first grid's frames are all written, so it is ended straight away
+        mock_parent.assert_has_calls([call.run_end(0), call.disarm(), call.run_end(0)])
 
     @patch(
         "hyperion.experiment_plans.flyscan_xray_centre_plan.set_panda_directory",
@@ -902,7 +928,7 @@ class TestFlyscanXrayCentrePlan:
         new=MagicMock(side_effect=_custom_msg("disarm_panda")),
     )
     @patch(
-        "hyperion.experiment_plans.flyscan_xray_centre_plan.run_gridscan",
+        "hyperion.experiment_plans.flyscan_xray_centre_plan._collect_gridscan",
         new=MagicMock(side_effect=_custom_msg("do_gridscan")),
     )
     def test_flyscan_xray_centre_sets_directory_stages_arms_disarms_unstages_the_panda(
@@ -1094,7 +1120,7 @@ class TestFlyscanXrayCentrePlan:
         assert mock_zocalo_trigger.run_end.mock_calls == [call(id_1), call(id_2)]
 
     @patch(
-        "hyperion.experiment_plans.flyscan_xray_centre_plan.check_topup_and_wait_if_necessary",
+        "hyperion.device_setup_plans.check_topup.check_topup_and_wait_if_necessary",
         new=MagicMock(side_effect=lambda *_, **__: iter([Msg("check_topup")])),
     )
     def test_read_hardware_during_collection_occurs_after_eiger_arm(
@@ -1111,6 +1137,9 @@ class TestFlyscanXrayCentrePlan:
             lambda msg: {"values": {"value": SynchrotronMode.USER}},
             "synchrotron-synchrotron_mode",
         )
+        sim_run_engine.add_read_handler_for(
+            fake_fgs_composite.smargon.x.max_velocity, 10
+        )
         msgs = sim_run_engine.simulate_plan(
             run_gridscan(
                 fake_fgs_composite, test_fgs_params_panda_zebra, feature_controlled
@@ -1129,12 +1158,182 @@ class TestFlyscanXrayCentrePlan:
         )
         msgs = assert_message_and_return_remaining(
             msgs,
-            lambda msg: msg.command == "read" and msg.obj.name == "eiger_bit_depth",
+            lambda msg: msg.command == "read"
+            and "eiger_bit_depth" in [r.name for r in msg.obj.readables],
         )
         msgs = assert_message_and_return_remaining(
             msgs, lambda msg: msg.command == "save"
         )
 
+    @patch(
+        "hyperion.device_setup_plans.check_topup.check_topup_and_wait_if_necessary",
+        new=MagicMock(side_effect=lambda *_, **__: iter([Msg("check_topup")])),
+    )
+    def test_frames_written_monitored_from_before_kickoff_until_complete(
+        self,
+        fake_fgs_composite: FlyScanXRayCentreComposite,
+        test_fgs_params_panda_zebra: ThreeDGridScan,
+        sim_run_engine: RunEngineSimulator,
+    ):
+        feature_controlled = _get_feature_controlled(
+            fake_fgs_composite, test_fgs_params_panda_zebra
+        )
+        sim_run_engine.add_handler(
+            "read",
+            lambda msg: {"values": {"value": SynchrotronMode.USER}},
+            "synchrotron-synchrotron_mode",
+        )
+        sim_run_engine.add_read_handler_for(
+            fake_fgs_composite.smargon.x.max_velocity, 10
+        )
+        num_captured = fake_fgs_composite.eiger.odin.file_writer.num_captured
+        msgs = sim_run_engine.simulate_plan(
+            run_gridscan(
+                fake_fgs_composite, test_fgs_params_panda_zebra, feature_controlled
+            )
+        )
+        msgs = assert_message_and_return_remaining(
+            msgs,
+            lambda msg: msg.command == "monitor"
+            and msg.obj is num_captured
+            and msg.kwargs["name"] == CONST.DESCRIPTORS.GRIDSCAN_FRAMES_WRITTEN,
+        )
+        msgs = assert_message_and_return_remaining(
+            msgs,
+            lambda msg: msg.command == "kickoff"
+            and msg.obj == feature_controlled.fgs_motors,
+        )
+        msgs = assert_message_and_return_remaining(
+            msgs,
+            lambda msg: msg.command == "complete"
+            and msg.obj == feature_controlled.fgs_motors,
+        )
+        msgs = assert_message_and_return_remaining(
+            msgs, lambda msg: msg.command == "unmonitor" and msg.obj is num_captured
+        )
+
+    @patch(
+        "hyperion.device_setup_plans.check_topup.check_topup_and_wait_if_necessary",
+        new=MagicMock(side_effect=lambda *_, **__: iter([Msg("check_topup")])),
+    )
+    def test_run_gridscan_sets_params_and_omega_while_waiting_for_eiger(
+        self,
+        fake_fgs_composite: FlyScanXRayCentreComposite,
+        test_fgs_params_panda_zebra: ThreeDGridScan,
+        sim_run_engine: RunEngineSimulator,
+    ):
+        feature_controlled = _get_feature_controlled(
+            fake_fgs_composite, test_fgs_params_panda_zebra
+        )
+        params_group = f"{CONST.PLAN.GRIDSCAN_MAIN}_set_flyscan_params"
+        omega_group = f"{CONST.PLAN.GRIDSCAN_MAIN}_moving_omega_to_0"
+        sim_run_engine.add_handler(
+            "read",
+            lambda msg: {"values": {"value": SynchrotronMode.USER}},
+            "synchrotron-synchrotron_mode",
+        )
+        sim_run_engine.add_read_handler_for(
+            fake_fgs_composite.smargon.x.max_velocity, 10
+        )
+        msgs = sim_run_engine.simulate_plan(
+            run_gridscan(
+                fake_fgs_composite, test_fgs_params_panda_zebra, feature_controlled
+            )
+        )
+        msgs = assert_message_and_return_remaining(
+            msgs,
+            lambda msg: msg.command == "set"
+            and msg.obj.name == "smargon-omega"
+            and msg.kwargs["group"] == omega_group,
+        )
+        msgs = assert_message_and_return_remaining(
+            msgs,
+            lambda msg: msg.command == "set"
+            and msg.obj is feature_controlled.fgs_motors.position_counter
+            and msg.kwargs["group"] == params_group,
+        )
+        msgs = assert_message_and_return_remaining(
+            msgs,
+            lambda msg: msg.command == "wait" and msg.kwargs["group"] == params_group,
+        )
+        msgs = assert_message_and_return_remaining(
+            msgs,
+            lambda msg: msg.command == "read"
+            and msg.obj is feature_controlled.fgs_motors.scan_invalid,
+        )
+        msgs = assert_message_and_return_remaining(
+            msgs, lambda msg: msg.command == "stage" and msg.obj.name == "eiger"
+        )
+        msgs = assert_message_and_return_remaining(
+            msgs,
+            lambda msg: msg.command == "wait" and msg.kwargs["group"] == omega_group,
+        )
+        assert_message_and_return_remaining(msgs, lambda msg: msg.command == "kickoff")
+
+    @patch(
+        "hyperion.device_setup_plans.check_topup.check_topup_and_wait_if_necessary",
+        new=MagicMock(side_effect=lambda *_, **__: iter([Msg("check_topup")])),
+    )
+    def test_run_gridscan_sets_up_trigger_and_zocalo_before_staging_eiger(
+        self,
+        fake_fgs_composite: FlyScanXRayCentreComposite,
+        test_fgs_params_panda_zebra: ThreeDGridScan,
+        sim_run_engine: RunEngineSimulator,
+    ):
+        feature_controlled = _get_feature_controlled(
+            fake_fgs_composite, test_fgs_params_panda_zebra
+        )
+        trigger_group = f"{CONST.PLAN.GRIDSCAN_MAIN}_setup_trigger"
+        sim_run_engine.add_handler(
+            "read",
+            lambda msg: {"values": {"value": SynchrotronMode.USER}},
+            "synchrotron-synchrotron_mode",
+        )
+        sim_run_engine.add_read_handler_for(fake_fgs_composite.smargon.x, 0.5)
+        sim_run_engine.add_read_handler_for(
+            fake_fgs_composite.smargon.x.max_velocity, 10
+        )
+
+        def run_and_return_initial_xyz():
+            initial_xyz = yield from run_gridscan(
+                fake_fgs_composite, test_fgs_params_panda_zebra, feature_controlled
+            )
+            yield Msg("initial_xyz", initial_xyz)
+
+        msgs = sim_run_engine.simulate_plan(run_and_return_initial_xyz())
+        msgs = assert_message_and_return_remaining(
+            msgs,
+            lambda msg: msg.command == "stage"
+            and msg.obj is fake_fgs_composite.zocalo
+            and msg.kwargs["group"] == ZOCALO_STAGE_GROUP,
+        )
+        msgs = assert_message_and_return_remaining(
+            msgs,
+            lambda msg: msg.command == "read"
+            and msg.obj is fake_fgs_composite.smargon.x,
+        )
+        msgs = assert_message_and_return_remaining(
+            msgs,
+            lambda msg: msg.command == "set"
+            and msg.obj.name.startswith(fake_fgs_composite.zebra.name)
+            and msg.kwargs["group"] == trigger_group,
+        )
+        msgs = assert_message_and_return_remaining(
+            msgs, lambda msg: msg.command == "stage" and msg.obj.name == "eiger"
+        )
+        msgs = assert_message_and_return_remaining(
+            msgs, lambda msg: msg.command == "kickoff"
+        )
+        msgs = assert_message_and_return_remaining(
+            msgs,
+            lambda msg: msg.command == "wait"
+            and msg.kwargs["group"] == ZOCALO_STAGE_GROUP,
+        )
+        msgs = assert_message_and_return_remaining(
+            msgs, lambda msg: msg.command == "initial_xyz"
+        )
+        assert msgs[0].obj[0] == 0.5
+
     @patch(
         "hyperion.experiment_plans.flyscan_xray_centre_plan.kickoff_and_complete_gridscan",
     )
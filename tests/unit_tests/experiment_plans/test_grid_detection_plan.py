@@ -13,10 +13,19 @@ from dodal.devices.oav.oav_parameters import OAVParameters
 from dodal.devices.oav.pin_image_recognition import PinTipDetection
 from dodal.devices.oav.pin_image_recognition.utils import NONE_VALUE, SampleLocation
 from dodal.devices.smargon import Smargon
+from ophyd_async.core import (
+    callback_on_mock_put,
+    get_mock_put,
+    set_mock_put_proceeds,
+    set_mock_value,
+)
 
 from hyperion.exceptions import WarningException
 from hyperion.experiment_plans.oav_grid_detection_plan import (
+    CONTINUOUS_SWEEP_VELOCITY_DEG_S,
+    EdgeProfile,
     OavGridDetectionComposite,
+    fit_swept_pin_profile,
     get_min_and_max_y_of_pin,
     grid_detection_plan,
 )
@@ -85,7 +94,10 @@ def fake_devices(RE, smargon: Smargon, backlight: Backlight, test_config_files):
     "dodal.common.beamlines.beamline_utils.active_device_is_same_type",
     lambda a, b: True,
 )
-@patch("bluesky.plan_stubs.sleep", new=MagicMock())
+@patch(
+    "hyperion.experiment_plans.oav_grid_detection_plan.wait_for_oav_frame_after_move",
+    new=MagicMock(),
+)
 def test_grid_detection_plan_runs_and_triggers_snapshots(
     RE: RunEngine,
     test_config_files,
@@ -112,7 +124,10 @@ def test_grid_detection_plan_runs_and_triggers_snapshots(
     "dodal.common.beamlines.beamline_utils.active_device_is_same_type",
     lambda a, b: True,
 )
-@patch("bluesky.plan_stubs.sleep", new=MagicMock())
+@patch(
+    "hyperion.experiment_plans.oav_grid_detection_plan.wait_for_oav_frame_after_move",
+    new=MagicMock(),
+)
 async def test_grid_detection_plan_gives_warning_error_if_tip_not_found(
     RE,
     test_config_files,
@@ -148,7 +163,10 @@ async def test_grid_detection_plan_gives_warning_error_if_tip_not_found(
     "dodal.common.beamlines.beamline_utils.active_device_is_same_type",
     lambda a, b: True,
 )
-@patch("bluesky.plan_stubs.sleep", new=MagicMock())
+@patch(
+    "hyperion.experiment_plans.oav_grid_detection_plan.wait_for_oav_frame_after_move",
+    new=MagicMock(),
+)
 def test_given_when_grid_detect_then_start_position_as_expected(
     fake_devices,
     RE: RunEngine,
@@ -195,7 +213,10 @@ def test_given_when_grid_detect_then_start_position_as_expected(
     "dodal.common.beamlines.beamline_utils.active_device_is_same_type",
     lambda a, b: True,
 )
-@patch("bluesky.plan_stubs.sleep", new=MagicMock())
+@patch(
+    "hyperion.experiment_plans.oav_grid_detection_plan.wait_for_oav_frame_after_move",
+    new=MagicMock(),
+)
 @patch(
     "hyperion.experiment_plans.oav_grid_detection_plan.pre_centring_setup_oav",
     new=MagicMock(),
@@ -228,7 +249,10 @@ def test_when_grid_detection_plan_run_twice_then_values_do_not_persist_in_callba
     "dodal.common.beamlines.beamline_utils.active_device_is_same_type",
     lambda a, b: True,
 )
-@patch("bluesky.plan_stubs.sleep", new=MagicMock())
+@patch(
+    "hyperion.experiment_plans.oav_grid_detection_plan.wait_for_oav_frame_after_move",
+    new=MagicMock(),
+)
 def test_when_grid_detection_plan_run_then_ispyb_callback_gets_correct_values(
     fake_devices, RE: RunEngine, test_config_files, test_fgs_params
 ):
@@ -291,7 +315,10 @@ def test_when_grid_detection_plan_run_then_ispyb_callback_gets_correct_values(
     "dodal.common.beamlines.beamline_utils.active_device_is_same_type",
     lambda a, b: True,
 )
-@patch("bluesky.plan_stubs.sleep", new=MagicMock())
+@patch(
+    "hyperion.experiment_plans.oav_grid_detection_plan.wait_for_oav_frame_after_move",
+    new=MagicMock(),
+)
 def test_when_grid_detection_plan_run_then_grid_detection_callback_gets_correct_values(
     fake_devices, RE: RunEngine, test_config_files, test_fgs_params
 ):
@@ -340,7 +367,10 @@ def test_when_grid_detection_plan_run_then_grid_detection_callback_gets_correct_
     "dodal.common.beamlines.beamline_utils.active_device_is_same_type",
     lambda a, b: True,
 )
-@patch("bluesky.plan_stubs.sleep", new=MagicMock())
+@patch(
+    "hyperion.experiment_plans.oav_grid_detection_plan.wait_for_oav_frame_after_move",
+    new=MagicMock(),
+)
 @patch("hyperion.experiment_plans.oav_grid_detection_plan.LOGGER")
 def test_when_detected_grid_has_odd_y_steps_then_add_a_y_step_and_shift_grid(
     fake_logger: MagicMock,
@@ -454,3 +484,195 @@ def test_given_array_with_all_invalid_top_and_bottom_sections_then_min_and_max_i
     min_y, max_y = get_min_and_max_y_of_pin(top, bottom, 100)
     assert min_y == expected_min
     assert max_y == expected_max
+
+
+IMAGE_WIDTH_PX = 40
+IMAGE_HEIGHT_PX = 600
+SWEEP_TIP_X_PX = 5
+
+
+def _cylinder_edges(omega_deg: float, radius_px: float = 10) -> SampleLocation:
+    """Edges of a pin whose centre moves as 300 + 40cos(omega) + 20sin(omega)"""
+    omega = np.radians(omega_deg)
+    centre = 300 + 40 * np.cos(omega) + 20 * np.sin(omega)
+    top = np.full(IMAGE_WIDTH_PX, NONE_VALUE)
+    bottom = np.full(IMAGE_WIDTH_PX, NONE_VALUE)
+    top[SWEEP_TIP_X_PX:] = round(centre - radius_px)
+    bottom[SWEEP_TIP_X_PX:] = round(centre + radius_px)
+    return SampleLocation(SWEEP_TIP_X_PX, round(centre), top, bottom)
+
+
+def _profiles(omegas_deg, radius_px=lambda omega: 10) -> list[EdgeProfile]:
+    profiles = []
+    for omega in omegas_deg:
+        location = _cylinder_edges(omega, radius_px(omega))
+        profiles.append(
+            EdgeProfile(omega, location.tip_x, location.edge_top, location.edge_bottom)
+        )
+    return profiles
+
+
+def test_given_profiles_of_cylinder_when_fitted_then_extents_at_grid_angles_correct():
+    swept = fit_swept_pin_profile(
+        _profiles(np.linspace(-90, 0, 19)), IMAGE_HEIGHT_PX, 20
+    )
+
+    assert swept.tip_x_px == SWEEP_TIP_X_PX
+    assert swept.extent_at(0, IMAGE_HEIGHT_PX) == pytest.approx((330, 350), abs=1)
+    assert swept.extent_at(-90, IMAGE_HEIGHT_PX) == pytest.approx((270, 290), abs=1)
+
+
+def test_given_pin_thin_at_zero_when_fitted_then_extent_covers_widest_view():
+    swept = fit_swept_pin_profile(
+        _profiles(
+            np.linspace(-90, 0, 19),
+            radius_px=lambda omega: 2 + 18 * abs(np.sin(np.radians(omega))),
+        ),
+        IMAGE_HEIGHT_PX,
+        20,
+    )
+
+    assert swept.extent_at(0, IMAGE_HEIGHT_PX) == pytest.approx((320, 360), abs=1)
+
+
+def test_given_some_images_with_no_pin_when_fitted_then_they_are_ignored():
+    profiles = _profiles(np.linspace(-90, 0, 19))
+    for missed in profiles[::3]:
+        missed.tip_x_px = None
+        missed.top_edge = missed.bottom_edge = np.array([])
+
+    swept = fit_swept_pin_profile(profiles, IMAGE_HEIGHT_PX, 20)
+
+    assert swept.extent_at(0, IMAGE_HEIGHT_PX) == pytest.approx((330, 350), abs=1)
+
+
+def test_given_pin_only_seen_over_small_range_when_fitted_then_none_returned():
+    assert fit_swept_pin_profile(_profiles([-10, -5, 0]), IMAGE_HEIGHT_PX, 20) is None
+
+
+@patch(
+    "dodal.common.beamlines.beamline_utils.active_device_is_same_type",
+    lambda a, b: True,
+)
+@patch(
+    "hyperion.experiment_plans.oav_grid_detection_plan.wait_for_oav_frame_after_move",
+    new=MagicMock(),
+)
+async def test_when_continuous_grid_detection_run_then_edges_captured_in_one_sweep(
+    RE: RunEngine,
+    test_config_files,
+    fake_devices: tuple[OavGridDetectionComposite, MagicMock],
+):
+    params = OAVParameters("loopCentring", test_config_files["oav_config_json"])
+    composite, _ = fake_devices
+    omega = composite.smargon.omega
+    composite.oav.cam.array_size.array_size_y.sim_put(IMAGE_HEIGHT_PX)  # type: ignore
+    sweep_omegas = []
+
+    def start_sweep(velocity, **_):
+        if velocity == CONTINUOUS_SWEEP_VELOCITY_DEG_S:
+            # Leave the readback to move with the images, and finish when they do
+            callback_on_mock_put(omega.user_setpoint, lambda *args, **kwargs: None)
+            set_mock_put_proceeds(omega.user_setpoint, False)
+
+    async def image_during_sweep(_):
+        # Omega moves on by 10 degrees during each detection, with the image taken
+        # half way through, until the sweep ends
+        current = await omega.user_readback.get_value()
+        imaged = min(current + 5, 0)
+        sweep_omegas.append(imaged)
+        if current == 0:
+            set_mock_put_proceeds(omega.user_setpoint, True)
+        else:
+            set_mock_value(omega.user_readback, min(current + 10, 0))
+        return _cylinder_edges(imaged)
+
+    callback_on_mock_put(omega.velocity, start_sweep)
+    composite.pin_tip_detection._get_tip_and_edge_data = AsyncMock(
+        side_effect=image_during_sweep
+    )
+    top_left_ys = []
+    composite.oav.grid_snapshot.top_left_y.subscribe(
+        lambda value, **_: top_left_ys.append(value), run=False
+    )
+
+    @bpp.run_decorator()
+    def decorated():
+        yield from grid_detection_plan(
+            composite,
+            parameters=params,
+            snapshot_dir="tmp",
+            snapshot_template="test_{angle}",
+            grid_width_microns=20,
+            continuous_sweep=True,
+        )
+
+    with patch(
+        "hyperion.experiment_plans.oav_grid_detection_plan.fit_swept_pin_profile",
+        wraps=fit_swept_pin_profile,
+    ) as fit:
+        RE(decorated())
+
+    assert sweep_omegas[0] == -85
+    assert sweep_omegas[-2:] == [0, 0]
+    assert len(sweep_omegas) == 11
+    # The last image is seen twice at the end of the sweep but only used once
+    profiles: list[EdgeProfile] = fit.call_args.args[0]
+    assert [profile.omega_deg for profile in profiles] == sweep_omegas[:-1]
+    assert get_mock_put(omega.velocity).call_args_list[-1].args[0] == 1
+    # Only the first grid has its rows made even, which may shift it up half a box
+    box_size_y_px = 20 / composite.oav.parameters.micronsPerYPixel
+    assert 329 - box_size_y_px / 2 <= top_left_ys[0] <= 331
+    assert top_left_ys[1] == pytest.approx(270, abs=1)
+
+
+@patch(
+    "dodal.common.beamlines.beamline_utils.active_device_is_same_type",
+    lambda a, b: True,
+)
+@patch(
+    "hyperion.experiment_plans.oav_grid_detection_plan.wait_for_oav_frame_after_move",
+    new=MagicMock(),
+)
+@patch(
+    "hyperion.experiment_plans.oav_grid_detection_plan.capture_edge_profiles_during_sweep",
+    autospec=True,
+)
+@patch(
+    "hyperion.experiment_plans.oav_grid_detection_plan.wait_for_tip_to_be_found",
+    autospec=True,
+)
+def test_given_too_few_profiles_from_sweep_when_continuous_grid_detection_run_then_pin_detected_at_each_angle(
+    mock_wait_for_tip: MagicMock,
+    mock_capture_edge_profiles: MagicMock,
+    RE: RunEngine,
+    test_config_files,
+    fake_devices: tuple[OavGridDetectionComposite, MagicMock],
+):
+    composite, _ = fake_devices
+    params = OAVParameters("loopCentring", test_config_files["oav_config_json"])
+
+    def return_value(value):
+        def plan(*_, **__):
+            yield from []
+            return value
+
+        return plan
+
+    mock_capture_edge_profiles.side_effect = return_value(_profiles([-10, -5, 0]))
+    mock_wait_for_tip.side_effect = return_value((8, 5))
+
+    @bpp.run_decorator()
+    def decorated():
+        yield from grid_detection_plan(
+            composite,
+            parameters=params,
+            snapshot_dir="tmp",
+            snapshot_template="test_{angle}",
+            grid_width_microns=20,
+            continuous_sweep=True,
+        )
+
+    RE(decorated())
+
+    assert mock_wait_for_tip.call_count == 2
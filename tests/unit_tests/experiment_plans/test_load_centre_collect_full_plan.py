@@ -0,0 +1,175 @@
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+import pytest
+from bluesky.simulators import RunEngineSimulator, assert_message_and_return_remaining
+from bluesky.utils import Msg
+from dodal.devices.xbpm_feedback import Pause
+
+from hyperion.exceptions import WarningException
+from hyperion.experiment_plans.load_centre_collect_full_plan import (
+    load_centre_collect_full,
+)
+from hyperion.parameters.constants import CONST
+from hyperion.parameters.rotation import LoadCentreCollect, RotationScan
+
+from ...conftest import raw_params_from_file
+
+
+@pytest.fixture
+def load_centre_collect_params():
+    return LoadCentreCollect(
+        parameter_model_version="5.0.0",  # type: ignore
+        robot_load_then_centre=raw_params_from_file(
+            "tests/test_data/parameter_json_files/good_test_robot_load_params.json"
+        ),
+        rotation_scan=raw_params_from_file(
+            "tests/test_data/parameter_json_files/good_test_rotation_scan_parameters.json"
+        ),
+    )
+
+
+@patch(
+    "hyperion.experiment_plans.load_centre_collect_full_plan.rotation_scan",
+    side_effect=lambda *_, **__: iter([Msg("rotation_scan")]),
+)
+@patch(
+    "hyperion.experiment_plans.load_centre_collect_full_plan.robot_load_then_centre",
+    side_effect=lambda *_, **__: iter([Msg("robot_load_then_centre")]),
+)
+def test_load_centre_collect_full_rotates_at_centre_found_after_robot_load_and_centre(
+    robot_load_then_centre: MagicMock,
+    rotation_scan: MagicMock,
+    load_centre_collect_params: LoadCentreCollect,
+    simple_beamline,
+    sim_run_engine: RunEngineSimulator,
+):
+    sim_run_engine.add_handler(
+        "read",
+        lambda msg: {msg.obj.name: {"value": np.array([[1, 2, 3]])}},
+        "zocalo-centres_of_mass",
+    )
+    for axis, position_mm in zip("xyz", [0.1, 0.2, 0.3]):
+        sim_run_engine.add_handler(
+            "read",
+            lambda msg, position_mm=position_mm: {msg.obj.name: {"value": position_mm}},
+            f"smargon-{axis}",
+        )
+
+    msgs = sim_run_engine.simulate_plan(
+        load_centre_collect_full(simple_beamline, load_centre_collect_params)
+    )
+
+    msgs = assert_message_and_return_remaining(
+        msgs, lambda msg: msg.command == "robot_load_then_centre"
+    )
+    # The Eiger starts arming for the rotation before the centre is even read
+    msgs = assert_message_and_return_remaining(
+        msgs,
+        lambda msg: msg.command == "set"
+        and msg.obj is simple_beamline.eiger.do_arm
+        and msg.kwargs["group"] == CONST.WAIT.ROTATION_READY_FOR_DC,
+    )
+    msgs = assert_message_and_return_remaining(
+        msgs,
+        lambda msg: msg.command == "read" and msg.obj.name == "zocalo-centres_of_mass",
+    )
+    assert_message_and_return_remaining(
+        msgs, lambda msg: msg.command == "rotation_scan"
+    )
+    robot_load_then_centre.assert_called_once_with(
+        simple_beamline, load_centre_collect_params.robot_load_then_centre
+    )
+    simple_beamline.eiger.set_detector_parameters.assert_called_once_with(
+        load_centre_collect_params.rotation_scan.detector_params
+    )
+    assert rotation_scan.call_args.kwargs["arm_eiger"] is False
+    rotation: RotationScan = rotation_scan.call_args.args[1]
+    assert [rotation.x_start_um, rotation.y_start_um, rotation.z_start_um] == (
+        pytest.approx([100, 200, 300])
+    )
+    assert (
+        rotation.scan_width_deg
+        == load_centre_collect_params.rotation_scan.scan_width_deg
+    )
+
+
+@patch(
+    "hyperion.experiment_plans.load_centre_collect_full_plan.rotation_scan",
+    side_effect=lambda *_, **__: iter([Msg("rotation_scan")]),
+)
+@patch(
+    "hyperion.experiment_plans.load_centre_collect_full_plan.robot_load_then_centre",
+    side_effect=lambda *_, **__: iter([Msg("robot_load_then_centre")]),
+)
+def test_load_centre_collect_full_does_not_rotate_if_no_centre_found(
+    robot_load_then_centre: MagicMock,
+    rotation_scan: MagicMock,
+    load_centre_collect_params: LoadCentreCollect,
+    simple_beamline,
+    sim_run_engine: RunEngineSimulator,
+):
+    sim_run_engine.add_handler(
+        "read",
+        lambda msg: {msg.obj.name: {"value": np.array([])}},
+        "zocalo-centres_of_mass",
+    )
+
+    stopped = []
+    sim_run_engine.add_handler("stop", lambda msg: stopped.append(msg.obj))
+
+    with pytest.raises(WarningException):
+        sim_run_engine.simulate_plan(
+            load_centre_collect_full(simple_beamline, load_centre_collect_params)
+        )
+
+    rotation_scan.assert_not_called()
+    assert stopped == [simple_beamline.eiger]
+
+
+@patch(
+    "hyperion.experiment_plans.load_centre_collect_full_plan.rotation_scan",
+    side_effect=lambda *_, **__: iter([Msg("rotation_scan")]),
+)
+@patch(
+    "hyperion.experiment_plans.load_centre_collect_full_plan.robot_load_then_centre",
+    side_effect=lambda *_, **__: iter([Msg("robot_load_then_centre")]),
+)
+def test_load_centre_collect_full_collects_rotation_with_xbpm_feedback_paused(
+    robot_load_then_centre: MagicMock,
+    rotation_scan: MagicMock,
+    load_centre_collect_params: LoadCentreCollect,
+    simple_beamline,
+    sim_run_engine: RunEngineSimulator,
+):
+    sim_run_engine.add_handler(
+        "read",
+        lambda msg: {msg.obj.name: {"value": np.array([[1, 2, 3]])}},
+        "zocalo-centres_of_mass",
+    )
+
+    msgs = sim_run_engine.simulate_plan(
+        load_centre_collect_full(simple_beamline, load_centre_collect_params)
+    )
+
+    msgs = assert_message_and_return_remaining(
+        msgs,
+        lambda msg: msg.command == "set"
+        and msg.obj is simple_beamline.xbpm_feedback.pause_feedback
+        and msg.args[0] == Pause.PAUSE,
+    )
+    msgs = assert_message_and_return_remaining(
+        msgs,
+        lambda msg: msg.command == "set"
+        and msg.obj is simple_beamline.attenuator
+        and msg.args[0] == load_centre_collect_params.rotation_scan.transmission_frac,
+    )
+    msgs = assert_message_and_return_remaining(
+        msgs, lambda msg: msg.command == "rotation_scan"
+    )
+    assert_message_and_return_remaining(
+        msgs,
+        lambda msg: msg.command == "set"
+        and msg.obj is simple_beamline.xbpm_feedback.pause_feedback
+        and msg.args[0] == Pause.RUN,
+    )
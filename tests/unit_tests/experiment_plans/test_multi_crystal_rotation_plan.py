@@ -0,0 +1,236 @@
+import dataclasses
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+import pytest
+from bluesky.simulators import RunEngineSimulator
+from bluesky.utils import Msg
+
+from hyperion.experiment_plans.flyscan_xray_centre_plan import (
+    FlyScanXRayCentreComposite,
+)
+from hyperion.experiment_plans.multi_crystal_rotation_plan import (
+    MultiCrystalRotationComposite,
+    multi_crystal_rotation,
+    select_crystals,
+)
+from hyperion.experiment_plans.rotation_scan_plan import ROTATION_TOPUP_OPS_TIME_S
+from hyperion.external_interaction.exceptions import NoCentreFoundException
+from hyperion.parameters.constants import CONST
+from hyperion.parameters.rotation import MultiCrystalRotation, MultiRotationScan
+
+from ...conftest import raw_params_from_file
+
+
+def _result(max_count, bounding_box, centre_of_mass=(1.5, 1.5, 1.5)):
+    return {
+        "centre_of_mass": list(centre_of_mass),
+        "max_voxel": [1, 1, 1],
+        "max_count": max_count,
+        "n_voxels": 1,
+        "total_count": max_count,
+        "bounding_box": bounding_box,
+    }
+
+
+WEAK = _result(10, [[0, 0, 0], [2, 2, 2]], (1.5, 1.5, 1.5))
+STRONG = _result(100, [[5, 5, 5], [7, 7, 7]], (6.5, 2.5, 3.5))
+OVERLAPPING_STRONG = _result(50, [[5, 5, 5], [7, 7, 6]])
+
+
+@pytest.fixture
+def multi_crystal_params():
+    return MultiCrystalRotation(
+        parameter_model_version="5.0.0",  # type: ignore
+        grid_scan=raw_params_from_file(
+            "tests/test_data/parameter_json_files/good_test_parameters.json"
+        ),
+        rotation_scan=raw_params_from_file(
+            "tests/test_data/parameter_json_files/good_test_rotation_scan_parameters.json"
+        ),
+    )
+
+
+def test_select_crystals_ranks_by_strength_and_drops_overlapping_crystals():
+    assert select_crystals([WEAK, OVERLAPPING_STRONG, STRONG], 3, 0.5) == [
+        STRONG,
+        WEAK,
+    ]
+
+
+def test_select_crystals_keeps_overlapping_crystals_below_the_threshold():
+    assert select_crystals([WEAK, OVERLAPPING_STRONG, STRONG], 3, 1) == [
+        STRONG,
+        OVERLAPPING_STRONG,
+        WEAK,
+    ]
+
+
+def test_select_crystals_returns_at_most_max_crystals():
+    assert select_crystals([WEAK, STRONG], 1, 0.5) == [STRONG]
+    assert select_crystals([], 1, 0.5) == []
+
+
+def _simulate_multi_crystal_rotation(
+    sim_run_engine: RunEngineSimulator, composite, params, results
+):
+    sim_run_engine.add_handler(
+        "read", lambda _: {"values": {"value": results}}, "zocalo-results"
+    )
+    return sim_run_engine.simulate_plan(multi_crystal_rotation(composite, params))
+
+
+@patch(
+    "hyperion.experiment_plans.multi_crystal_rotation_plan.multi_rotation_scan",
+    side_effect=lambda *_, **__: iter([Msg("multi_rotation_scan")]),
+)
+@patch(
+    "hyperion.experiment_plans.multi_crystal_rotation_plan.flyscan_xray_centre",
+    side_effect=lambda *_, **__: iter([Msg("flyscan_xray_centre")]),
+)
+def test_multi_crystal_rotation_rotates_on_each_crystal_after_gridscan(
+    flyscan_xray_centre: MagicMock,
+    multi_rotation_scan: MagicMock,
+    multi_crystal_params: MultiCrystalRotation,
+    simple_beamline,
+    sim_run_engine: RunEngineSimulator,
+):
+    msgs = _simulate_multi_crystal_rotation(
+        sim_run_engine, simple_beamline, multi_crystal_params, [WEAK, STRONG]
+    )
+
+    flyscan_composite, grid_scan = flyscan_xray_centre.call_args.args
+    assert flyscan_composite.smargon is simple_beamline.smargon
+    assert grid_scan is multi_crystal_params.grid_scan
+    assert [msg.command for msg in msgs].index("flyscan_xray_centre") < [
+        msg.command for msg in msgs
+    ].index("multi_rotation_scan")
+    [arm] = [msg for msg in msgs if msg.obj is simple_beamline.eiger.do_arm]
+    assert arm.kwargs["group"] == CONST.WAIT.GRID_READY_FOR_DC
+
+    rotations: MultiRotationScan = multi_rotation_scan.call_args.args[1]
+    grid_to_motor = multi_crystal_params.grid_scan.FGS_params
+    for scan, crystal in zip(rotations.single_rotation_scans, [STRONG, WEAK]):
+        expected = grid_to_motor.grid_position_to_motor_position(
+            np.array(crystal["centre_of_mass"]) - 0.5
+        )
+        assert [scan.x_start_um, scan.y_start_um, scan.z_start_um] == pytest.approx(
+            expected * 1000
+        )
+        assert scan.scan_width_deg == multi_crystal_params.rotation_scan.scan_width_deg
+    assert len(rotations.rotation_scans) == 2
+
+
+@patch(
+    "hyperion.experiment_plans.multi_crystal_rotation_plan.multi_rotation_scan",
+    side_effect=lambda *_, **__: iter([Msg("multi_rotation_scan")]),
+)
+@patch(
+    "hyperion.experiment_plans.multi_crystal_rotation_plan.flyscan_xray_centre",
+    side_effect=lambda *_, **__: iter([Msg("flyscan_xray_centre")]),
+)
+def test_multi_crystal_rotation_only_rotates_on_crystals_within_time_budget(
+    flyscan_xray_centre: MagicMock,
+    multi_rotation_scan: MagicMock,
+    multi_crystal_params: MultiCrystalRotation,
+    simple_beamline,
+    sim_run_engine: RunEngineSimulator,
+):
+    rotation = multi_crystal_params.rotation_scan
+    multi_crystal_params.time_budget_s = 1.5 * (
+        rotation.num_images * rotation.exposure_time_s + ROTATION_TOPUP_OPS_TIME_S
+    )
+    _simulate_multi_crystal_rotation(
+        sim_run_engine, simple_beamline, multi_crystal_params, [WEAK, STRONG]
+    )
+
+    rotations: MultiRotationScan = multi_rotation_scan.call_args.args[1]
+    assert len(rotations.rotation_scans) == 1
+
+
+@patch(
+    "hyperion.experiment_plans.multi_crystal_rotation_plan.multi_rotation_scan",
+)
+@patch(
+    "hyperion.experiment_plans.multi_crystal_rotation_plan.flyscan_xray_centre",
+    side_effect=lambda *_, **__: iter([Msg("flyscan_xray_centre")]),
+)
+def test_multi_crystal_rotation_with_no_crystals_raises_without_rotating(
+    flyscan_xray_centre: MagicMock,
+    multi_rotation_scan: MagicMock,
+    multi_crystal_params: MultiCrystalRotation,
+    simple_beamline,
+    sim_run_engine: RunEngineSimulator,
+):
+    with pytest.raises(NoCentreFoundException):
+        _simulate_multi_crystal_rotation(
+            sim_run_engine, simple_beamline, multi_crystal_params, []
+        )
+    multi_rotation_scan.assert_not_called()
+
+
+@pytest.fixture
+def multi_crystal_composite(
+    fake_fgs_composite: FlyScanXRayCentreComposite, detector_motion, oav
+):
+    return MultiCrystalRotationComposite(
+        detector_motion=detector_motion,
+        oav=oav,
+        **{
+            field.name: getattr(fake_fgs_composite, field.name)
+            for field in dataclasses.fields(FlyScanXRayCentreComposite)
+        },
+    )
+
+
+@patch(
+    "hyperion.experiment_plans.multi_crystal_rotation_plan.multi_rotation_scan",
+    side_effect=lambda *_, **__: iter([Msg("multi_rotation_scan")]),
+)
+@patch(
+    "hyperion.experiment_plans.flyscan_xray_centre_plan.run_gridscan",
+    side_effect=lambda *_, **__: iter([Msg("run_gridscan")]),
+)
+def test_multi_crystal_rotation_runs_flyscan_on_its_devices(
+    run_gridscan: MagicMock,
+    multi_rotation_scan: MagicMock,
+    multi_crystal_composite: MultiCrystalRotationComposite,
+    multi_crystal_params: MultiCrystalRotation,
+    sim_run_engine: RunEngineSimulator,
+):
+    sim_run_engine.add_read_handler_for(
+        multi_crystal_composite.zocalo.centres_of_mass, [np.array([6, 6, 6])]
+    )
+    sim_run_engine.add_read_handler_for(
+        multi_crystal_composite.zocalo.bbox_sizes, [np.array([2, 2, 2])]
+    )
+    msgs = _simulate_multi_crystal_rotation(
+        sim_run_engine, multi_crystal_composite, multi_crystal_params, [STRONG]
+    )
+
+    flyscan_composite = run_gridscan.call_args.args[0]
+    assert flyscan_composite.sample_motors is multi_crystal_composite.smargon
+    assert [msg.command for msg in msgs].index("run_gridscan") < [
+        msg.command for msg in msgs
+    ].index("multi_rotation_scan")
+    moves = [
+        msg
+        for msg in msgs
+        if msg.command == "set" and msg.kwargs.get("group") == "move_x_y_z"
+    ]
+    assert {msg.obj.name for msg in moves} == {"smargon-x", "smargon-y", "smargon-z"}
+
+
+def test_multi_crystal_rotation_rejects_stub_offsets(
+    multi_crystal_params: MultiCrystalRotation,
+    simple_beamline,
+    sim_run_engine: RunEngineSimulator,
+):
+    with patch(
+        "hyperion.external_interaction.config_server.FeatureFlags.update_self_from_server"
+    ):
+        multi_crystal_params.grid_scan.features.set_stub_offsets = True
+        with pytest.raises(ValueError):
+            _simulate_multi_crystal_rotation(
+                sim_run_engine, simple_beamline, multi_crystal_params, [STRONG]
+            )
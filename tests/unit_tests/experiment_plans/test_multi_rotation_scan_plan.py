@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import json
+import os
 import shutil
 from itertools import takewhile
 from math import ceil
@@ -14,12 +15,14 @@ from bluesky.run_engine import RunEngine
 from bluesky.simulators import RunEngineSimulator, assert_message_and_return_remaining
 from dodal.devices.oav.oav_parameters import OAVParameters
 from dodal.devices.synchrotron import SynchrotronMode
+from dodal.devices.zebra import RotationDirection
 from ophyd_async.core import set_mock_value
 
 from hyperion.experiment_plans.rotation_scan_plan import (
     RotationScanComposite,
     calculate_motion_profile,
     multi_rotation_scan,
+    order_sweeps_for_omega_travel,
 )
 from hyperion.external_interaction.callbacks.rotation.ispyb_callback import (
     RotationISPyBCallback,
@@ -77,13 +80,12 @@ async def test_multi_rotation_plan_runs_multiple_plans_in_one_arm(
     )
 
     msgs = assert_message_and_return_remaining(
-        msgs, lambda msg: msg.command == "stage" and msg.obj.name == "eiger"
+        msgs, lambda msg: msg.command == "set" and msg.obj.name == "eiger_do_arm"
     )[1:]
 
     msgs_within_arming = list(
         takewhile(
-            lambda msg: msg.command != "unstage"
-            and (not msg.obj or msg.obj.name != "eiger"),
+            lambda msg: not (msg.command == "unstage" and msg.obj.name == "eiger"),
             msgs,
         )
     )
@@ -136,6 +138,91 @@ async def test_multi_rotation_plan_runs_multiple_plans_in_one_arm(
         )
 
 
+def test_order_sweeps_for_omega_travel_flips_sweeps_to_start_where_last_ended(
+    test_multi_rotation_params: MultiRotationScan,
+):
+    test_multi_rotation_params.rotation_scans = [
+        test_multi_rotation_params.rotation_scans[0].copy(
+            update={"omega_start_deg": start, "scan_width_deg": 90}
+        )
+        for start in [0, 270, 90]
+    ]
+
+    ordered, saved_deg = order_sweeps_for_omega_travel(
+        test_multi_rotation_params, 0, 0, 120
+    )
+
+    # Each sweep now starts near where the one before ended
+    assert [
+        (scan.omega_start_deg, scan.rotation_direction)
+        for scan in ordered.rotation_scans
+    ] == [
+        (0, RotationDirection.NEGATIVE),
+        (0, RotationDirection.POSITIVE),
+        (180, RotationDirection.POSITIVE),
+    ]
+    assert [scan.nexus_vds_start_img for scan in ordered.rotation_scans] == [
+        0,
+        900,
+        1800,
+    ]
+    # Rather than rewinding from -90 to 270 and then from 180 to 90, omega moves back
+    # from -90 to 0 and on from 90 to 180
+    assert saved_deg == pytest.approx((360 + 90) - (90 + 90))
+
+
+def test_order_sweeps_for_omega_travel_keeps_order_if_nothing_saved(
+    test_multi_rotation_params: MultiRotationScan,
+):
+    test_multi_rotation_params.rotation_scans = [
+        test_multi_rotation_params.rotation_scans[0].copy(
+            update={"omega_start_deg": start, "scan_width_deg": 90}
+        )
+        for start in [0, -90]
+    ]
+
+    ordered, saved_deg = order_sweeps_for_omega_travel(
+        test_multi_rotation_params, 0, 0, 120
+    )
+
+    assert ordered is test_multi_rotation_params
+    assert saved_deg == 0
+
+
+def test_multi_rotation_plan_minimising_omega_travel_rotates_in_new_order(
+    fake_create_rotation_devices: RotationScanComposite,
+    test_multi_rotation_params: MultiRotationScan,
+    sim_run_engine_for_rotation: RunEngineSimulator,
+    oav_parameters_for_rotation: OAVParameters,
+):
+    test_multi_rotation_params.minimise_omega_travel = True
+    sim_run_engine_for_rotation.add_handler(
+        "read", lambda msg: {"smargon-omega": {"value": 200}}, "smargon-omega"
+    )
+    msgs = sim_run_engine_for_rotation.simulate_plan(
+        multi_rotation_scan(
+            fake_create_rotation_devices,
+            test_multi_rotation_params,
+            oav_parameters_for_rotation,
+        )
+    )
+
+    rotations = [
+        RotationScan.parse_raw(msg.kwargs["hyperion_parameters"])
+        for msg in msgs
+        if msg.command == "open_run"
+        and msg.kwargs["subplan_name"] == CONST.PLAN.ROTATION_OUTER
+    ]
+    # Starting with the sweep closest to where omega is
+    assert [(scan.omega_start_deg, scan.rotation_direction) for scan in rotations] == [
+        (180, RotationDirection.NEGATIVE),
+        (0, RotationDirection.NEGATIVE),
+        (270, RotationDirection.POSITIVE),
+    ]
+    eiger_params = fake_create_rotation_devices.eiger.detector_params
+    assert eiger_params and eiger_params.omega_start == 180
+
+
 def _run_multi_rotation_plan(
     RE: RunEngine,
     params: MultiRotationScan,
@@ -199,8 +286,8 @@ def test_full_multi_rotation_plan_docs_emitted(
         DocumentCapturer.assert_events_and_data_in_order(
             events,
             [
-                ["eiger_odin_file_writer_id"],
                 ["undulator-current_gap", "synchrotron-synchrotron_mode", "smargon-x"],
+                ["eiger_odin_file_writer_id"],
                 [
                     "attenuator-actual_transmission",
                     "flux_flux_reading",
@@ -363,6 +450,73 @@ def test_full_multi_rotation_plan_nexus_files_written_correctly(
             assert tuple(omega_vec) == (1.0 * scan.rotation_direction.multiplier, 0, 0)
 
 
+def test_full_multi_rotation_plan_combined_nexus_file_written_correctly(
+    RE: RunEngine,
+    test_multi_rotation_params: MultiRotationScan,
+    fake_create_rotation_devices: RotationScanComposite,
+    oav_parameters_for_rotation: OAVParameters,
+    tmpdir,
+):
+    multi_params = test_multi_rotation_params
+    multi_params.file_name = "multi_rotation_test"
+    multi_params.storage_directory = f"{tmpdir}"
+    multi_params.write_combined_nexus = True
+    meta_data_run_number = multi_params.detector_params.run_number
+    scans = list(multi_params.single_rotation_scans)
+    reference_direction = scans[0].rotation_direction.multiplier
+
+    _run_multi_rotation_plan(
+        RE,
+        multi_params,
+        fake_create_rotation_devices,
+        [RotationNexusFileCallback()],
+        oav_parameters_for_rotation,
+    )
+
+    combined_filename = (
+        f"{tmpdir}/multi_rotation_test_{meta_data_run_number}_combined.nxs"
+    )
+    with h5py.File(combined_filename, "r") as combined_nexus:
+        assert isinstance(dataset := combined_nexus["entry/data/data"], h5py.Dataset)
+        assert dataset.is_virtual
+        assert dataset.shape[0] == multi_params.num_images
+
+        omega = combined_nexus["/entry/sample/sample_omega/omega"][:]  # type: ignore
+        chi = combined_nexus["/entry/sample/sample_chi/chi"][:]  # type: ignore
+        for i, scan in enumerate(scans):
+            start, end = multi_params.scan_indices[i], multi_params.scan_indices[i + 1]
+            direction = scan.rotation_direction.multiplier * reference_direction
+            assert np.allclose(
+                omega[start:end], np.array(scan.scan_points["omega"]) * direction
+            )
+            assert np.all(chi[start:end] == scan.chi_start_deg)
+
+        sweeps = combined_nexus["/entry/sample/sweeps"]
+        assert list(sweeps["start_index"][:]) == multi_params.scan_indices[:-1]  # type: ignore
+        assert list(sweeps["rotation_direction"][:]) == [  # type: ignore
+            scan.rotation_direction.multiplier for scan in scans
+        ]
+    assert not os.path.exists(f"{combined_filename}.tmp")
+
+
+def test_multi_rotation_plan_does_not_write_combined_nexus_file_by_default(
+    RE: RunEngine,
+    test_multi_rotation_params: MultiRotationScan,
+    fake_create_rotation_devices: RotationScanComposite,
+    oav_parameters_for_rotation: OAVParameters,
+    tmpdir,
+):
+    test_multi_rotation_params.storage_directory = f"{tmpdir}"
+    _run_multi_rotation_plan(
+        RE,
+        test_multi_rotation_params,
+        fake_create_rotation_devices,
+        [RotationNexusFileCallback()],
+        oav_parameters_for_rotation,
+    )
+    assert not [f for f in os.listdir(tmpdir) if f.endswith("_combined.nxs")]
+
+
 @patch("hyperion.external_interaction.callbacks.rotation.ispyb_callback.StoreInIspyb")
 def test_full_multi_rotation_plan_ispyb_called_correctly(
     mock_ispyb_store: MagicMock,
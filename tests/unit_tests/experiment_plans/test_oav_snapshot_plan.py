@@ -12,9 +12,13 @@ from dodal.devices.oav.utils import ColorMode
 from dodal.devices.smargon import Smargon
 
 from hyperion.experiment_plans.oav_snapshot_plan import (
+    OAV_SNAPSHOT_ON_THE_FLY_GROUP,
     OAV_SNAPSHOT_SETUP_SHOT,
+    OAV_SNAPSHOT_TIME_S,
+    OMEGA_SNAPSHOT_SPREAD_DEG,
     OavSnapshotComposite,
     oav_snapshot_plan,
+    oav_snapshots_on_the_fly_plan,
 )
 from hyperion.parameters.components import WithSnapshot
 from hyperion.parameters.constants import DocDescriptorNames
@@ -140,3 +144,182 @@ def test_oav_snapshot_plan_issues_rotations_and_generates_events(
         msgs = assert_message_and_return_remaining(
             msgs, lambda msg: msg.command == "save"
         )
+
+
+@patch("hyperion.experiment_plans.oav_snapshot_plan.datetime", spec=datetime)
+def test_oav_snapshots_on_the_fly_triggered_as_omega_passes_each_angle(
+    mock_datetime, oav_snapshot_params, oav_snapshot_composite, sim_run_engine
+):
+    mock_datetime.now.return_value = datetime.fromisoformat("2024-06-07T10:06:23")
+    omega_readings = iter(
+        [10, 0, 0, 0, 1, 50, 100.2, 101, 150, 200, 201.5, 260, 275, 276]
+    )
+    sim_run_engine.add_handler(
+        "read",
+        lambda msg: {"smargon-omega": {"value": next(omega_readings)}},
+        "smargon-omega",
+    )
+    msgs = sim_run_engine.simulate_plan(
+        oav_snapshots_on_the_fly_plan(
+            oav_snapshot_composite,
+            oav_snapshot_params,
+            OAVParameters(oav_config_json="tests/test_data/test_OAVCentring.json"),
+            end_omega_deg=300,
+            max_omega_velocity_deg_s=120,
+        )
+    )
+
+    # Omega starts just past 0 so goes back to it, then slows down and doesn't stop
+    # until 300
+    msgs = assert_message_and_return_remaining(
+        msgs,
+        lambda msg: msg.command == "set"
+        and msg.obj.name == "smargon-omega"
+        and msg.args[0] == 0,
+    )
+    msgs = assert_message_and_return_remaining(
+        msgs,
+        lambda msg: msg.command == "set"
+        and msg.obj.name == "smargon-omega-velocity"
+        and msg.args[0] == OMEGA_SNAPSHOT_SPREAD_DEG / OAV_SNAPSHOT_TIME_S,
+    )
+    msgs = assert_message_and_return_remaining(
+        msgs,
+        lambda msg: msg.command == "set"
+        and msg.obj.name == "smargon-omega"
+        and msg.args[0] == 300
+        and msg.kwargs["group"] == OAV_SNAPSHOT_ON_THE_FLY_GROUP,
+    )
+    assert not [
+        msg
+        for msg in msgs[1:]
+        if msg.command == "set" and msg.obj.name == "smargon-omega"
+    ]
+    for angle in [0, 90, 180, 270]:
+        msgs = assert_message_and_return_remaining(
+            msgs,
+            lambda msg: msg.command == "set"
+            and msg.obj.name == "oav_snapshot_filename"
+            and msg.args[0] == f"100623_oav_snapshot_{angle}",
+        )
+        msgs = assert_message_and_return_remaining(
+            msgs,
+            lambda msg: msg.command == "trigger" and msg.obj.name == "oav_snapshot",
+        )
+        msgs = assert_message_and_return_remaining(
+            msgs,
+            lambda msg: msg.command == "create"
+            and msg.kwargs["name"]
+            == DocDescriptorNames.OAV_ROTATION_SNAPSHOT_TRIGGERED,
+        )
+        msgs = assert_message_and_return_remaining(
+            msgs, lambda msg: msg.command == "read" and msg.obj.name == "oav_snapshot"
+        )
+        msgs = assert_message_and_return_remaining(
+            msgs,
+            lambda msg: msg.command == "read" and msg.obj.name == "oav_snapshot_omega",
+        )
+    msgs = assert_message_and_return_remaining(
+        msgs,
+        lambda msg: msg.command == "wait"
+        and msg.kwargs["group"] == OAV_SNAPSHOT_ON_THE_FLY_GROUP,
+    )
+    assert_message_and_return_remaining(
+        msgs,
+        lambda msg: msg.command == "set"
+        and msg.obj.name == "smargon-omega-velocity"
+        and msg.args[0] == 120,
+    )
+
+
+def test_oav_snapshots_on_the_fly_record_omega_midway_through_each_snapshot(
+    oav_snapshot_params, oav_snapshot_composite, sim_run_engine
+):
+    omega_readings = iter(
+        [10, 0, 0, 0, 1, 50, 100.2, 101, 150, 200, 201.5, 260, 275, 276]
+    )
+    sim_run_engine.add_handler(
+        "read",
+        lambda msg: {"smargon-omega": {"value": next(omega_readings)}},
+        "smargon-omega",
+    )
+    snapshot_omegas = []
+    sim_run_engine.add_handler(
+        "read",
+        lambda msg: snapshot_omegas.append(msg.obj._backend._value),
+        "oav_snapshot_omega",
+    )
+    msgs = sim_run_engine.simulate_plan(
+        oav_snapshots_on_the_fly_plan(
+            oav_snapshot_composite,
+            oav_snapshot_params,
+            OAVParameters(oav_config_json="tests/test_data/test_OAVCentring.json"),
+            end_omega_deg=300,
+            max_omega_velocity_deg_s=120,
+        )
+    )
+
+    assert snapshot_omegas == [0.5, 100.6, 200.75, 275.5]
+    # Omega was already at 0 but had to be waited on to reach every other angle
+    assert len([msg for msg in msgs if msg.command == "wait_for"]) == 3
+
+
+def test_oav_snapshots_on_the_fly_go_backwards_if_that_ends_closer(
+    oav_snapshot_params, oav_snapshot_composite, sim_run_engine
+):
+    omega_readings = iter([280, *range(280, -100, -25)])
+    sim_run_engine.add_handler(
+        "read",
+        lambda msg: {"smargon-omega": {"value": next(omega_readings)}},
+        "smargon-omega",
+    )
+    snapshot_omegas = []
+    sim_run_engine.add_handler(
+        "read",
+        lambda msg: snapshot_omegas.append(msg.obj._backend._value),
+        "oav_snapshot_omega",
+    )
+    msgs = sim_run_engine.simulate_plan(
+        oav_snapshots_on_the_fly_plan(
+            oav_snapshot_composite,
+            oav_snapshot_params,
+            OAVParameters(oav_config_json="tests/test_data/test_OAVCentring.json"),
+            end_omega_deg=45,
+            max_omega_velocity_deg_s=120,
+        )
+    )
+
+    assert [
+        msg.args[0]
+        for msg in msgs
+        if msg.command == "set" and msg.obj.name == "smargon-omega"
+    ] == [0]
+    assert [
+        msg.args[0].split("_oav_snapshot_")[1]
+        for msg in msgs
+        if msg.command == "set" and msg.obj.name == "oav_snapshot_filename"
+    ] == ["270", "180", "90", "0"]
+    assert snapshot_omegas == [242.5, 167.5, 92.5, 17.5]
+
+
+def test_oav_snapshots_on_the_fly_time_out_if_omega_never_reaches_angle(
+    oav_snapshot_params, oav_snapshot_composite, sim_run_engine
+):
+    sim_run_engine.add_handler(
+        "read", lambda msg: {"smargon-omega": {"value": 0}}, "smargon-omega"
+    )
+
+    def time_out(msg):
+        raise TimeoutError("smargon-omega didn't match")
+
+    sim_run_engine.add_handler("wait_for", time_out)
+    with pytest.raises(TimeoutError):
+        sim_run_engine.simulate_plan(
+            oav_snapshots_on_the_fly_plan(
+                oav_snapshot_composite,
+                oav_snapshot_params,
+                OAVParameters(oav_config_json="tests/test_data/test_OAVCentring.json"),
+                end_omega_deg=300,
+                max_omega_velocity_deg_s=120,
+            )
+        )
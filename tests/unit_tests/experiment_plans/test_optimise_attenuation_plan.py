@@ -18,6 +18,7 @@ from hyperion.experiment_plans.optimise_attenuation_plan import (
     deadtime_optimisation,
     is_counts_within_target,
     is_deadtime_optimised,
+    model_transmission,
     total_counts_optimisation,
 )
 from hyperion.log import LOGGER
@@ -221,12 +222,14 @@ def test_is_counts_within_target_is_false(total_count, lower_limit, upper_limit)
 def test_total_count_exception_raised_after_max_cycles_reached(
     RE: RunEngine, fake_composite_mocked_sets: OptimizeAttenuationComposite
 ):
-    optimise_attenuation_plan.is_counts_within_target = MagicMock(return_value=False)
     set_mock_value(
         fake_composite_mocked_sets.xspress3mini.dt_corrected_latest_mca[1],
         np.array([1, 1, 1, 1, 1, 1]),
     )
-    with pytest.raises(AttenuationOptimisationFailedException):
+    with pytest.raises(AttenuationOptimisationFailedException), patch(
+        "hyperion.experiment_plans.optimise_attenuation_plan.is_counts_within_target",
+        MagicMock(return_value=False),
+    ):
         RE(
             total_counts_optimisation(
                 fake_composite_mocked_sets, 1, 0, 10, 0, 5, 2, 1, 0, 0
@@ -282,6 +285,165 @@ def test_total_count_calc_new_transmission_raises_error_on_low_ransmission(
         )
 
 
+@pytest.mark.parametrize(
+    "exposures, too_low, too_high, expected_transmission",
+    [
+        ({0.1: 100, 0.2: 200}, None, None, 0.15),
+        ({0.1: 100, 0.4: 200}, 0.1, 0.4, 0.25),
+        ({0.1: 100, 0.4: 101}, 0.1, 0.4, 0.2),
+        ({0.1: 0}, None, None, None),
+    ],
+)
+def test_model_transmission_steps_towards_target(
+    exposures, too_low, too_high, expected_transmission
+):
+    assert model_transmission(exposures, 150, too_low, too_high) == (
+        pytest.approx(expected_transmission)
+        if expected_transmission is not None
+        else None
+    )
+
+
+def test_total_counts_optimisation_fits_all_exposures_to_converge(
+    RE: RunEngine, fake_composite_mocked_sets: OptimizeAttenuationComposite
+):
+    exposures = []
+
+    def counts_rise_with_transmission(transmission):
+        exposures.append(transmission)
+        set_mock_value(
+            fake_composite_mocked_sets.xspress3mini.dt_corrected_latest_mca[1],
+            np.array([1e6 * transmission + 50, 1e6]),
+        )
+        return get_good_status()
+
+    fake_composite_mocked_sets.attenuator.set = counts_rise_with_transmission
+
+    RE(
+        total_counts_optimisation(
+            fake_composite_mocked_sets,
+            transmission=1e-4,
+            low_roi=0,
+            high_roi=1,
+            lower_count_limit=1000,
+            upper_count_limit=2000,
+            target_count=1500,
+            max_cycles=10,
+            upper_transmission_limit=0.1,
+            lower_transmission_limit=1e-6,
+        )
+    )
+
+    assert exposures == pytest.approx([1e-4, 1e-3])
+
+
+def _set_deadtime(composite: OptimizeAttenuationComposite, deadtime: float):
+    total_time = 100_000_000
+    set_mock_value(composite.xspress3mini.channels[1].total_time, total_time)
+    set_mock_value(
+        composite.xspress3mini.channels[1].reset_ticks, int(total_time * deadtime)
+    )
+
+
+def test_deadtime_optimisation_takes_fewer_exposures_than_fixed_increments(
+    RE: RunEngine, fake_composite_mocked_sets: OptimizeAttenuationComposite
+):
+    exposures = []
+
+    def deadtime_rises_with_transmission(transmission):
+        exposures.append(transmission)
+        _set_deadtime(fake_composite_mocked_sets, 0.01 * transmission + 1e-5)
+        return get_good_status()
+
+    fake_composite_mocked_sets.attenuator.set = deadtime_rises_with_transmission
+
+    optimised_transmission = RE(
+        deadtime_optimisation(
+            fake_composite_mocked_sets,
+            transmission=1e-3,
+            increment=2,
+            deadtime_threshold=0.002,
+            max_cycles=10,
+            upper_transmission_limit=1,
+            lower_transmission_limit=1e-6,
+        )
+    ).plan_result  # type: ignore
+
+    assert exposures == pytest.approx([1e-3, 0.1])
+    assert optimised_transmission == pytest.approx(0.1)
+
+
+def test_deadtime_optimisation_steps_back_inside_bracket_after_overshooting(
+    RE: RunEngine, fake_composite_mocked_sets: OptimizeAttenuationComposite
+):
+    exposures = []
+
+    def deadtime_rises_steeply_with_transmission(transmission):
+        exposures.append(transmission)
+        _set_deadtime(fake_composite_mocked_sets, 0.2 * transmission**2 + 1e-4)
+        return get_good_status()
+
+    fake_composite_mocked_sets.attenuator.set = deadtime_rises_steeply_with_transmission
+
+    optimised_transmission = RE(
+        deadtime_optimisation(
+            fake_composite_mocked_sets,
+            transmission=0.01,
+            increment=2,
+            deadtime_threshold=0.002,
+            max_cycles=10,
+            upper_transmission_limit=1,
+            lower_transmission_limit=1e-6,
+        )
+    ).plan_result  # type: ignore
+
+    # Fixed increments of 2 would take 6 exposures
+    assert len(exposures) == 3
+    assert 0.01 < exposures[2] < exposures[1]
+    assert 0.2 * optimised_transmission**2 + 1e-4 <= 0.002
+
+
+def test_optimise_attenuation_plan_starts_from_previous_result_for_same_sample(
+    RE: RunEngine, fake_composite_mocked_sets: OptimizeAttenuationComposite
+):
+    exposures = []
+
+    def counts_rise_with_transmission(transmission):
+        exposures.append(transmission)
+        set_mock_value(
+            fake_composite_mocked_sets.xspress3mini.dt_corrected_latest_mca[1],
+            np.array([1e6 * transmission]),
+        )
+        return get_good_status()
+
+    fake_composite_mocked_sets.attenuator.set = counts_rise_with_transmission
+
+    def optimise(sample_id):
+        RE(
+            optimise_attenuation_plan.optimise_attenuation_plan(
+                fake_composite_mocked_sets,
+                optimisation_type="total_counts",
+                low_roi=0,
+                high_roi=1,
+                initial_transmission=1e-4,
+                target_count=1500,
+                lower_count_limit=1000,
+                upper_count_limit=2000,
+                sample_id=sample_id,
+                energy_kev=12.7,
+            )
+        )
+
+    with patch.dict(optimise_attenuation_plan._OPTIMISED_TRANSMISSIONS, clear=True):
+        optimise(1)
+        # One exposure to optimise, then the final set
+        assert exposures[-3:] == pytest.approx([1e-4, 1.5e-3, 1.5e-3])
+        optimise(1)
+        assert exposures[-2:] == pytest.approx([1.5e-3, 1.5e-3])
+        optimise(2)
+        assert exposures[-3] == pytest.approx(1e-4)
+
+
 def test_total_counts_gets_within_target(
     RE: RunEngine,
     fake_composite_mocked_sets: OptimizeAttenuationComposite,
@@ -17,6 +17,7 @@ from hyperion.exceptions import WarningException
 from hyperion.experiment_plans.pin_tip_centring_plan import (
     DEFAULT_STEP_SIZE,
     PinTipCentringComposite,
+    estimate_off_screen_tip_px,
     move_pin_into_view,
     pin_tip_centre_plan,
     trigger_and_return_pin_tip,
@@ -37,7 +38,10 @@ def mock_pin_tip(pin_tip: PinTipDetection):
     return pin_tip
 
 
-@patch("hyperion.experiment_plans.pin_tip_centring_plan.bps.sleep", new=MagicMock())
+@patch(
+    "hyperion.experiment_plans.pin_tip_centring_plan.wait_for_oav_frame_after_move",
+    new=MagicMock(),
+)
 async def test_given_the_pin_tip_is_already_in_view_when_get_tip_into_view_then_tip_returned_and_smargon_not_moved(
     smargon: Smargon, oav: OAV, RE: RunEngine, mock_pin_tip: PinTipDetection
 ):
@@ -46,7 +50,7 @@ async def test_given_the_pin_tip_is_already_in_view_when_get_tip_into_view_then_
 
     mock_pin_tip.trigger = MagicMock(return_value=NullStatus())
 
-    result = RE(move_pin_into_view(mock_pin_tip, smargon))
+    result = RE(move_pin_into_view(mock_pin_tip, smargon, oav))
 
     mock_pin_tip.trigger.assert_called_once()
     assert await smargon.x.user_readback.get_value() == 0
@@ -54,7 +58,10 @@ async def test_given_the_pin_tip_is_already_in_view_when_get_tip_into_view_then_
     assert result.plan_result == (100, 200)
 
 
-@patch("hyperion.experiment_plans.pin_tip_centring_plan.bps.sleep", new=MagicMock())
+@patch(
+    "hyperion.experiment_plans.pin_tip_centring_plan.wait_for_oav_frame_after_move",
+    new=MagicMock(),
+)
 async def test_given_no_tip_found_but_will_be_found_when_get_tip_into_view_then_smargon_moved_positive_and_tip_returned(
     smargon: Smargon, oav: OAV, RE: RunEngine, mock_pin_tip: PinTipDetection
 ):
@@ -72,14 +79,17 @@ async def test_given_no_tip_found_but_will_be_found_when_get_tip_into_view_then_
         set_pin_tip_when_x_moved, x_user_setpoint.side_effect
     )
 
-    result = RE(move_pin_into_view(mock_pin_tip, smargon))
+    result = RE(move_pin_into_view(mock_pin_tip, smargon, oav))
 
     assert await smargon.x.user_readback.get_value() == DEFAULT_STEP_SIZE
     assert isinstance(result, RunEngineResult)
     assert result.plan_result == (100, 200)
 
 
-@patch("hyperion.experiment_plans.pin_tip_centring_plan.bps.sleep", new=MagicMock())
+@patch(
+    "hyperion.experiment_plans.pin_tip_centring_plan.wait_for_oav_frame_after_move",
+    new=MagicMock(),
+)
 async def test_given_tip_at_zero_but_will_be_found_when_get_tip_into_view_then_smargon_moved_negative_and_tip_returned(
     smargon: Smargon, oav: OAV, RE: RunEngine, mock_pin_tip: PinTipDetection
 ):
@@ -101,7 +111,7 @@ async def test_given_tip_at_zero_but_will_be_found_when_get_tip_into_view_then_s
         set_pin_tip_when_x_moved, x_user_setpoint.side_effect
     )
 
-    result = RE(move_pin_into_view(mock_pin_tip, smargon))
+    result = RE(move_pin_into_view(mock_pin_tip, smargon, oav))
 
     assert await smargon.x.user_readback.get_value() == -DEFAULT_STEP_SIZE
     assert result.plan_result == (100, 200)  # type: ignore
@@ -130,7 +140,10 @@ def test_trigger_and_return_pin_tip_works_for_ophyd_pin_tip_detection(
 
 
 @patch("hyperion.experiment_plans.pin_tip_centring_plan.trigger_and_return_pin_tip")
-@patch("hyperion.experiment_plans.pin_tip_centring_plan.bps.sleep", new=MagicMock())
+@patch(
+    "hyperion.experiment_plans.pin_tip_centring_plan.wait_for_oav_frame_after_move",
+    new=MagicMock(),
+)
 async def test_pin_tip_starting_near_negative_edge_doesnt_exceed_limit(
     mock_trigger_and_return_tip: MagicMock,
     smargon: Smargon,
@@ -147,13 +160,16 @@ async def test_pin_tip_starting_near_negative_edge_doesnt_exceed_limit(
     set_mock_value(smargon.x.user_readback, -1.8)
 
     with pytest.raises(WarningException):
-        RE(move_pin_into_view(pin_tip, smargon, max_steps=1))
+        RE(move_pin_into_view(pin_tip, smargon, oav, max_steps=1))
 
     assert await smargon.x.user_readback.get_value() == -2
 
 
 @patch("hyperion.experiment_plans.pin_tip_centring_plan.trigger_and_return_pin_tip")
-@patch("hyperion.experiment_plans.pin_tip_centring_plan.bps.sleep", new=MagicMock())
+@patch(
+    "hyperion.experiment_plans.pin_tip_centring_plan.wait_for_oav_frame_after_move",
+    new=MagicMock(),
+)
 async def test_pin_tip_starting_near_positive_edge_doesnt_exceed_limit(
     mock_trigger_and_return_pin_tip: MagicMock,
     smargon: Smargon,
@@ -169,12 +185,15 @@ async def test_pin_tip_starting_near_positive_edge_doesnt_exceed_limit(
     set_mock_value(smargon.x.user_readback, 1.8)
 
     with pytest.raises(WarningException):
-        RE(move_pin_into_view(pin_tip, smargon, max_steps=1))
+        RE(move_pin_into_view(pin_tip, smargon, oav, max_steps=1))
 
     assert await smargon.x.user_readback.get_value() == 2
 
 
-@patch("hyperion.experiment_plans.pin_tip_centring_plan.bps.sleep", new=MagicMock())
+@patch(
+    "hyperion.experiment_plans.pin_tip_centring_plan.wait_for_oav_frame_after_move",
+    new=MagicMock(),
+)
 async def test_given_no_tip_found_ever_when_get_tip_into_view_then_smargon_moved_positive_and_exception_thrown(
     smargon: Smargon, oav: OAV, RE: RunEngine, pin_tip: PinTipDetection
 ):
@@ -184,11 +203,103 @@ async def test_given_no_tip_found_ever_when_get_tip_into_view_then_smargon_moved
     set_mock_value(smargon.x.user_readback, 0)
 
     with pytest.raises(WarningException):
-        RE(move_pin_into_view(pin_tip, smargon))
+        RE(move_pin_into_view(pin_tip, smargon, oav))
 
     assert await smargon.x.user_readback.get_value() == 1
 
 
+def _pin_edges(width_at_left_px: float, widening_per_px: float, in_view_px=200):
+    """Edges of a pin entering from the left of a 400 px wide image"""
+    columns = np.arange(400)
+    widths = width_at_left_px + widening_per_px * columns
+    top = np.where(columns < in_view_px, np.round(200 - widths / 2), -1)
+    bottom = np.where(columns < in_view_px, np.round(200 + widths / 2), -1)
+    return top.astype(np.int32), bottom.astype(np.int32)
+
+
+def test_estimate_off_screen_tip_px_extrapolates_narrowing_edges():
+    assert estimate_off_screen_tip_px(*_pin_edges(50, 0.5)) == pytest.approx(
+        -100, abs=1
+    )
+
+
+@pytest.mark.parametrize(
+    "edges",
+    [
+        _pin_edges(50, 0),
+        _pin_edges(50, -0.1),
+        _pin_edges(50, 0.5, in_view_px=5),
+        (np.array([]), np.array([])),
+        FAKE_EDGE_ARRAYS,
+    ],
+)
+def test_estimate_off_screen_tip_px_gives_none_if_edges_do_not_narrow(edges):
+    assert estimate_off_screen_tip_px(*edges) is None
+
+
+def test_estimate_off_screen_tip_px_gives_none_if_edges_are_nearly_parallel():
+    # Extrapolates to 1000 px off the image, more than its width
+    assert estimate_off_screen_tip_px(*_pin_edges(50, 0.05)) is None
+
+
+@patch("hyperion.experiment_plans.pin_tip_centring_plan.trigger_and_return_pin_tip")
+@patch(
+    "hyperion.experiment_plans.pin_tip_centring_plan.wait_for_oav_frame_after_move",
+    new=MagicMock(),
+)
+async def test_given_tip_off_screen_when_get_tip_into_view_then_smargon_moved_to_estimated_tip_in_one_step(
+    mock_trigger_and_return_pin_tip: MagicMock,
+    smargon: Smargon,
+    oav: OAV,
+    RE: RunEngine,
+    pin_tip: PinTipDetection,
+):
+    mock_trigger_and_return_pin_tip.side_effect = [
+        get_fake_pin_values_generator(0, 200),
+        get_fake_pin_values_generator(300, 200),
+    ]
+    top_edge, bottom_edge = _pin_edges(50, 0.5)
+    pin_tip._top_edge_setter(top_edge)
+    pin_tip._bottom_edge_setter(bottom_edge)
+    oav.parameters.micronsPerXPixel = 2
+    oav.parameters.beam_centre_i = 300
+    set_mock_value(smargon.x.user_readback, 0)
+
+    result = RE(move_pin_into_view(pin_tip, smargon, oav, max_steps=1))
+
+    # The tip is 400 px from the beam at 2 um per px
+    assert await smargon.x.user_readback.get_value() == pytest.approx(-0.8, abs=0.01)
+    assert result.plan_result == (300, 200)  # type: ignore
+
+
+@patch("hyperion.experiment_plans.pin_tip_centring_plan.trigger_and_return_pin_tip")
+@patch(
+    "hyperion.experiment_plans.pin_tip_centring_plan.wait_for_oav_frame_after_move",
+    new=MagicMock(),
+)
+async def test_given_tip_off_screen_and_edges_nearly_parallel_when_get_tip_into_view_then_smargon_moved_default_step(
+    mock_trigger_and_return_pin_tip: MagicMock,
+    smargon: Smargon,
+    oav: OAV,
+    RE: RunEngine,
+    pin_tip: PinTipDetection,
+):
+    mock_trigger_and_return_pin_tip.side_effect = [
+        get_fake_pin_values_generator(0, 200),
+        get_fake_pin_values_generator(300, 200),
+    ]
+    top_edge, bottom_edge = _pin_edges(50, 0.05)
+    pin_tip._top_edge_setter(top_edge)
+    pin_tip._bottom_edge_setter(bottom_edge)
+    oav.parameters.micronsPerXPixel = 2
+    oav.parameters.beam_centre_i = 300
+    set_mock_value(smargon.x.user_readback, 0)
+
+    RE(move_pin_into_view(pin_tip, smargon, oav, max_steps=1))
+
+    assert await smargon.x.user_readback.get_value() == -DEFAULT_STEP_SIZE
+
+
 def test_given_moving_out_of_range_when_move_with_warn_called_then_warning_exception(
     RE: RunEngine, smargon: Smargon
 ):
@@ -219,14 +330,17 @@ def return_pixel(pixel, *args):
     "hyperion.experiment_plans.pin_tip_centring_plan.pre_centring_setup_oav",
     autospec=True,
 )
-@patch("hyperion.experiment_plans.pin_tip_centring_plan.bps.sleep", autospec=True)
+@patch(
+    "hyperion.experiment_plans.pin_tip_centring_plan.wait_for_oav_frame_after_move",
+    autospec=True,
+)
 @patch(
     "hyperion.experiment_plans.pin_tip_centring_plan.move_smargon_warn_on_out_of_range",
     autospec=True,
 )
 async def test_when_pin_tip_centre_plan_called_then_expected_plans_called(
     move_smargon,
-    mock_sleep,
+    mock_wait_for_frame,
     mock_setup_oav,
     get_move: MagicMock,
     smargon: Smargon,
@@ -276,14 +390,17 @@ async def test_when_pin_tip_centre_plan_called_then_expected_plans_called(
     "hyperion.experiment_plans.pin_tip_centring_plan.pre_centring_setup_oav",
     autospec=True,
 )
-@patch("hyperion.experiment_plans.pin_tip_centring_plan.bps.sleep", autospec=True)
+@patch(
+    "hyperion.experiment_plans.pin_tip_centring_plan.wait_for_oav_frame_after_move",
+    autospec=True,
+)
 @patch(
     "hyperion.experiment_plans.pin_tip_centring_plan.move_smargon_warn_on_out_of_range",
     autospec=True,
 )
 def test_given_pin_tip_detect_using_ophyd_when_pin_tip_centre_plan_called_then_expected_plans_called(
     move_smargon,
-    mock_sleep,
+    mock_wait_for_frame,
     mock_setup_oav,
     mock_move_into_view,
     get_move: MagicMock,
@@ -308,6 +425,8 @@ def test_given_pin_tip_detect_using_ophyd_when_pin_tip_centre_plan_called_then_e
     mock_move_into_view.side_effect = partial(return_pixel, (100, 100))
     RE(pin_tip_centre_plan(composite, 50, test_config_files["oav_config_json"]))
 
-    mock_move_into_view.assert_called_once_with(mock_ophyd_pin_tip_detection, smargon)
+    mock_move_into_view.assert_called_once_with(
+        mock_ophyd_pin_tip_detection, smargon, mock_oav
+    )
 
     assert mock_setup_oav.call_count == 1
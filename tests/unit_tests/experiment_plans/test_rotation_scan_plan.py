@@ -15,6 +15,7 @@ from dodal.devices.synchrotron import SynchrotronMode
 from dodal.devices.zebra import Zebra
 from ophyd_async.core import get_mock_put
 
+from hyperion.device_setup_plans.check_topup import TOPUP_WAIT_GROUP
 from hyperion.experiment_plans.oav_snapshot_plan import (
     OAV_SNAPSHOT_GROUP,
     OAV_SNAPSHOT_SETUP_GROUP,
@@ -23,6 +24,7 @@ from hyperion.experiment_plans.rotation_scan_plan import (
     RotationMotionProfile,
     RotationScanComposite,
     calculate_motion_profile,
+    images_before_topup,
     rotation_scan,
     rotation_scan_plan,
 )
@@ -165,10 +167,96 @@ def test_rotation_scan(
     composite = fake_create_rotation_devices
     RE(rotation_scan(composite, test_rotation_params, oav_parameters_for_rotation))
 
-    composite.eiger.stage.assert_called()  # type: ignore
+    composite.eiger.do_arm.set.assert_called_once()  # type: ignore
     composite.eiger.unstage.assert_called()  # type: ignore
 
 
+def test_rotation_scan_arms_eiger_before_moving_gonio_and_waits_for_it_before_rotating(
+    fake_create_rotation_devices: RotationScanComposite,
+    sim_run_engine: RunEngineSimulator,
+    test_rotation_params: RotationScan,
+    oav_parameters_for_rotation: OAVParameters,
+):
+    _add_sim_handlers_for_normal_operation(fake_create_rotation_devices, sim_run_engine)
+    msgs = sim_run_engine.simulate_plan(
+        rotation_scan(
+            fake_create_rotation_devices,
+            test_rotation_params,
+            oav_parameters_for_rotation,
+        )
+    )
+
+    msgs = assert_message_and_return_remaining(
+        msgs,
+        lambda msg: msg.command == "set"
+        and msg.obj.name == "eiger_do_arm"
+        and msg.kwargs["group"] == CONST.WAIT.ROTATION_READY_FOR_DC,
+    )
+    msgs = assert_message_and_return_remaining(
+        msgs,
+        lambda msg: msg.command == "set"
+        and msg.kwargs["group"] == CONST.WAIT.MOVE_GONIO_TO_START,
+    )
+    msgs = assert_message_and_return_remaining(
+        msgs,
+        lambda msg: msg.command == "create"
+        and msg.kwargs["name"] == DocDescriptorNames.OAV_ROTATION_SNAPSHOT_TRIGGERED,
+    )
+    msgs = assert_message_and_return_remaining(
+        msgs,
+        lambda msg: msg.command == "wait"
+        and msg.kwargs["group"] == CONST.WAIT.ROTATION_READY_FOR_DC,
+    )
+    msgs = assert_message_and_return_remaining(
+        msgs, lambda msg: msg.command == "stage" and msg.obj.name == "eiger"
+    )
+    msgs = assert_message_and_return_remaining(
+        msgs,
+        lambda msg: msg.command == "create"
+        and msg.kwargs["name"] == CONST.DESCRIPTORS.ZOCALO_HW_READ,
+    )
+    msgs = assert_message_and_return_remaining(
+        msgs,
+        lambda msg: msg.command == "set"
+        and msg.obj is fake_create_rotation_devices.zebra.pc.arm,
+    )
+    assert_message_and_return_remaining(
+        msgs, lambda msg: msg.command == "unstage" and msg.obj.name == "eiger"
+    )
+
+
+def test_given_eiger_already_arming_then_rotation_scan_stages_it_without_arming(
+    fake_create_rotation_devices: RotationScanComposite,
+    sim_run_engine: RunEngineSimulator,
+    test_rotation_params: RotationScan,
+    oav_parameters_for_rotation: OAVParameters,
+):
+    _add_sim_handlers_for_normal_operation(fake_create_rotation_devices, sim_run_engine)
+    msgs = sim_run_engine.simulate_plan(
+        rotation_scan(
+            fake_create_rotation_devices,
+            test_rotation_params,
+            oav_parameters_for_rotation,
+            arm_eiger=False,
+        )
+    )
+
+    assert not [
+        msg for msg in msgs if msg.command == "set" and msg.obj.name == "eiger_do_arm"
+    ]
+    msgs = assert_message_and_return_remaining(
+        msgs,
+        lambda msg: msg.command == "wait"
+        and msg.kwargs["group"] == CONST.WAIT.ROTATION_READY_FOR_DC,
+    )
+    msgs = assert_message_and_return_remaining(
+        msgs, lambda msg: msg.command == "stage" and msg.obj.name == "eiger"
+    )
+    assert_message_and_return_remaining(
+        msgs, lambda msg: msg.command == "unstage" and msg.obj.name == "eiger"
+    )
+
+
 def test_rotation_plan_runs(
     setup_and_run_rotation_plan_for_tests_standard: dict[str, Any],
 ) -> None:
@@ -312,18 +400,96 @@ def test_rotation_plan_reads_hardware(
         lambda msg: msg.command == "create"
         and msg.kwargs["name"] == CONST.DESCRIPTORS.HARDWARE_READ_PRE,
     )
-    msgs_in_event = list(takewhile(lambda msg: msg.command != "save", msgs))
-    assert_message_and_return_remaining(
-        msgs_in_event, lambda msg: msg.command == "read" and msg.obj.name == "smargon-x"
+    read_names = [
+        readable.name
+        for msg in takewhile(lambda msg: msg.command != "save", msgs)
+        if msg.command == "read"
+        for readable in msg.obj.readables
+    ]
+    assert {"smargon-x", "smargon-y", "smargon-z"} <= set(read_names)
+
+
+def test_rotation_plan_starts_topup_wait_before_setup_and_finishes_it_before_rotating(
+    fake_create_rotation_devices: RotationScanComposite,
+    test_rotation_params: RotationScan,
+    motion_values,
+    sim_run_engine_for_rotation: RunEngineSimulator,
+):
+    _add_sim_handlers_for_normal_operation(
+        fake_create_rotation_devices, sim_run_engine_for_rotation
     )
-    assert_message_and_return_remaining(
-        msgs_in_event, lambda msg: msg.command == "read" and msg.obj.name == "smargon-y"
+    sim_run_engine_for_rotation.add_handler(
+        "read",
+        lambda msg: {"values": {"value": 5}},
+        "synchrotron-top_up_start_countdown",
     )
-    assert_message_and_return_remaining(
-        msgs_in_event, lambda msg: msg.command == "read" and msg.obj.name == "smargon-z"
+    sim_run_engine_for_rotation.add_handler(
+        "read",
+        lambda msg: {"values": {"value": 20}},
+        "synchrotron-top_up_end_countdown",
+    )
+    msgs = sim_run_engine_for_rotation.simulate_plan(
+        rotation_scan_plan(
+            fake_create_rotation_devices, test_rotation_params, motion_values
+        )
+    )
+
+    msgs = assert_message_and_return_remaining(
+        msgs,
+        lambda msg: msg.command == "set"
+        and msg.kwargs["group"] == TOPUP_WAIT_GROUP
+        and msg.args[0] == 20,
+    )
+    msgs = assert_message_and_return_remaining(
+        msgs, lambda msg: msg.command == "set" and msg.obj.name == "smargon-omega"
+    )
+    msgs = assert_message_and_return_remaining(
+        msgs,
+        lambda msg: msg.command == "set"
+        and msg.obj is fake_create_rotation_devices.zebra.pc.arm,
+    )
+    msgs = assert_message_and_return_remaining(
+        msgs,
+        lambda msg: msg.command == "wait" and msg.kwargs["group"] == TOPUP_WAIT_GROUP,
+    )
+    msgs = assert_message_and_return_remaining(
+        msgs, lambda msg: msg.command == "set" and msg.obj.name == "smargon-omega"
     )
 
 
+@pytest.mark.parametrize("create_nexus_before_collection", [True, False])
+def test_rotation_plan_reads_energy_and_bit_depth_pre_collection_only_if_writing_nexus_early(
+    fake_create_rotation_devices: RotationScanComposite,
+    test_rotation_params: RotationScan,
+    motion_values,
+    sim_run_engine_for_rotation: RunEngineSimulator,
+    create_nexus_before_collection: bool,
+):
+    _add_sim_handlers_for_normal_operation(
+        fake_create_rotation_devices, sim_run_engine_for_rotation
+    )
+    test_rotation_params.create_nexus_before_collection = create_nexus_before_collection
+    msgs = sim_run_engine_for_rotation.simulate_plan(
+        rotation_scan_plan(
+            fake_create_rotation_devices, test_rotation_params, motion_values
+        )
+    )
+
+    msgs = assert_message_and_return_remaining(
+        msgs,
+        lambda msg: msg.command == "create"
+        and msg.kwargs["name"] == CONST.DESCRIPTORS.HARDWARE_READ_PRE,
+    )
+    read_names = [
+        readable.name
+        for msg in takewhile(lambda msg: msg.command != "save", msgs)
+        if msg.command == "read"
+        for readable in msg.obj.readables
+    ]
+    assert ("dcm-energy_in_kev" in read_names) is create_nexus_before_collection
+    assert ("eiger_bit_depth" in read_names) is create_nexus_before_collection
+
+
 def test_rotation_scan_initialises_detector_distance_shutter_and_tx_fraction(
     sim_run_engine: RunEngineSimulator,
     fake_create_rotation_devices: RotationScanComposite,
@@ -372,6 +538,171 @@ def test_rotation_scan_initialises_detector_distance_shutter_and_tx_fraction(
     )
 
 
+@pytest.mark.parametrize(
+    "machine_mode, time_to_topup_s, expected_images",
+    [
+        (SynchrotronMode.USER, 110, 1000),
+        (SynchrotronMode.USER, 5, 0),
+        (SynchrotronMode.USER, 0, 0),
+        (SynchrotronMode.USER, 1510, 1500),
+        (SynchrotronMode.USER, -1, 1500),
+        (SynchrotronMode.SHUTDOWN, 110, 1500),
+    ],
+)
+def test_images_before_topup(
+    sim_run_engine: RunEngineSimulator,
+    fake_create_rotation_devices: RotationScanComposite,
+    machine_mode: SynchrotronMode,
+    time_to_topup_s: float,
+    expected_images: int,
+):
+    synchrotron = fake_create_rotation_devices.synchrotron
+    sim_run_engine.add_read_handler_for(synchrotron.synchrotron_mode, machine_mode)
+    sim_run_engine.add_read_handler_for(
+        synchrotron.top_up_start_countdown, time_to_topup_s
+    )
+
+    def _images_before_topup():
+        images = yield from images_before_topup(synchrotron, 1500, 0.1)
+        assert images == expected_images
+
+    sim_run_engine.simulate_plan(_images_before_topup())
+
+
+def _live_topup_countdown(
+    sim_run_engine: RunEngineSimulator,
+    countdown_s: float,
+    after_wedge_s: float | None = None,
+    after_sleep_s: float | None = None,
+):
+    """Fakes a top-up countdown which changes once the first wedge starts, or after
+    any sleep, so that each wedge sees a different one"""
+    countdown = {"value": countdown_s}
+
+    def _set_countdown(value: float | None):
+        if value is not None:
+            countdown["value"] = value
+
+    sim_run_engine.add_handler(
+        "read",
+        lambda msg: {"values": {"value": countdown["value"]}},
+        "synchrotron-top_up_start_countdown",
+    )
+    sim_run_engine.add_handler(
+        "read",
+        lambda msg: {"values": {"value": 15}},
+        "synchrotron-top_up_end_countdown",
+    )
+    sim_run_engine.add_handler(
+        "open_run",
+        lambda msg: _set_countdown(after_wedge_s),
+        lambda msg: msg.kwargs.get("subplan_name") == CONST.PLAN.ROTATION_OUTER,
+    )
+    sim_run_engine.add_handler("sleep", lambda msg: _set_countdown(after_sleep_s))
+
+
+def _wedge_params(msgs) -> list[RotationScan]:
+    msgs = assert_message_and_return_remaining(
+        msgs,
+        lambda msg: msg.command == "open_run"
+        and msg.kwargs["subplan_name"] == CONST.PLAN.ROTATION_MULTI,
+    )
+    return [
+        RotationScan.parse_raw(msg.kwargs["hyperion_parameters"])
+        for msg in msgs
+        if msg.command == "open_run"
+        and msg.kwargs["subplan_name"] == CONST.PLAN.ROTATION_OUTER
+    ]
+
+
+def test_given_split_around_topup_and_rotation_overlaps_topup_then_each_wedge_predicted_from_live_countdown(
+    fake_create_rotation_devices: RotationScanComposite,
+    sim_run_engine: RunEngineSimulator,
+    test_rotation_params: RotationScan,
+    oav_parameters_for_rotation: OAVParameters,
+):
+    _add_sim_handlers_for_normal_operation(fake_create_rotation_devices, sim_run_engine)
+    _live_topup_countdown(sim_run_engine, 100, after_wedge_s=590)
+    test_rotation_params.split_around_topup = True
+    test_rotation_params.scan_width_deg = 1000
+    msgs = sim_run_engine.simulate_plan(
+        rotation_scan(
+            fake_create_rotation_devices,
+            test_rotation_params,
+            oav_parameters_for_rotation,
+        )
+    )
+
+    wedges = _wedge_params(msgs)
+    assert [params.num_images for params in wedges] == [900, 5800, 3300]
+    assert [params.nexus_vds_start_img for params in wedges] == [0, 900, 6700]
+    assert [params.omega_start_deg for params in wedges] == pytest.approx(
+        [
+            test_rotation_params.omega_start_deg
+            + start_img * 0.1 * test_rotation_params.rotation_direction.multiplier
+            for start_img in [0, 900, 6700]
+        ]
+    )
+
+
+def test_given_split_around_topup_and_no_images_fit_before_topup_then_waits_for_topup_before_predicting_wedge(
+    fake_create_rotation_devices: RotationScanComposite,
+    sim_run_engine: RunEngineSimulator,
+    test_rotation_params: RotationScan,
+    oav_parameters_for_rotation: OAVParameters,
+):
+    _add_sim_handlers_for_normal_operation(fake_create_rotation_devices, sim_run_engine)
+    _live_topup_countdown(sim_run_engine, 5, after_sleep_s=590)
+    test_rotation_params.split_around_topup = True
+    test_rotation_params.scan_width_deg = 1000
+    msgs = sim_run_engine.simulate_plan(
+        rotation_scan(
+            fake_create_rotation_devices,
+            test_rotation_params,
+            oav_parameters_for_rotation,
+        )
+    )
+
+    assert [params.num_images for params in _wedge_params(msgs)] == [5800, 4200]
+    msgs = assert_message_and_return_remaining(
+        msgs, lambda msg: msg.command == "sleep" and msg.args[0] == 15
+    )
+    assert_message_and_return_remaining(
+        msgs,
+        lambda msg: msg.command == "open_run"
+        and msg.kwargs["subplan_name"] == CONST.PLAN.ROTATION_OUTER,
+    )
+
+
+def test_given_split_around_topup_and_rotation_fits_before_topup_then_not_split(
+    fake_create_rotation_devices: RotationScanComposite,
+    sim_run_engine: RunEngineSimulator,
+    test_rotation_params: RotationScan,
+    oav_parameters_for_rotation: OAVParameters,
+):
+    _add_sim_handlers_for_normal_operation(fake_create_rotation_devices, sim_run_engine)
+    sim_run_engine.add_handler(
+        "read",
+        lambda msg: {"values": {"value": 500}},
+        "synchrotron-top_up_start_countdown",
+    )
+    test_rotation_params.split_around_topup = True
+    msgs = sim_run_engine.simulate_plan(
+        rotation_scan(
+            fake_create_rotation_devices,
+            test_rotation_params,
+            oav_parameters_for_rotation,
+        )
+    )
+
+    assert not [
+        msg
+        for msg in msgs
+        if msg.command == "open_run"
+        and msg.kwargs["subplan_name"] == CONST.PLAN.ROTATION_MULTI
+    ]
+
+
 def test_rotation_scan_moves_gonio_to_start_before_snapshots(
     fake_create_rotation_devices: RotationScanComposite,
     sim_run_engine: RunEngineSimulator,
@@ -74,3 +74,71 @@ def test_set_energy(
         and msg.obj.name == "attenuator"
         and msg.args == (1.0,),
     )
+
+
+def _add_beamline_readings(
+    sim_run_engine,
+    energy_kev=11.1002,
+    gap_mm=6.9,
+    pitch_mrad=-0.7586,
+    roll_mrad=4.0,
+):
+    """Readings which are all where setting the energy to 11.1 keV would put them"""
+    for name, value in (
+        ("dcm-energy_in_kev", energy_kev),
+        ("undulator-current_gap", gap_mm),
+        ("undulator-gap_discrepancy_tolerance_mm", 0.05),
+        ("dcm-bragg_in_degrees", 5.0),
+        ("dcm-pitch_in_mrad", pitch_mrad),
+        ("dcm-roll_in_mrad", roll_mrad),
+    ):
+        sim_run_engine.add_handler(
+            "read",
+            lambda msg, name=name, value=value: {name: {"value": value}},
+            name,
+        )
+
+
+@patch(
+    "hyperion.experiment_plans.set_energy_plan.dcm_pitch_roll_mirror_adjuster.adjust_dcm_pitch_roll_vfm_from_lut",
+)
+def test_set_energy_does_nothing_if_already_at_energy(
+    mock_dcm_pra,
+    sim_run_engine,
+    set_energy_composite,
+):
+    _add_beamline_readings(sim_run_engine)
+    messages = sim_run_engine.simulate_plan(set_energy_plan(11.1, set_energy_composite))
+
+    assert {msg.command for msg in messages} == {"read"}
+    mock_dcm_pra.assert_not_called()
+
+
+@pytest.mark.parametrize(
+    "readings",
+    [
+        {"energy_kev": 11.2},
+        {"gap_mm": 7.0},
+        {"pitch_mrad": -0.75},
+        {"roll_mrad": 4.1},
+    ],
+)
+@patch(
+    "hyperion.experiment_plans.set_energy_plan.dcm_pitch_roll_mirror_adjuster.adjust_dcm_pitch_roll_vfm_from_lut",
+    side_effect=lambda *_, **__: iter([Msg("adjust_dcm_pitch_roll_vfm_from_lut")]),
+)
+def test_set_energy_changes_energy_if_anything_is_not_at_energy(
+    mock_dcm_pra,
+    sim_run_engine,
+    set_energy_composite,
+    readings,
+):
+    _add_beamline_readings(sim_run_engine, **readings)
+    messages = sim_run_engine.simulate_plan(set_energy_plan(11.1, set_energy_composite))
+
+    assert_message_and_return_remaining(
+        messages,
+        lambda msg: msg.command == "set"
+        and msg.obj.name == "undulator_dcm"
+        and msg.args == (11.1,),
+    )
@@ -18,6 +18,7 @@ from hyperion.experiment_plans.robot_load_then_centre_plan import (
     prepare_for_robot_load,
     robot_load_then_centre,
     take_robot_snapshots,
+    wait_for_smargon_not_disabled,
 )
 from hyperion.external_interaction.callbacks.robot_load.ispyb_callback import (
     RobotLoadISPyBCallback,
@@ -151,23 +152,18 @@ def test_robot_load_then_centre_doesnt_set_energy_if_not_specified_and_current_e
 def run_simulating_smargon_wait(
     robot_load_then_centre_params,
     robot_load_composite,
-    total_disabled_reads,
+    smargon_disabled: bool,
     sim_run_engine: RunEngineSimulator,
 ):
-    num_of_reads = 0
-
-    def return_not_disabled_after_reads(_):
-        nonlocal num_of_reads
-        num_of_reads += 1
-        return {"values": {"value": int(num_of_reads < total_disabled_reads)}}
-
     sim_run_engine.add_handler(
         "read",
         lambda msg: {"dcm-energy_in_kev": {"value": 11.105}},
         "dcm-energy_in_kev",
     )
     sim_run_engine.add_handler(
-        "read", return_not_disabled_after_reads, "smargon-disabled"
+        "read",
+        lambda msg: {"values": {"value": int(smargon_disabled)}},
+        "smargon-disabled",
     )
 
     return sim_run_engine.simulate_plan(
@@ -175,7 +171,7 @@ def run_simulating_smargon_wait(
     )
 
 
-@pytest.mark.parametrize("total_disabled_reads", [5, 3, 14])
+@pytest.mark.parametrize("smargon_disabled", [True, False])
 @patch(
     "hyperion.experiment_plans.robot_load_then_centre_plan.pin_centre_then_xray_centre_plan"
 )
@@ -183,52 +179,56 @@ def run_simulating_smargon_wait(
     "hyperion.experiment_plans.robot_load_then_centre_plan.set_energy_plan",
     MagicMock(return_value=iter([])),
 )
-def test_given_smargon_disabled_when_plan_run_then_waits_on_smargon(
+def test_given_smargon_disabled_when_plan_run_then_waits_on_smargon_without_polling(
     mock_centring_plan: MagicMock,
     robot_load_composite: RobotLoadThenCentreComposite,
     robot_load_then_centre_params: RobotLoadThenCentre,
-    total_disabled_reads: int,
+    smargon_disabled: bool,
     sim_run_engine,
 ):
     messages = run_simulating_smargon_wait(
         robot_load_then_centre_params,
         robot_load_composite,
-        total_disabled_reads,
+        smargon_disabled,
         sim_run_engine,
     )
 
     mock_centring_plan.assert_called_once()
 
-    sleep_messages = filter(lambda msg: msg.command == "sleep", messages)
-    read_disabled_messages = filter(
-        lambda msg: msg.command == "read" and msg.obj.name == "smargon-disabled",
+    messages = assert_message_and_return_remaining(
         messages,
+        lambda msg: msg.command == "read" and msg.obj.name == "smargon-disabled",
     )
+    wait_messages = [
+        msg
+        for msg in messages
+        if msg.command == "wait_for"
+        and msg.args[0][0].args[0] is robot_load_composite.smargon.disabled
+    ]
+    assert len(wait_messages) == int(smargon_disabled)
+    assert not any(msg.command == "sleep" for msg in messages)
+
+
+def test_given_smargon_disabled_for_longer_than_timeout_when_waiting_then_throws_exception(
+    robot_load_composite: RobotLoadThenCentreComposite, RE: RunEngine
+):
+    set_mock_value(robot_load_composite.smargon.disabled, 1)
 
-    assert len(list(sleep_messages)) == total_disabled_reads - 1
-    assert len(list(read_disabled_messages)) == total_disabled_reads
+    with pytest.raises(TimeoutError):
+        RE(wait_for_smargon_not_disabled(robot_load_composite.smargon, timeout=0.1))
 
 
-@patch(
-    "hyperion.experiment_plans.robot_load_then_centre_plan.pin_centre_then_xray_centre_plan"
-)
-@patch(
-    "hyperion.experiment_plans.robot_load_then_centre_plan.set_energy_plan",
-    MagicMock(return_value=iter([])),
-)
-def test_given_smargon_disabled_for_longer_than_timeout_when_plan_run_then_throws_exception(
-    mock_centring_plan: MagicMock,
-    robot_load_composite: RobotLoadThenCentreComposite,
-    robot_load_then_centre_params: RobotLoadThenCentre,
-    sim_run_engine,
+def test_given_smargon_enabled_during_wait_then_wait_returns(
+    robot_load_composite: RobotLoadThenCentreComposite, RE: RunEngine
 ):
-    with pytest.raises(TimeoutError):
-        run_simulating_smargon_wait(
-            robot_load_then_centre_params,
-            robot_load_composite,
-            1000,
-            sim_run_engine,
-        )
+    set_mock_value(robot_load_composite.smargon.disabled, 1)
+    RE.loop.call_soon_threadsafe(
+        RE.loop.call_later,
+        0.1,
+        partial(set_mock_value, robot_load_composite.smargon.disabled, 0),
+    )
+
+    RE(wait_for_smargon_not_disabled(robot_load_composite.smargon, timeout=5))
 
 
 @patch(
@@ -247,7 +247,7 @@ def test_when_plan_run_then_detector_arm_started_before_wait_on_robot_load(
     messages = run_simulating_smargon_wait(
         robot_load_then_centre_params,
         robot_load_composite,
-        1,
+        False,
         sim_run_engine,
     )
 
@@ -76,21 +76,9 @@ class TestZocaloHandler:
         )
         assert zocalo_handler.zocalo_interactor is not None
 
-    @patch(
-        "hyperion.external_interaction.callbacks.zocalo_callback.ZocaloTrigger",
-        autospec=True,
-    )
-    @patch(
-        "hyperion.external_interaction.callbacks.xray_centre.nexus_callback.NexusWriter",
-    )
-    @patch(
-        "hyperion.external_interaction.callbacks.xray_centre.ispyb_callback.StoreInIspyb",
-    )
-    def test_execution_of_do_fgs_triggers_zocalo_calls(
-        self, ispyb_store: MagicMock, nexus_writer: MagicMock, zocalo_trigger
+    def _start_gridscan_callbacks_up_to_collection(
+        self, ispyb_store: MagicMock, dc_ids: tuple[int, ...], dcg_id: int
     ):
-        dc_ids = (1, 2)
-        dcg_id = 4
 
         mock_ids = IspybIds(data_collection_ids=dc_ids, data_collection_group_id=dcg_id)
         ispyb_store.return_value.mock_add_spec(StoreInIspyb)
@@ -116,6 +104,26 @@ class TestZocaloHandler:
         )
         ispyb_cb.event(td.test_event_document_during_data_collection)
         assert zocalo_handler.zocalo_interactor is not None
+        return ispyb_cb, zocalo_handler
+
+    @patch(
+        "hyperion.external_interaction.callbacks.zocalo_callback.ZocaloTrigger",
+        autospec=True,
+    )
+    @patch(
+        "hyperion.external_interaction.callbacks.xray_centre.nexus_callback.NexusWriter",
+    )
+    @patch(
+        "hyperion.external_interaction.callbacks.xray_centre.ispyb_callback.StoreInIspyb",
+    )
+    def test_execution_of_do_fgs_triggers_zocalo_calls(
+        self, ispyb_store: MagicMock, nexus_writer: MagicMock, zocalo_trigger
+    ):
+        dc_ids = (1, 2)
+        dcg_id = 4
+        ispyb_cb, zocalo_handler = self._start_gridscan_callbacks_up_to_collection(
+            ispyb_store, dc_ids, dcg_id
+        )
 
         expected_start_calls = [
             call(ZocaloStartInfo(1, "test_path", 0, 200, 0)),
@@ -135,3 +143,45 @@ class TestZocaloHandler:
         assert zocalo_handler.zocalo_interactor.run_end.call_count == len(dc_ids)  # type: ignore
 
         zocalo_handler._reset_state.assert_called()
+
+    @patch(
+        "hyperion.external_interaction.callbacks.zocalo_callback.ZocaloTrigger",
+        autospec=True,
+    )
+    @patch(
+        "hyperion.external_interaction.callbacks.xray_centre.nexus_callback.NexusWriter",
+    )
+    @patch(
+        "hyperion.external_interaction.callbacks.xray_centre.ispyb_callback.StoreInIspyb",
+    )
+    def test_frames_written_events_end_zocalo_run_for_each_grid_once_its_frames_are_written(
+        self, ispyb_store: MagicMock, nexus_writer: MagicMock, zocalo_trigger
+    ):
+        ispyb_cb, zocalo_handler = self._start_gridscan_callbacks_up_to_collection(
+            ispyb_store, (1, 2), 4
+        )
+        ispyb_cb.descriptor(
+            {
+                "uid": "frames_written_descriptor",
+                "run_start": "d8bee3ee-f614-4e7a-a516-25d6b9e87ef3",
+                "name": CONST.DESCRIPTORS.GRIDSCAN_FRAMES_WRITTEN,
+            }  # type: ignore
+        )
+        run_end = zocalo_handler.zocalo_interactor.run_end  # type: ignore
+
+        for seq_num, frames_written in enumerate([0, 150, 200, 500], start=1):
+            ispyb_cb.event(
+                {
+                    "uid": f"frames_written_event_{seq_num}",
+                    "time": 1709654584.0,
+                    "data": {"eiger_odin_file_writer_num_captured": frames_written},
+                    "timestamps": {},
+                    "seq_num": seq_num,
+                    "descriptor": "frames_written_descriptor",
+                }  # type: ignore
+            )
+            assert run_end.mock_calls == ([call(1)] if frames_written >= 200 else [])
+
+        ispyb_cb.stop(td.test_stop_document)
+
+        assert run_end.mock_calls == [call(1), call(2)]
@@ -0,0 +1,242 @@
+import subprocess
+import sys
+from pathlib import Path
+
+import h5py
+import numpy as np
+import pytest
+from dodal.devices.zocalo import ZocaloStartInfo, ZocaloTrigger
+from dodal.devices.zocalo.zocalo_results import NoResultsFromZocalo
+
+from hyperion.external_interaction.callbacks.zocalo_callback import ZocaloCallback
+from hyperion.external_interaction.local_zocalo import (
+    LocalZocalo,
+    LocalZocaloResults,
+    LocalZocaloTrigger,
+    _Run,
+    count_spots,
+    find_crystals,
+    local_zocalo_environment,
+    start_local_zocalo,
+)
+from hyperion.external_interaction.nexus.nexus_utils import (
+    create_beam_and_attenuator_parameters,
+)
+from hyperion.external_interaction.nexus.write_nexus import NexusWriter
+from hyperion.parameters.constants import CONST
+from hyperion.parameters.gridscan import ThreeDGridScan
+
+
+def test_count_spots_counts_connected_pixels_above_threshold_in_each_image():
+    images = np.zeros((3, 10, 10), dtype=np.uint16)
+    images[0, 1:3, 1:3] = 10
+    images[0, 6, 6] = 10
+    images[1, 4, 4] = 2
+    images[2, 5, 5] = np.iinfo(np.uint16).max
+    images[2, 8, 8:] = 10
+
+    assert list(count_spots(images, pixel_threshold=3)) == [2, 0, 1]
+
+
+def test_find_crystals_combines_xy_and_xz_grids():
+    xy = np.zeros((5, 4))
+    xy[1:3, 2] = 10
+    xz = np.zeros((5, 3))
+    xz[1:3, 1] = 10
+
+    [crystal] = find_crystals([xy, xz], voxel_threshold=0.25)
+
+    assert crystal["centre_of_mass"] == [2.0, 2.5, 1.5]
+    assert crystal["bounding_box"] == [[1, 2, 1], [3, 3, 2]]
+    assert crystal["n_voxels"] == 2
+    assert crystal["total_count"] == 200
+
+
+def test_find_crystals_with_no_spots_finds_nothing():
+    assert find_crystals([np.zeros((5, 4)), np.zeros((5, 3))], 0.25) == []
+
+
+def _frame_index(params: ThreeDGridScan, x: int, row: int) -> int:
+    # Rows of the grids are snaked
+    return row * params.x_steps + (x if row % 2 == 0 else params.x_steps - 1 - x)
+
+
+def _write_gridscan(params: ThreeDGridScan, crystal_at: tuple[int, int, int]) -> str:
+    """Writes the nexus files for both grids, as Hyperion would, and a data file with
+    spots on the frames of the boxes the crystal is in. Returns the data filename."""
+    # The run number is found from the files in the directory so must be fixed first
+    run_number = params.detector_params.run_number
+    filename = params.detector_params.full_filename
+    grid_n_img_1 = params.scan_indices[1]
+    d_size = params.detector_params.detector_size_constants.det_size_pixels
+    for grid, (n_img, points, vds_start) in enumerate(
+        [
+            (grid_n_img_1, params.scan_points_first_grid, 0),
+            (
+                params.num_images - grid_n_img_1,
+                params.scan_points_second_grid,
+                grid_n_img_1,
+            ),
+        ]
+    ):
+        writer = NexusWriter(
+            params,
+            (n_img, d_size.width, d_size.height),
+            points,
+            run_number=run_number + grid,
+            meta_data_run_number=run_number,
+            vds_start_index=vds_start,
+        )
+        writer.beam, writer.attenuator = create_beam_and_attenuator_parameters(
+            12.7, 1e12, 0.5
+        )
+        writer.create_nexus_file(np.uint16)
+    with h5py.File(writer.master_file) as master:
+        image_shape = master["entry/data/data"].shape[1:]  # type: ignore
+
+    x, y, z = crystal_at
+    spots = np.zeros(image_shape, dtype=np.uint16)
+    spots[100:103, 100:103] = 10
+    spots[500, 500:510] = 10
+    with h5py.File(
+        Path(params.storage_directory) / f"{filename}_000001.h5", "w"
+    ) as data_file:
+        # Chunked by frame, as the detector writes them
+        data = data_file.create_dataset(
+            "data",
+            (params.num_images, *image_shape),
+            dtype=np.uint16,
+            chunks=(1, *image_shape),
+            compression="gzip",
+        )
+        data[_frame_index(params, x, y)] = spots
+        spots[100:103, 100:103] = 0
+        data[grid_n_img_1 + _frame_index(params, x, z)] = spots
+    return filename
+
+
+@pytest.fixture
+def local_zocalo_params(test_fgs_params: ThreeDGridScan, tmp_path: Path):
+    test_fgs_params.storage_directory = str(tmp_path)
+    test_fgs_params.x_steps = 4
+    test_fgs_params.y_steps = 3
+    test_fgs_params.z_steps = 2
+    return test_fgs_params
+
+
+@pytest.fixture
+def local_zocalo(tmp_path: Path):
+    service = start_local_zocalo(tmp_path / "spool", tmp_path, min_spots=1)
+    yield service
+    service.stop()
+
+
+async def test_local_zocalo_finds_crystal_in_written_frames_and_publishes_results(
+    local_zocalo: LocalZocalo, local_zocalo_params: ThreeDGridScan
+):
+    filename = _write_gridscan(local_zocalo_params, crystal_at=(2, 1, 1))
+    zocalo = LocalZocaloResults(
+        zocalo_environment=local_zocalo.environment, timeout_s=5
+    )
+    await zocalo.connect()
+    await zocalo.stage()
+    trigger = LocalZocaloTrigger(local_zocalo.environment)
+    grid_n_img_1 = local_zocalo_params.scan_indices[1]
+
+    trigger.run_start(ZocaloStartInfo(100, filename, 0, grid_n_img_1, 0))
+    trigger.run_start(
+        ZocaloStartInfo(
+            101,
+            filename,
+            grid_n_img_1,
+            local_zocalo_params.num_images - grid_n_img_1,
+            1,
+        )
+    )
+    trigger.run_end(100)
+    trigger.run_end(101)
+    await zocalo.trigger()
+
+    [result] = await zocalo.results.get_value()
+    assert result["centre_of_mass"] == [2.5, 1.5, 1.5]
+    assert result["max_count"] == 2
+    assert await zocalo.ispyb_dcid.get_value() == 100
+    await zocalo.unstage()
+
+
+async def test_local_zocalo_results_times_out_if_nothing_is_published(
+    tmp_path: Path,
+):
+    zocalo = LocalZocaloResults(
+        zocalo_environment=local_zocalo_environment(tmp_path), timeout_s=0.1
+    )
+    await zocalo.connect()
+    await zocalo.stage()
+
+    with pytest.raises(NoResultsFromZocalo):
+        await zocalo.trigger()
+
+
+async def test_local_zocalo_results_staging_clears_stale_results(
+    local_zocalo: LocalZocalo,
+):
+    zocalo = LocalZocaloResults(
+        zocalo_environment=local_zocalo.environment, timeout_s=0.1
+    )
+    await zocalo.connect()
+    local_zocalo._publish_results([])
+
+    await zocalo.stage()
+
+    with pytest.raises(NoResultsFromZocalo):
+        await zocalo.trigger()
+
+
+def test_local_zocalo_finds_master_file_of_each_grid_from_data_filename(
+    tmp_path: Path,
+):
+    service = LocalZocalo(tmp_path / "spool", tmp_path)
+
+    assert (
+        service._master_file(_Run(100, "my_sample_2_3", 1, 10))
+        == tmp_path / "my_sample_2_4_master.h5"
+    )
+    with pytest.raises(ValueError, match="run number"):
+        service._master_file(_Run(100, "my_sample", 1, 10))
+
+
+@pytest.mark.parametrize(
+    "environment, expected_trigger",
+    [
+        (CONST.ZOCALO_ENV, ZocaloTrigger),
+        (f"{CONST.LOCAL_ZOCALO_ENV_PREFIX}/tmp/spool", LocalZocaloTrigger),
+    ],
+)
+def test_zocalo_callback_only_uses_local_trigger_for_local_environment(
+    environment: str, expected_trigger: type
+):
+    callback = ZocaloCallback()
+    callback.start(
+        {
+            "uid": "test",
+            "time": 0,
+            CONST.TRIGGER.ZOCALO: "test_plan",
+            "zocalo_environment": environment,
+        }  # type: ignore
+    )
+
+    assert type(callback.zocalo_interactor) is expected_trigger
+
+
+def test_zocalo_callback_does_not_import_local_zocalo():
+    # Run in a fresh interpreter as this module imports it
+    subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            "import sys;"
+            "import hyperion.external_interaction.callbacks.zocalo_callback;"
+            "assert 'hyperion.external_interaction.local_zocalo' not in sys.modules",
+        ],
+        check=True,
+    )
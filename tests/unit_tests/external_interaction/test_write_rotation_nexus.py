@@ -12,6 +12,7 @@ from h5py import Dataset, ExternalLink, Group
 
 from hyperion.device_setup_plans.read_hardware_for_setup import (
     read_hardware_during_collection,
+    read_hardware_pre_collection,
 )
 from hyperion.experiment_plans.rotation_scan_plan import RotationScanComposite
 from hyperion.external_interaction.callbacks.rotation.nexus_callback import (
@@ -73,6 +74,43 @@ def fake_rotation_scan(
     return plan()
 
 
+def fake_rotation_scan_with_pre_collection_read(
+    parameters: RotationScan,
+    subscription: RotationNexusFileCallback,
+    rotation_devices: RotationScanComposite,
+    after_pre_collection_read_do,
+):
+    @bpp.subs_decorator(subscription)
+    @bpp.set_run_key_decorator("rotation_scan_with_cleanup_and_subs")
+    @bpp.run_decorator(
+        md={
+            "subplan_name": CONST.PLAN.ROTATION_OUTER,
+            "hyperion_parameters": parameters.json(),
+            "activate_callbacks": "RotationNexusFileCallback",
+        }
+    )
+    def plan():
+        yield from read_hardware_pre_collection(
+            rotation_devices.undulator,
+            rotation_devices.synchrotron,
+            rotation_devices.s4_slit_gaps,
+            rotation_devices.robot,
+            rotation_devices.smargon,
+            dcm=rotation_devices.dcm,
+            detector=rotation_devices.eiger,
+        )
+        after_pre_collection_read_do()
+        yield from read_hardware_during_collection(
+            rotation_devices.aperture_scatterguard,
+            rotation_devices.attenuator,
+            rotation_devices.flux,
+            rotation_devices.dcm,
+            rotation_devices.eiger,
+        )
+
+    return plan()
+
+
 def dectris_device_mapping(meta_filename: str):
     return {
         "entry": {
@@ -480,3 +518,75 @@ def test_override_parameters_override(test_params: RotationScan):
     assert writer.full_num_of_images != test_params.num_images
     assert writer.full_num_of_images == 82367
     assert writer.data_filename == f"{test_params.file_name}_9852"
+
+
+def test_given_create_nexus_before_collection_then_nexus_written_on_pre_collection_read_and_updated_during(
+    test_params: RotationScan,
+    tmpdir,
+    fake_create_rotation_devices: RotationScanComposite,
+):
+    test_params.create_nexus_before_collection = True
+    test_params.transmission_frac = 0.1
+    run_number = test_params.detector_params.run_number
+    nexus_filename = f"{tmpdir}/{TEST_FILENAME}_{run_number}.nxs"
+    master_filename = f"{tmpdir}/{TEST_FILENAME}_{run_number}_master.h5"
+    transmission = "/entry/instrument/attenuator/attenuator_transmission"
+    flux = "/entry/instrument/beam/total_flux"
+
+    fake_create_rotation_devices.eiger.bit_depth.sim_put(32)  # type: ignore
+    fake_create_rotation_devices.flux.flux_reading.sim_put(10.0)  # type: ignore
+
+    # Downstream processing may have the early files open while they are updated
+    early_readers: list[h5py.File] = []
+
+    def check_files_written_early():
+        for filename in [nexus_filename, master_filename]:
+            assert os.path.isfile(filename)
+            nexus = h5py.File(filename, "r")
+            early_readers.append(nexus)
+            assert nexus["/entry/data/data"].dtype == "uint32"  # type: ignore
+            assert np.isclose(nexus[transmission][()], 0.1)  # type: ignore
+            assert flux not in nexus
+
+    RE = RunEngine({})
+    RE(
+        fake_rotation_scan_with_pre_collection_read(
+            test_params,
+            RotationNexusFileCallback(),
+            fake_create_rotation_devices,
+            check_files_written_early,
+        )
+    )
+
+    for nexus in early_readers:
+        assert np.isclose(nexus[transmission][()], 0.1)  # type: ignore
+        nexus.close()
+    for filename in [nexus_filename, master_filename]:
+        with h5py.File(filename, "r") as nexus:
+            assert np.isclose(nexus[transmission][()], 0.49118047952)  # type: ignore
+            assert nexus[flux][()] == 10.0  # type: ignore
+            assert nexus[flux].attrs["units"] == b"Hz"  # type: ignore
+    assert not list(Path(tmpdir).glob("*.tmp"))
+
+
+def test_given_not_create_nexus_before_collection_then_nexus_not_written_on_pre_collection_read(
+    test_params: RotationScan,
+    tmpdir,
+    fake_create_rotation_devices: RotationScanComposite,
+):
+    run_number = test_params.detector_params.run_number
+    nexus_filename = f"{tmpdir}/{TEST_FILENAME}_{run_number}.nxs"
+
+    def check_file_not_written():
+        assert not os.path.isfile(nexus_filename)
+
+    RE = RunEngine({})
+    RE(
+        fake_rotation_scan_with_pre_collection_read(
+            test_params,
+            RotationNexusFileCallback(),
+            fake_create_rotation_devices,
+            check_file_not_written,
+        )
+    )
+    assert os.path.isfile(nexus_filename)
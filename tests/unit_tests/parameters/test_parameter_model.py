@@ -110,3 +110,62 @@ def test_osc_is_used():
         params = RotationScan(**raw_params)
         assert params.rotation_increment_deg == osc
         assert params.num_images == int(params.scan_width_deg / osc)
+
+
+def test_rotation_scan_as_wedges_is_contiguous_and_covers_every_image():
+    raw_params = raw_params_from_file(
+        "tests/test_data/parameter_json_files/good_test_rotation_scan_parameters.json"
+    )
+    raw_params["omega_start_deg"] = 10
+    params = RotationScan(**raw_params)
+    wedges = params.as_wedges([290, 1000, 1000])
+
+    assert [scan.num_images for scan in wedges.single_rotation_scans] == [
+        290,
+        1000,
+        510,
+    ]
+    assert [scan.omega_start_deg for scan in wedges.rotation_scans] == pytest.approx(
+        [10, -19, -119]
+    )
+    assert wedges.scan_indices == [0, 290, 1290, 1800]
+    assert wedges.write_combined_nexus
+    for scan in wedges.single_rotation_scans:
+        assert scan.x_start_um == params.x_start_um
+        assert scan.chi_start_deg == params.chi_start_deg
+        assert scan.exposure_time_s == params.exposure_time_s
+        assert not scan.split_around_topup
+
+
+@pytest.mark.parametrize("num_images", [29, 290, 1, 1799])
+def test_rotation_scan_wedge_has_exactly_its_number_of_images(num_images: int):
+    raw_params = raw_params_from_file(
+        "tests/test_data/parameter_json_files/good_test_rotation_scan_parameters.json"
+    )
+    raw_params["rotation_increment_deg"] = 0.1
+    params = RotationScan(**raw_params)
+
+    wedge = params.wedge(1, num_images)
+
+    assert wedge.scan_width_deg == num_images * 0.1
+    assert wedge.num_images == num_images
+    assert wedge.nexus_vds_start_img == 1
+    assert not wedge.split_around_topup
+
+
+def test_rotation_scan_at_positions_repeats_scan_at_each_position():
+    raw_params = raw_params_from_file(
+        "tests/test_data/parameter_json_files/good_test_rotation_scan_parameters.json"
+    )
+    params = RotationScan(**raw_params)
+    positions = [(1, 2, 3), (4, 5, 6)]
+    scans = params.at_positions(positions)
+
+    assert [
+        (scan.x_start_um, scan.y_start_um, scan.z_start_um)
+        for scan in scans.single_rotation_scans
+    ] == positions
+    assert scans.scan_indices == [0, params.num_images, 2 * params.num_images]
+    for scan in scans.single_rotation_scans:
+        assert scan.omega_start_deg == params.omega_start_deg
+        assert scan.num_images == params.num_images
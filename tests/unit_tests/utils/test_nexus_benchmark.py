@@ -0,0 +1,72 @@
+import argparse
+import json
+from pathlib import Path
+
+import h5py
+import pytest
+
+from hyperion.utils.nexus_benchmark import (
+    _grid_size,
+    benchmark_gridscan_nexus,
+    benchmark_rotation_nexus,
+    run_nexus_benchmarks,
+)
+
+
+def test_rotation_benchmark_writes_nexus_with_requested_images(tmp_path: Path):
+    result = benchmark_rotation_nexus(50, 16, tmp_path)
+
+    assert result.scan_type == "rotation"
+    assert result.num_images == 50
+    assert result.create_nexus_file_s > 0
+    assert result.peak_memory_mb > 0
+    nexus_files = list(tmp_path.glob("*.nxs"))
+    assert len(nexus_files) == 1
+    with h5py.File(nexus_files[0]) as nxs:
+        assert nxs["/entry/data/data"].shape[0] == 50  # type: ignore
+    assert result.file_size_bytes == sum(f.stat().st_size for f in tmp_path.iterdir())
+
+
+def test_gridscan_benchmark_writes_both_grids(tmp_path: Path):
+    result = benchmark_gridscan_nexus((4, 3, 2), 8, tmp_path)
+
+    assert result.scan_type == "gridscan"
+    assert result.num_images == 4 * 3 + 4 * 2
+    assert len(list(tmp_path.glob("*.nxs"))) == 2
+    assert len(list(tmp_path.glob("*_master.h5"))) == 2
+
+
+def test_run_nexus_benchmarks_saves_every_combination_as_json(tmp_path: Path):
+    output_file = tmp_path / "benchmark.json"
+
+    results = run_nexus_benchmarks(output_file, [10, 20], [(3, 2, 2)], [8, 32])
+
+    with open(output_file) as f:
+        saved = json.load(f)
+    assert len(results) == len(saved["results"]) == 6
+    assert {"timestamp", "hyperion_version", "nexgen_version"} <= saved.keys()
+    assert {
+        (r["scan_type"], r["num_images"], r["bit_depth"]) for r in saved["results"]
+    } == {
+        ("rotation", 10, 8),
+        ("rotation", 20, 8),
+        ("gridscan", 12, 8),
+        ("rotation", 10, 32),
+        ("rotation", 20, 32),
+        ("gridscan", 12, 32),
+    }
+
+
+def test_benchmarks_run_from_outside_the_repository(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+):
+    monkeypatch.chdir(tmp_path)
+
+    benchmark_rotation_nexus(10, 8, tmp_path)
+    benchmark_gridscan_nexus((3, 2, 2), 8, tmp_path)
+
+
+def test_grid_sizes_must_have_three_components():
+    assert _grid_size("4,3,2") == (4, 3, 2)
+    with pytest.raises(argparse.ArgumentTypeError):
+        _grid_size("4,3")